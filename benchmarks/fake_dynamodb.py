@@ -0,0 +1,224 @@
+"""
+In-memory stand-in for the boto3 DynamoDB resource used by the offline benchmarks.
+
+Only the calls the lambdas make are implemented: Table().get_item/put_item/
+delete_item/scan, batch_get_item and meta.client.transact_write_items with the
+condition and update expressions used for reservations. Items are stored with
+Decimal numbers like the real resource returns them.
+"""
+import copy
+import re
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+from types import SimpleNamespace
+
+from botocore.exceptions import ClientError
+
+_ATTRIBUTE_FUNCTION = re.compile(r'^(attribute_exists|attribute_not_exists)\((\S+)\)$')
+_COMPARISON = re.compile(r'^(\S+)\s*(>=|<=|=|>|<)\s*(:\w+)$')
+_SET_ARITHMETIC = re.compile(r'^SET\s+(\S+)\s*=\s*(\S+)\s*([+-])\s*(:\w+)$')
+
+
+def _client_error(code, message, operation, **extra):
+    return ClientError({'Error': {'Code': code, 'Message': message}, **extra}, operation)
+
+
+def _name(token, names):
+    return names.get(token, token) if token.startswith('#') else token
+
+
+def _condition_holds(expression, item, names, values):
+    if not expression:
+        return True
+    expression = expression.strip()
+
+    match = _ATTRIBUTE_FUNCTION.match(expression)
+    if match:
+        exists = item is not None and _name(match.group(2), names) in item
+        return exists if match.group(1) == 'attribute_exists' else not exists
+
+    match = _COMPARISON.match(expression)
+    if match:
+        if item is None or _name(match.group(1), names) not in item:
+            return False
+        left = item[_name(match.group(1), names)]
+        right = values[match.group(3)]
+        return {
+            '>=': left >= right, '<=': left <= right, '=': left == right, '>': left > right, '<': left < right,
+        }[match.group(2)]
+
+    raise NotImplementedError(f"Condition not supported by the fake: {expression}")
+
+
+def _apply_update(expression, item, names, values):
+    match = _SET_ARITHMETIC.match(expression.strip())
+    if not match or match.group(1) != match.group(2):
+        raise NotImplementedError(f"Update not supported by the fake: {expression}")
+    attribute = _name(match.group(1), names)
+    amount = Decimal(str(values[match.group(4)]))
+    current = Decimal(str(item.get(attribute, 0)))
+    item[attribute] = current - amount if match.group(3) == '-' else current + amount
+
+
+def _project(item, projection, names):
+    if not projection:
+        return copy.deepcopy(item)
+    attributes = [_name(token.strip(), names) for token in projection.split(',')]
+    return {attribute: copy.deepcopy(item[attribute]) for attribute in attributes if attribute in item}
+
+
+class FakeTable:
+    def __init__(self, db, name, hash_key):
+        self.db = db
+        self.name = name
+        self.hash_key = hash_key
+        self.items = {}
+
+    def _key(self, key):
+        return key[self.hash_key]
+
+    def get_item(self, Key, ConsistentRead=False, **kwargs):
+        self.db._call('GetItem')
+        with self.db.lock:
+            item = self.items.get(self._key(Key))
+            return {'Item': copy.deepcopy(item)} if item is not None else {}
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None, **kwargs):
+        self.db._call('PutItem')
+        with self.db.lock:
+            current = self.items.get(Item[self.hash_key])
+            if not _condition_holds(ConditionExpression, current, ExpressionAttributeNames or {},
+                                    ExpressionAttributeValues or {}):
+                raise _client_error('ConditionalCheckFailedException', 'The conditional request failed', 'PutItem')
+            self.items[Item[self.hash_key]] = copy.deepcopy(Item)
+        return {}
+
+    def delete_item(self, Key, **kwargs):
+        self.db._call('DeleteItem')
+        with self.db.lock:
+            self.items.pop(self._key(Key), None)
+        return {}
+
+    def scan(self, ProjectionExpression=None, ExpressionAttributeNames=None, ExclusiveStartKey=None, **kwargs):
+        self.db._call('Scan')
+        with self.db.lock:
+            keys = sorted(self.items)
+            start = keys.index(self._key(ExclusiveStartKey)) + 1 if ExclusiveStartKey else 0
+            page = keys[start:start + self.db.scan_page_size]
+            response = {
+                'Items': [_project(self.items[key], ProjectionExpression, ExpressionAttributeNames or {})
+                          for key in page],
+            }
+            if start + self.db.scan_page_size < len(keys):
+                response['LastEvaluatedKey'] = {self.hash_key: page[-1]}
+            return response
+
+    def batch_writer(self, **kwargs):
+        return _BatchWriter(self)
+
+
+class _BatchWriter:
+    def __init__(self, table):
+        self.table = table
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def put_item(self, Item):
+        self.table.put_item(Item=Item)
+
+
+class _FakeClient:
+    def __init__(self, db):
+        self.db = db
+
+    def transact_write_items(self, TransactItems, **kwargs):
+        self.db._call('TransactWriteItems')
+        with self.db.lock:
+            reasons = []
+            for entry in TransactItems:
+                (operation, spec), = entry.items()
+                table = self.db.Table(spec['TableName'])
+                key = spec['Item'][table.hash_key] if operation == 'Put' else table._key(spec['Key'])
+                holds = _condition_holds(spec.get('ConditionExpression'), table.items.get(key),
+                                         spec.get('ExpressionAttributeNames', {}),
+                                         spec.get('ExpressionAttributeValues', {}))
+                reasons.append({'Code': 'None' if holds else 'ConditionalCheckFailed'})
+
+            if any(reason['Code'] != 'None' for reason in reasons):
+                raise _client_error('TransactionCanceledException', 'Transaction cancelled', 'TransactWriteItems',
+                                    CancellationReasons=reasons)
+
+            for entry in TransactItems:
+                (operation, spec), = entry.items()
+                table = self.db.Table(spec['TableName'])
+                if operation == 'Put':
+                    table.items[spec['Item'][table.hash_key]] = copy.deepcopy(spec['Item'])
+                elif operation == 'Delete':
+                    table.items.pop(table._key(spec['Key']), None)
+                elif operation == 'Update':
+                    item = table.items.setdefault(table._key(spec['Key']), dict(spec['Key']))
+                    _apply_update(spec['UpdateExpression'], item, spec.get('ExpressionAttributeNames', {}),
+                                  spec.get('ExpressionAttributeValues', {}))
+        return {}
+
+
+class FakeDynamoDB:
+    """
+    Args:
+        latency_ms: Simulated round trip added to every call
+        scan_page_size: Items per Scan page, small values exercise pagination
+    """
+
+    def __init__(self, latency_ms=0.0, scan_page_size=1000):
+        self.latency_ms = latency_ms
+        self.scan_page_size = scan_page_size
+        self.tables = {}
+        self.calls = Counter()
+        self.lock = threading.RLock()
+        self.meta = SimpleNamespace(client=_FakeClient(self))
+
+    def _call(self, operation):
+        self.calls[operation] += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def create_table(self, name, hash_key):
+        self.tables[name] = FakeTable(self, name, hash_key)
+        return self.tables[name]
+
+    def Table(self, name):
+        try:
+            return self.tables[name]
+        except KeyError:
+            raise _client_error('ResourceNotFoundException', f"Requested resource not found: {name}", 'DescribeTable')
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        self._call('BatchGetItem')
+        responses = {}
+        with self.lock:
+            for table_name, request in RequestItems.items():
+                table = self.Table(table_name)
+                names = request.get('ExpressionAttributeNames', {})
+                responses[table_name] = [
+                    _project(table.items[table._key(key)], request.get('ProjectionExpression'), names)
+                    for key in request['Keys'] if table._key(key) in table.items
+                ]
+        return {'Responses': responses, 'UnprocessedKeys': {}}
+
+
+def seeded_inventory(ingredients, quantity=1_000_000, latency_ms=0.0, reservations=True):
+    """A fake database with an Ingredients table holding the given ingredients."""
+    db = FakeDynamoDB(latency_ms=latency_ms)
+    table = db.create_table('Ingredients', 'IngredientName')
+    for name in ingredients:
+        table.items[name] = {'IngredientName': name, 'Quantity': Decimal(quantity)}
+    if reservations:
+        db.create_table('OrderReservations', 'OrderId')
+    return db
@@ -0,0 +1,129 @@
+"""
+Local fake of the sister restaurant inventory API with latency and error injection.
+
+POST /inventory with {"ingredients": [...]} answers {ingredient: bool} like the
+real API. Every request waits latency_ms plus up to jitter_ms, and fails with a
+503 with probability error_rate (seeded, so runs are repeatable).
+
+    python benchmarks/fake_sister_server.py --port 8081 --latency-ms 50 --error-rate 0.1
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_STOCK = {
+    'dough': True, 'tomato sauce': True, 'cheese': True, 'pepperoni': True, 'mushrooms': False, 'olives': True,
+    'pasta': True, 'bun': True, 'beef patty': True, 'lettuce': True,
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        fake = self.server.fake
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+
+        delay_ms, fail = fake._next_behaviour()
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+        if fail:
+            self._send(503, {'error': 'injected failure'})
+            return
+        self._send(200, {ingredient: fake.stock.get(str(ingredient).lower(), False)
+                         for ingredient in payload.get('ingredients', [])})
+
+    def do_GET(self):
+        self._send(200, {'status': 'ok'})
+
+
+class FakeSisterRestaurant:
+    """
+    Args:
+        stock: Ingredient name to availability, DEFAULT_STOCK when omitted
+        latency_ms: Fixed delay of every response
+        jitter_ms: Extra random delay between 0 and jitter_ms
+        error_rate: Share of requests answered with a 503
+        seed: Seed for the jitter and failure draws
+    """
+
+    def __init__(self, stock=None, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=0, host='127.0.0.1', port=0):
+        self.stock = dict(DEFAULT_STOCK if stock is None else stock)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.requests = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/inventory"
+
+    def _next_behaviour(self):
+        with self._lock:
+            self.requests += 1
+            delay_ms = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.failures += 1
+        return delay_ms, fail
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-sister-restaurant', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeSisterRestaurant(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                                seed=args.seed, host=args.host, port=args.port)
+    print(f"Fake sister restaurant listening on {fake.url}")
+    try:
+        fake.serve_forever()
+    except KeyboardInterrupt:
+        fake.stop()
@@ -0,0 +1,364 @@
+"""
+Offline benchmarks for the order graph and both lambda handlers.
+
+Nothing leaves the machine: the chat model is StubChatModel, DynamoDB is the
+in-memory FakeDynamoDB and the sister restaurant is FakeSisterRestaurant on
+localhost. SSM is never called. Reported per lambda:
+
+- per-node latency of the graph (p50/p95/mean in ms, from the node-by-node stream)
+- end-to-end handler latency and throughput, single orders and SQS batches
+- peak traced memory and blocks/bytes still allocated per order (tracemalloc)
+
+Results can be stored as a baseline and later runs compared against it:
+
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py              # exits 1 on regressions
+
+--inventory-backend memory|sqlite runs order-lambda against a local inventory
+engine instead of the fake DynamoDB.
+
+Requires the lambdas' own dependencies (langgraph, langchain, boto3, numpy).
+"""
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from unittest import mock
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARK_DIR)
+ORDER_LAMBDA_DIR = os.path.join(REPO_ROOT, 'sam-lambda', 'order-lambda')
+TEST_LAMBDA_DIR = os.path.join(REPO_ROOT, 'sam-lambda', 'test-lambda')
+TEST_LAMBDA_APP = os.path.join(TEST_LAMBDA_DIR, 'app.py')
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+sys.path.insert(0, BENCHMARK_DIR)
+
+from fake_dynamodb import seeded_inventory  # noqa: E402
+from fake_sister_server import FakeSisterRestaurant  # noqa: E402
+from stub_model import StubChatModel  # noqa: E402
+
+# Messages per scenario: 'catalog' skips the LLM, 'llm' goes through the stub model.
+# The order number keeps LLM messages distinct so the interpretation cache does not answer them.
+SCENARIOS = {
+    'catalog': lambda i: "I'd like a large pepperoni pizza please",
+    'llm': lambda i: f"pepperoni pizza with extra cheese and mushrooms for table {i}",
+}
+
+INVENTORY = [
+    'dough', 'tomato sauce', 'cheese', 'pepperoni', 'mushrooms', 'olives', 'pasta', 'minced beef', 'onion',
+    'bun', 'beef patty', 'lettuce',
+]
+
+# Metric name suffixes where a larger value is better; every other metric is better when lower
+HIGHER_IS_BETTER = ('per_second',)
+
+
+def summarize(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        'count': len(ordered),
+        'p50_ms': round(ordered[len(ordered) // 2], 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+    }
+
+
+def measure_allocations(run, iterations):
+    """Peak traced memory and the blocks/bytes still allocated per call after running run() repeatedly."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(iterations):
+        run(i)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, 'lineno')
+    top = sorted(stats, key=lambda stat: stat.size_diff, reverse=True)[:5]
+    return {
+        'peak_kb': round(peak / 1024, 1),
+        'retained_blocks_per_order': round(sum(stat.count_diff for stat in stats) / iterations, 1),
+        'retained_kb_per_order': round(sum(stat.size_diff for stat in stats) / iterations / 1024, 2),
+        'top_sites': [f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} {stat.size_diff / 1024:+.1f}KiB"
+                      for stat in top],
+    }
+
+
+def timed_stream(graph, state, config=None):
+    """Run the graph once, returning milliseconds per node in the order the nodes finished."""
+    timings = []
+    started = time.perf_counter()
+    for chunk in graph.stream(state, config, stream_mode="updates"):
+        finished = time.perf_counter()
+        for node in chunk:
+            timings.append((node, (finished - started) * 1000))
+        started = finished
+    return timings
+
+
+def api_event(message):
+    return {'body': json.dumps({'message': message}), 'requestContext': {'http': {'method': 'POST'}}}
+
+
+def sqs_event(messages):
+    return {
+        'Records': [
+            {'eventSource': 'aws:sqs', 'messageId': f"msg-{i}", 'body': json.dumps({'message': message})}
+            for i, message in enumerate(messages)
+        ]
+    }
+
+
+def load_order_lambda(db, model, inventory_backend='dynamodb'):
+    os.environ.pop('OPENAI_API_KEY_PARAM_NAME', None)
+    os.environ['INVENTORY_BACKEND'] = inventory_backend
+    os.environ.pop('INTERPRETATION_CACHE_TABLE_NAME', None)
+    os.environ.setdefault('OPENAI_API_KEY', 'offline-benchmark')
+    os.environ['LAZY_INIT'] = 'True'
+    os.environ['METRICS_MODE'] = 'local'
+    os.environ.setdefault('CHECKPOINTER', 'memory')
+
+    sys.path.insert(0, ORDER_LAMBDA_DIR)
+    import app as order_app
+
+    # The nodes look these getters up at call time, so replacing them swaps the backends
+    order_app.get_dynamodb = lambda: db
+    order_app.get_model = lambda: model
+    if inventory_backend != 'dynamodb':
+        order_app.get_inventory_backend().set_quantities({name: 1_000_000 for name in INVENTORY})
+    return order_app
+
+
+def load_test_lambda(db, model, sister_url):
+    os.environ['OPENAI_API_KEY_PARAM_NAME'] = '/benchmark/openai-api-key'
+    os.environ['USE_DYNAMODB'] = 'True'
+    os.environ['INVENTORY_FANOUT'] = 'True'
+    os.environ['SISTER_RESTAURANT_API_URL'] = sister_url
+
+    ssm = mock.Mock()
+    ssm.get_parameter.return_value = {'Parameter': {'Value': 'offline-benchmark'}}
+
+    # test-lambda creates its clients and model at import time
+    spec = importlib.util.spec_from_file_location('test_lambda_app', TEST_LAMBDA_APP)
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch('boto3.client', return_value=ssm), \
+            mock.patch('langchain_openai.ChatOpenAI', return_value=model):
+        spec.loader.exec_module(module)
+    # The inventory backend looks the per-thread resource up at call time
+    module.get_dynamodb = lambda: db
+    return module
+
+
+def bench_order_lambda(args):
+    db = seeded_inventory(INVENTORY, latency_ms=args.dynamodb_latency_ms)
+    model = StubChatModel(latency_ms=args.model_latency_ms)
+    order_app = load_order_lambda(db, model, args.inventory_backend)
+    graph = order_app.get_graph()
+
+    results = {}
+    for scenario, message in SCENARIOS.items():
+        for i in range(args.warmup):
+            order_app.lambda_handler(api_event(message(i)), None)
+
+        nodes = {}
+        errors = 0
+        for i in range(args.iterations):
+            state = order_app.create_initial_state({'message': message(i)})
+            state['order_id'] = f"bench-{scenario}-{i}"
+            try:
+                config = {"configurable": {"thread_id": state['order_id']}}
+                for node, elapsed_ms in timed_stream(graph, state, config):
+                    nodes.setdefault(node, []).append(elapsed_ms)
+            except Exception:
+                errors += 1
+
+        handler_ms = []
+        started = time.perf_counter()
+        for i in range(args.iterations):
+            call_started = time.perf_counter()
+            response = order_app.lambda_handler(api_event(message(i)), None)
+            handler_ms.append((time.perf_counter() - call_started) * 1000)
+            errors += response.get('statusCode') != 200
+        elapsed = time.perf_counter() - started
+
+        batch = [message(i) for i in range(args.batch_size)]
+        batch_started = time.perf_counter()
+        batch_response = order_app.lambda_handler(sqs_event(batch), None)
+        batch_elapsed = time.perf_counter() - batch_started
+
+        results[scenario] = {
+            'nodes': {node: summarize(samples) for node, samples in nodes.items()},
+            'handler': {**summarize(handler_ms), 'orders_per_second': round(args.iterations / elapsed, 1)},
+            'batch': {
+                'size': len(batch),
+                'failed': len(batch_response['batchItemFailures']),
+                'orders_per_second': round(len(batch) / batch_elapsed, 1),
+            },
+            'allocations': measure_allocations(
+                lambda i: order_app.lambda_handler(api_event(message(i)), None), args.allocation_iterations),
+            'errors': errors,
+        }
+
+    results['inventory_backend'] = args.inventory_backend
+    results['dynamodb_calls'] = dict(db.calls)
+    results['model_calls'] = model.calls
+    results['node_metrics'] = order_app.metrics.rollup()
+    return results
+
+
+def bench_test_lambda(args):
+    db = seeded_inventory(INVENTORY, latency_ms=args.dynamodb_latency_ms, reservations=False)
+    model = StubChatModel(latency_ms=args.model_latency_ms)
+
+    with FakeSisterRestaurant(latency_ms=args.sister_latency_ms, jitter_ms=args.sister_jitter_ms,
+                              error_rate=args.sister_error_rate) as sister:
+        test_app = load_test_lambda(db, model, sister.url)
+        message = SCENARIOS['llm']
+
+        def event(i):
+            return {'detail-type': 'NewOrder', 'detail': {'message': message(i)}}
+
+        for i in range(args.warmup):
+            test_app.lambda_handler(event(i), None)
+
+        nodes = {}
+        for i in range(args.iterations):
+            inputs = {'messages': [test_app.HumanMessage(content=message(i))], 'order_intent': '',
+                      'ingredients': [], 'food_type': ''}
+            for node, elapsed_ms in timed_stream(test_app.app, inputs):
+                nodes.setdefault(node, []).append(elapsed_ms)
+
+        handler_ms = []
+        errors = 0
+        started = time.perf_counter()
+        for i in range(args.iterations):
+            call_started = time.perf_counter()
+            response = test_app.lambda_handler(event(i), None)
+            handler_ms.append((time.perf_counter() - call_started) * 1000)
+            errors += response.get('statusCode') != 200
+        elapsed = time.perf_counter() - started
+
+        batch_event = {'detail': {'orders': [{'message': message(i)} for i in range(args.batch_size)]}}
+        batch_started = time.perf_counter()
+        batch_response = test_app.lambda_handler(batch_event, None)
+        batch_elapsed = time.perf_counter() - batch_started
+
+        return {
+            'llm': {
+                'nodes': {node: summarize(samples) for node, samples in nodes.items()},
+                'handler': {**summarize(handler_ms), 'orders_per_second': round(args.iterations / elapsed, 1)},
+                'batch': {
+                    'size': args.batch_size,
+                    'failed': len(batch_response['batchItemFailures']),
+                    'orders_per_second': round(args.batch_size / batch_elapsed, 1),
+                },
+                'allocations': measure_allocations(
+                    lambda i: test_app.lambda_handler(event(i), None), args.allocation_iterations),
+                'errors': errors,
+            },
+            'dynamodb_calls': dict(db.calls),
+            'sister_requests': sister.requests,
+            'sister_failures': sister.failures,
+            'sister_client': test_app.sister_client.stats(),
+        }
+
+
+def flatten(results, prefix=''):
+    metrics = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            metrics.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[name] = value
+    return metrics
+
+
+def compare(current, baseline, tolerance):
+    """
+    Returns:
+        list: (metric, baseline value, current value) for every timing, throughput or
+        allocation metric that got worse by more than tolerance
+    """
+    regressions = []
+    current_metrics = flatten(current)
+    for name, base in flatten(baseline).items():
+        if name not in current_metrics or not base:
+            continue
+        if not name.endswith(('_ms', '_kb', '_per_order', 'per_second')):
+            continue
+        value = current_metrics[name]
+        if name.endswith(HIGHER_IS_BETTER):
+            worse = value < base * (1 - tolerance)
+        else:
+            worse = value > base * (1 + tolerance)
+        if worse:
+            regressions.append((name, base, value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--allocation-iterations', type=int, default=20)
+    parser.add_argument('--dynamodb-latency-ms', type=float, default=0.0)
+    parser.add_argument('--model-latency-ms', type=float, default=0.0)
+    parser.add_argument('--sister-latency-ms', type=float, default=5.0)
+    parser.add_argument('--sister-jitter-ms', type=float, default=0.0)
+    parser.add_argument('--sister-error-rate', type=float, default=0.0)
+    parser.add_argument('--only', choices=['order-lambda', 'test-lambda'])
+    parser.add_argument('--inventory-backend', choices=['dynamodb', 'memory', 'sqlite'], default='dynamodb',
+                        help='Inventory engine order-lambda runs against')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown before a regression')
+    parser.add_argument('--output', help='Also write the results to this file')
+    args = parser.parse_args()
+
+    results = {
+        'environment': {'python': platform.python_version(), 'machine': platform.machine(),
+                        'iterations': args.iterations},
+    }
+    if args.only in (None, 'order-lambda'):
+        results['order_lambda'] = bench_order_lambda(args)
+    if args.only in (None, 'test-lambda'):
+        results['test_lambda'] = bench_test_lambda(args)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for name, base, value in regressions:
+        print(f"REGRESSION {name}: {base} -> {value}")
+    if not regressions:
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
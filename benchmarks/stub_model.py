@@ -0,0 +1,130 @@
+"""
+Deterministic stand-in for ChatOpenAI used by the offline benchmarks.
+
+The answer depends only on the last message of the prompt, so repeated runs do
+the same work. It can be used wherever the lambdas call model.invoke(),
+model.batch() or with_structured_output() and returns AIMessages with usage
+metadata like the real model.
+"""
+import json
+import time
+
+from langchain_core.messages import AIMessage
+
+# Keyword -> dish the stub "recognizes", checked in order
+DISHES = [
+    (('pizza', 'margherita', 'pepperoni'), {
+        'food_type': 'pizza',
+        'inventory_choice': 'current_restaurant',
+        'ingredients': {'dough': '0.25kg', 'tomato sauce': '0.1kg', 'cheese': '0.15kg'},
+    }),
+    (('pasta', 'spaghetti', 'bolognese', 'pomodoro'), {
+        'food_type': 'pasta',
+        'inventory_choice': 'current_restaurant',
+        'ingredients': {'pasta': '0.15kg', 'tomato sauce': '0.12kg', 'cheese': '0.02kg'},
+    }),
+    (('burger',), {
+        'food_type': 'burger',
+        'inventory_choice': 'sister_restaurant',
+        'ingredients': {'bun': '0.08kg', 'beef patty': '0.15kg', 'lettuce': '0.02kg'},
+    }),
+]
+
+# Toppings added to whatever dish was recognized
+TOPPINGS = {
+    'pepperoni': 'pepperoni',
+    'mushroom': 'mushrooms',
+    'olive': 'olives',
+    'onion': 'onion',
+}
+
+
+def _last_message_text(prompt_value):
+    messages = prompt_value.to_messages() if hasattr(prompt_value, 'to_messages') else prompt_value
+    if isinstance(messages, str):
+        return messages
+    content = getattr(messages[-1], 'content', messages[-1]) if messages else ''
+    return content if isinstance(content, str) else json.dumps(content, sort_keys=True)
+
+
+def interpret(text):
+    """The interpretation the stub answers with for one customer message."""
+    lowered = text.lower()
+    for keywords, dish in DISHES:
+        if any(keyword in lowered for keyword in keywords):
+            break
+    else:
+        return {'intent': 'unknown', 'food_type': 'unknown', 'ingredients': {}, 'inventory_choice': 'current_restaurant'}
+
+    ingredients = dict(dish['ingredients'])
+    for keyword, ingredient in TOPPINGS.items():
+        if keyword in lowered:
+            ingredients[ingredient] = '0.08kg'
+    if 'extra cheese' in lowered:
+        ingredients['cheese'] = '0.3kg'
+
+    return {
+        'intent': 'order_food',
+        'food_type': dish['food_type'],
+        'ingredients': ingredients,
+        'inventory_choice': dish['inventory_choice'],
+    }
+
+
+class StubChatModel:
+    """
+    Chat model that answers order prompts from a keyword table.
+
+    Args:
+        latency_ms: Simulated model latency added to every call
+    """
+
+    def __init__(self, latency_ms=0.0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def invoke(self, prompt_value, config=None, **kwargs):
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        text = _last_message_text(prompt_value)
+        content = json.dumps(interpret(text))
+        # Roughly four characters per token, like English text with the OpenAI tokenizers
+        input_tokens = max(1, len(str(prompt_value)) // 4)
+        output_tokens = max(1, len(content) // 4)
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                'input_tokens': input_tokens,
+                'output_tokens': output_tokens,
+                'total_tokens': input_tokens + output_tokens,
+            },
+        )
+
+    def batch(self, inputs, config=None, **kwargs):
+        return [self.invoke(prompt_value) for prompt_value in inputs]
+
+    def with_structured_output(self, schema, include_raw=False, **kwargs):
+        return _StructuredStub(self, include_raw)
+
+
+class _StructuredStub:
+    """What with_structured_output() returns: replies parsed into the strict {name, kg} schema."""
+
+    def __init__(self, model, include_raw):
+        self.model = model
+        self.include_raw = include_raw
+
+    def invoke(self, prompt_value, config=None, **kwargs):
+        raw = self.model.invoke(prompt_value)
+        parsed = json.loads(raw.content)
+        parsed['ingredients'] = [
+            {'name': name, 'kg': float(amount.replace('kg', ''))} for name, amount in parsed['ingredients'].items()
+        ]
+        if not self.include_raw:
+            return parsed
+        return {'raw': raw, 'parsed': parsed, 'parsing_error': None}
+
+    def batch(self, inputs, config=None, **kwargs):
+        return [self.invoke(prompt_value) for prompt_value in inputs]
@@ -0,0 +1,220 @@
+"""
+Bulk-load inventory rows from CSV or JSONL files into a DynamoDB Ingredients table.
+
+Rows are streamed from the input, written with BatchWriteItem in groups of 25
+and spread over worker threads. Unprocessed items and throttled requests are
+retried with exponential backoff. Every write is a full put keyed on the
+table's hash key, so re-running the same input leaves the table unchanged.
+
+Examples:
+    python bulk-load-inventory.py stock.csv --endpoint-url http://localhost:8000 --key IngredientId
+    cat nightly.jsonl | python bulk-load-inventory.py - --format jsonl --table Ingredients --workers 8
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from decimal import Decimal, InvalidOperation
+
+import boto3
+from boto3.dynamodb.types import TypeSerializer
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+# BatchWriteItem accepts at most 25 put/delete requests per call
+BATCH_WRITE_MAX_ITEMS = 25
+MAX_RETRIES = 8
+BASE_DELAY = 0.05
+MAX_DELAY = 5.0
+
+THROTTLING_ERRORS = {'ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded'}
+
+# Column names accepted for the fields of both table schemas
+FIELD_ALIASES = {
+    'name': 'IngredientName',
+    'ingredient': 'IngredientName',
+    'quantity': 'Quantity',
+    'id': 'IngredientId',
+    'unit': 'UnitOfMeasurement',
+    'expiration_date': 'ExpirationDate',
+}
+NUMERIC_FIELDS = {'Quantity'}
+
+
+class LoadStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.rows_read = 0
+        self.rows_skipped = 0
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.requests = 0
+        self.retries = 0
+        self.throttles = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def report(self):
+        elapsed = time.monotonic() - self.started
+        rate = self.rows_written / elapsed if elapsed else 0.0
+        return (
+            f"Read {self.rows_read} rows, wrote {self.rows_written}, skipped {self.rows_skipped}, "
+            f"failed {self.rows_failed} in {elapsed:.2f}s ({rate:.0f} rows/sec). "
+            f"{self.requests} BatchWriteItem calls, {self.retries} retries, {self.throttles} throttled."
+        )
+
+
+def iter_rows(path, input_format=None):
+    """Yield rows one at a time from a CSV or JSONL file ('-' reads stdin)."""
+    if input_format is None:
+        input_format = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+    stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8') if path == '-' else open(path, newline='', encoding='utf-8')
+    with stream:
+        if input_format == 'csv':
+            yield from csv.DictReader(stream)
+        else:
+            for line in stream:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def to_item(row, key_attribute):
+    """
+    Normalize one input row to a DynamoDB item.
+
+    Returns:
+        dict or None: The item, or None if the row has no value for the table key
+    """
+    item = {}
+    for column, value in row.items():
+        if column is None or value in (None, ''):
+            continue
+        column = FIELD_ALIASES.get(column.strip(), column.strip())
+        if column in NUMERIC_FIELDS:
+            try:
+                value = Decimal(str(value))
+            except InvalidOperation:
+                return None
+        elif column == 'IngredientId':
+            value = str(value)
+        item[column] = value
+
+    return item if item.get(key_attribute) else None
+
+
+def iter_batches(rows, key_attribute, stats):
+    """Group rows into BatchWriteItem-sized batches, keeping the last row per key within a batch."""
+    batch = {}
+    for row in rows:
+        stats.add(rows_read=1)
+        item = to_item(row, key_attribute)
+        if item is None:
+            stats.add(rows_skipped=1)
+            continue
+        # Duplicate keys in one BatchWriteItem call are rejected, the last row wins
+        batch[item[key_attribute]] = item
+        if len(batch) == BATCH_WRITE_MAX_ITEMS:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+
+def _backoff(attempt):
+    delay = min(MAX_DELAY, BASE_DELAY * 2 ** attempt)
+    time.sleep(random.uniform(delay / 2, delay))
+
+
+def write_batch(client, table_name, items, stats):
+    """Write one batch, retrying unprocessed items and throttling errors."""
+    serializer = TypeSerializer()
+    requests = [
+        {'PutRequest': {'Item': {key: serializer.serialize(value) for key, value in item.items()}}}
+        for item in items
+    ]
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            stats.add(requests=1)
+            response = client.batch_write_item(RequestItems={table_name: requests})
+        except ClientError as e:
+            if e.response['Error']['Code'] not in THROTTLING_ERRORS:
+                raise
+            stats.add(throttles=1, retries=1)
+            _backoff(attempt)
+            continue
+
+        unprocessed = response.get('UnprocessedItems', {}).get(table_name, [])
+        stats.add(rows_written=len(requests) - len(unprocessed))
+        if not unprocessed:
+            return
+        # Unprocessed items mean the table pushed back on write capacity
+        stats.add(throttles=1, retries=1)
+        requests = unprocessed
+        _backoff(attempt)
+
+    stats.add(rows_failed=len(requests))
+    print(f"Giving up on {len(requests)} items after {MAX_RETRIES} retries", file=sys.stderr)
+
+
+def bulk_load(paths, table_name, key_attribute, workers=4, endpoint_url=None, input_format=None):
+    """
+    Stream every input file into the table.
+
+    At most 2 * workers batches are in flight at once, so memory use does not grow with the input size.
+
+    Returns:
+        LoadStats: Counters for the run
+    """
+    config = Config(max_pool_connections=max(10, workers * 2), retries={'max_attempts': 1})
+    client = boto3.client('dynamodb', endpoint_url=endpoint_url, config=config)
+    stats = LoadStats()
+
+    def batches():
+        for path in paths:
+            yield from iter_batches(iter_rows(path, input_format), key_attribute, stats)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        for batch in batches():
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            in_flight.add(executor.submit(write_batch, client, table_name, batch, stats))
+        for future in in_flight:
+            future.result()
+
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load inventory rows into DynamoDB")
+    parser.add_argument('paths', nargs='+', help="CSV or JSONL files, '-' for stdin")
+    parser.add_argument('--table', default='Ingredients', help="DynamoDB table name")
+    parser.add_argument('--key', default='IngredientName', choices=['IngredientName', 'IngredientId'],
+                        help="Hash key of the table: IngredientName (SAM/Terraform) or IngredientId (dynamo-db/)")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help="Input format, guessed from the extension by default")
+    parser.add_argument('--workers', type=int, default=4, help="Parallel writer threads")
+    parser.add_argument('--endpoint-url', help="e.g. http://localhost:8000 for DynamoDB Local")
+    args = parser.parse_args(argv)
+
+    stats = bulk_load(args.paths, args.table, args.key, workers=args.workers,
+                      endpoint_url=args.endpoint_url, input_format=args.format)
+    print(stats.report())
+    return 1 if stats.rows_failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,14 @@ aws cloudformation create-stack --stack-name IngredientsStack --template-body fi
 ## run local docker:
 docker run -d -p 8000:8000 amazon/dynamodb-local
 
+# reservations table used by the order lambda (run it with DYNAMODB_ENDPOINT_URL=http://localhost:8000)
+aws dynamodb create-table `
+    --table-name OrderReservations `
+    --attribute-definitions AttributeName=OrderId,AttributeType=S `
+    --key-schema AttributeName=OrderId,KeyType=HASH `
+    --billing-mode PAY_PER_REQUEST `
+    --endpoint-url http://localhost:8000
+
 # list
 aws dynamodb list-tables --endpoint-url http://localhost:8000
 
@@ -12,6 +20,9 @@ aws dynamodb scan --table-name Ingredients --endpoint-url http://localhost:8000
 # describe
 aws dynamodb describe-table --table-name Ingredients --query "Table.KeySchema" --endpoint-url http://localhost:8000
 
+## bulk load CSV/JSONL inventory files:
+python bulk-load-inventory.py stock.csv --key IngredientId --workers 8 --endpoint-url http://localhost:8000
+
 ## read all items:
 aws dynamodb scan --table-name Ingredients --endpoint-url http://localhost:8000
 
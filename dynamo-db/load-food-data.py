@@ -64,8 +64,9 @@ common_food_items = [
 # Reference the DynamoDB table
 table = dynamodb.Table(table_name)
 
-# Load each item into the table
-for item in common_food_items:
-    table.put_item(Item=item)
+# Load the items with batched writes (see bulk-load-inventory.py for CSV/JSONL input)
+with table.batch_writer(overwrite_by_pkeys=['IngredientId']) as batch:
+    for item in common_food_items:
+        batch.put_item(Item=item)
 
 print("Successfully loaded 20 common food items into the DynamoDB table.")
\ No newline at end of file
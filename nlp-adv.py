@@ -1,6 +1,9 @@
 import os
+import sys
 import json
-import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from dotenv import load_dotenv
 from typing import TypedDict, Annotated, Sequence, List, Dict
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
@@ -8,8 +11,16 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, END
 import boto3
-from boto3.dynamodb.conditions import Attr
+from botocore.config import Config
 from botocore.exceptions import ClientError
+
+# Modules shared with the Lambda functions (sam-lambda/shared, their layer)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sam-lambda', 'shared', 'python'))
+
+from inventory_backends import create_inventory_backend
+from sister_client import SisterRestaurantClient
+from conversation_context import ConversationWindow
+from structured_interpretation import INTERPRETATION_SCHEMA, STRUCTURED_SYSTEM_PROMPT, to_interpretation
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -19,6 +30,35 @@ load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 USE_DYNAMODB = os.getenv("USE_DYNAMODB", "True").lower() == "true"
 SISTER_RESTAURANT_API_URL = os.getenv("SISTER_RESTAURANT_API_URL", "http://sister-restaurant-api.example.com/inventory")
+# Query the local inventory and the sister restaurant concurrently instead of only the LLM's inventory_choice.
+# The interpretation schema only offers one source per order, so fan-out is switched on here
+INVENTORY_FANOUT = os.getenv("INVENTORY_FANOUT", "False").lower() == "true"
+# Per-source deadlines in seconds
+SISTER_RESTAURANT_DEADLINE = float(os.getenv("SISTER_RESTAURANT_DEADLINE", "2.0"))
+# Send a second sister restaurant request when the first is slower than this many seconds (0 disables hedging)
+SISTER_RESTAURANT_HEDGE_AFTER = float(os.getenv("SISTER_RESTAURANT_HEDGE_AFTER", "0"))
+# Consecutive failures that open the circuit, and seconds before it lets a trial request through
+SISTER_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("SISTER_CIRCUIT_FAILURE_THRESHOLD", "5"))
+SISTER_CIRCUIT_RESET_SECONDS = float(os.getenv("SISTER_CIRCUIT_RESET_SECONDS", "30"))
+# How long sister restaurant answers are cached per ingredient (unavailable ones for less)
+SISTER_CACHE_TTL = float(os.getenv("SISTER_CACHE_TTL", "30"))
+SISTER_NEGATIVE_CACHE_TTL = float(os.getenv("SISTER_NEGATIVE_CACHE_TTL", "5"))
+LOCAL_INVENTORY_DEADLINE = float(os.getenv("LOCAL_INVENTORY_DEADLINE", "2.0"))
+# "structured" asks for the model's native structured output against a strict schema, "json" parses free-form JSON
+INTERPRETATION_MODE = os.getenv("INTERPRETATION_MODE", "structured").lower()
+# "function_calling" works with every tool-calling model, "json_schema" needs a model with Structured Outputs
+STRUCTURED_OUTPUT_METHOD = os.getenv("STRUCTURED_OUTPUT_METHOD", "function_calling")
+# Token budget of the interpretation prompt: system prompt, summary of older turns and the last turns verbatim
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "1500"))
+CONTEXT_KEEP_TURNS = int(os.getenv("CONTEXT_KEEP_TURNS", "4"))
+CONTEXT_SUMMARY_MAX_TOKENS = int(os.getenv("CONTEXT_SUMMARY_MAX_TOKENS", "300"))
+# Local DynamoDB (DynamoDB Local) the script reads the Ingredients table from
+DYNAMODB_ENDPOINT_URL = os.getenv("DYNAMODB_ENDPOINT_URL", "http://localhost:8000")
+DYNAMODB_TABLE_NAME = os.getenv("DYNAMODB_TABLE_NAME", "Ingredients")
+# Inventory engine: 'dynamodb', or 'memory' / 'sqlite' to keep stock in the process (seeded from INVENTORY_SEED_PATH)
+INVENTORY_BACKEND = os.getenv("INVENTORY_BACKEND", "dynamodb").lower()
+INVENTORY_SQLITE_PATH = os.getenv("INVENTORY_SQLITE_PATH", ":memory:")
+INVENTORY_SEED_PATH = os.getenv("INVENTORY_SEED_PATH")
 
 
 class AgentState(TypedDict):
@@ -26,73 +66,133 @@ class AgentState(TypedDict):
     order_intent: Annotated[str, "The interpreted order intent"]
     ingredients: Annotated[List[str], "List of ingredients"]
     food_type: Annotated[str, "Type of food ordered"]
+    context_messages: Annotated[Sequence[BaseMessage], "What the model is sent: summary of older turns plus the last turns"]
+    context_summary: Annotated[dict, "Running summary of the turns outside the window"]
 
 
-prompt = ChatPromptTemplate.from_messages([
-    ("system", """You are an AI assistant for a restaurant. Interpret the user's food order, identifying the intent, ingredients, and type of food. 
+SYSTEM_PROMPT = """You are an AI assistant for a restaurant. Interpret the user's food order, identifying the intent, ingredients, and type of food. 
     After identifying food provide generic amounts of ingredients required in kilograms. 
     Respond in the following JSON format:
-    {{"intent": "order_food", "ingredients": ["ingredient1": "weight1", "ingredient2": "weight2"], "food_type": "type_of_food"}}
+    {{"intent": "order_food", "ingredients": {{"ingredient1": "weight1", "ingredient2": "weight2"}}, "food_type": "type_of_food"}}
     After analyzing the order, decide which inventory to check:
     - If the order is for pizza or pasta, use the "current_restaurant" inventory.
     - For all other food types, use the "sister_restaurant" inventory.
     Include your decision in the JSON response as "inventory_choice": "current_restaurant" or "inventory_choice": "sister_restaurant".
-    """),
+    """
+
+prompt = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_PROMPT),
     MessagesPlaceholder(variable_name="messages"),
 ])
 
 model = ChatOpenAI(api_key=openai_api_key)
 
+# Same strict schema and prompt as the Lambda functions
+structured_prompt = ChatPromptTemplate.from_messages([
+    ("system", STRUCTURED_SYSTEM_PROMPT),
+    MessagesPlaceholder(variable_name="messages"),
+])
+structured_model = model.with_structured_output(
+    INTERPRETATION_SCHEMA, method=STRUCTURED_OUTPUT_METHOD, strict=True, include_raw=True)
+
+
+def interpret_order(messages):
+    """
+    Ask the model to interpret the conversation.
+
+    Returns:
+        tuple: (dict with intent, food_type, ingredients as name -> '<kg>kg' and inventory_choice,
+        the model's raw reply)
+
+    Raises:
+        ValueError: When the reply does not match the schema or is not valid JSON
+    """
+    if INTERPRETATION_MODE == "structured":
+        result = structured_model.invoke(structured_prompt.invoke({"messages": messages}))
+        if result['parsed'] is None:
+            raise ValueError(f"Structured output did not match the schema: {result['parsing_error']}")
+        return to_interpretation(result['parsed']), result['raw']
+
+    response = model.invoke(prompt.invoke({"messages": messages}))
+    return json.loads(response.content), response
+
+
+# Bound DynamoDB calls by the local inventory deadline instead of botocore's 60s default
+dynamodb_config = Config(
+    connect_timeout=LOCAL_INVENTORY_DEADLINE,
+    read_timeout=LOCAL_INVENTORY_DEADLINE,
+    retries={'max_attempts': 2, 'mode': 'standard'},
+)
+
+# Pooled, deadline-bound sister restaurant client with a circuit breaker and result cache, reused across calls
+sister_client = SisterRestaurantClient(
+    SISTER_RESTAURANT_API_URL,
+    deadline=SISTER_RESTAURANT_DEADLINE,
+    hedge_after=SISTER_RESTAURANT_HEDGE_AFTER or None,
+    positive_ttl=SISTER_CACHE_TTL,
+    negative_ttl=SISTER_NEGATIVE_CACHE_TTL,
+    failure_threshold=SISTER_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=SISTER_CIRCUIT_RESET_SECONDS,
+)
+
+# Small shared pool for concurrent inventory lookups
+inventory_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='inventory')
+
+# boto3 resources are not thread-safe: each thread of the inventory pool creates its own
+_thread_resources = threading.local()
+
+
+def get_dynamodb():
+    """The calling thread's DynamoDB resource, created on its first use."""
+    resource = getattr(_thread_resources, 'dynamodb', None)
+    if resource is None:
+        resource = _thread_resources.dynamodb = boto3.resource(
+            'dynamodb', endpoint_url=DYNAMODB_ENDPOINT_URL, config=dynamodb_config)
+    return resource
+
+
 if USE_DYNAMODB:
-    dynamodb = boto3.resource('dynamodb', endpoint_url='http://localhost:8000')
-    table = dynamodb.Table('Ingredients')
+    inventory_backend = create_inventory_backend(
+        INVENTORY_BACKEND,
+        dynamodb=get_dynamodb,
+        table_name=DYNAMODB_TABLE_NAME,
+        sqlite_path=INVENTORY_SQLITE_PATH,
+        seed_path=INVENTORY_SEED_PATH,
+    )
+
+
+def batch_get_ingredient_quantities(ingredient_names):
+    """
+    Fetch stock quantities for several ingredients in one backend call.
+
+    Returns:
+        dict: Ingredient name to quantity for every ingredient found in the inventory
+    """
+    return inventory_backend.batch_get(ingredient_names)
 
 
 def check_ingredient_quantity_by_name(ingredient_name):
-    try:
-        # Create the filter expression
-        filter_expression = boto3.dynamodb.conditions.Attr('IngredientName').eq(ingredient_name)
-        logger.info(f"Filter expression: {filter_expression}")
-
-        # Perform the scan operation
-        logger.info(f"Scanning table for ingredient: {ingredient_name}")
-        response = table.scan(FilterExpression=filter_expression)
-
-        # Log the response
-        logger.info(f"Scan response: {response}")
-
-        # Check if any items were found
-        if response['Count'] == 0:
-            logger.warning(f"Ingredient '{ingredient_name}' not found.")
-            return None
-
-        # Get the first matching item (assuming ingredient names are unique)
-        item = response['Items'][0]
-        logger.info(f"Found item: {item}")
-
-        # Get the quantity
-        quantity = int(item.get('Quantity', 0))
-        logger.info(f"Quantity: {quantity}")
-
-        # Check if the quantity is greater than 0
-        if quantity > 0:
-            logger.info(f"Ingredient '{ingredient_name}' found. Quantity: {quantity}")
-            return quantity
-        else:
-            logger.warning(f"Ingredient '{ingredient_name}' found, but quantity is 0.")
-            return None
+    return check_inventory_dynamodb([ingredient_name])[0]['quantity']
 
+
+def check_inventory_dynamodb(ingredients: List[str]) -> list[dict[str, str | None | int]]:
+    try:
+        quantities = batch_get_ingredient_quantities(ingredients)
     except ClientError as e:
         logger.error(f"An error occurred: {e.response['Error']['Message']}")
-        return None
+        quantities = {}
     except Exception as e:
         logger.error(f"An unexpected error occurred: {str(e)}")
-        return None
+        quantities = {}
 
-def check_inventory_dynamodb(ingredients: List[str]) -> list[dict[str, str | None | int]]:
     recipe_ingredients = []
     for ingredient in ingredients:
-        quantity = check_ingredient_quantity_by_name(ingredient)
+        quantity = quantities.get(ingredient)
+        if quantity is None:
+            logger.warning(f"Ingredient '{ingredient}' not found.")
+        elif quantity <= 0:
+            logger.warning(f"Ingredient '{ingredient}' found, but quantity is 0.")
+            quantity = None
         inventory_status = {'ingredient': ingredient, 'quantity': quantity}
         recipe_ingredients.append(inventory_status)
     return recipe_ingredients
@@ -107,21 +207,69 @@ def check_inventory_static(ingredients: List[str]) -> Dict[str, bool]:
 
 
 def check_inventory_sister_restaurant(ingredients: List[str]) -> Dict[str, bool]:
-    try:
-        response = requests.post(SISTER_RESTAURANT_API_URL, json={"ingredients": ingredients})
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"Error querying sister restaurant API: {response.status_code}")
-            return {ingredient: False for ingredient in ingredients}
-    except requests.RequestException as e:
-        print(f"Error querying sister restaurant API: {e}")
-        return {ingredient: False for ingredient in ingredients}
+    return sister_client.check(ingredients)
+
+def _local_quantities(local_result) -> Dict[str, object]:
+    # check_inventory_dynamodb returns a list of {'ingredient', 'quantity'} dicts, the static inventory a dict of bools
+    if isinstance(local_result, dict):
+        return {ingredient: (True if available else None) for ingredient, available in local_result.items()}
+    return {item['ingredient']: item['quantity'] for item in local_result}
+
+
+def check_inventory_fanout(ingredients: List[str]) -> list[dict]:
+    """
+    Query the local inventory and the sister restaurant concurrently and merge the answers.
+
+    Each source has its own deadline measured from the start of the check, so the total
+    latency is that of the slowest source, capped by its deadline. A source that misses
+    its deadline or fails counts as having nothing in stock.
+
+    Returns:
+        list: Dicts with 'ingredient', 'quantity' (local stock), 'sister_available' and 'available'
+    """
+    local_source = check_inventory_dynamodb if USE_DYNAMODB else check_inventory_static
+    started = time.monotonic()
+    pending = {
+        'current_restaurant': (inventory_executor.submit(local_source, ingredients), LOCAL_INVENTORY_DEADLINE),
+        'sister_restaurant': (inventory_executor.submit(check_inventory_sister_restaurant, ingredients),
+                              SISTER_RESTAURANT_DEADLINE),
+    }
+
+    results = {}
+    for source, (future, deadline) in pending.items():
+        try:
+            results[source] = future.result(timeout=max(0.0, deadline - (time.monotonic() - started)))
+        except FuturesTimeoutError:
+            logger.warning(f"Inventory source '{source}' missed its {deadline}s deadline")
+            future.cancel()
+            results[source] = {}
+        except Exception as e:
+            logger.error(f"Inventory source '{source}' failed: {e}")
+            results[source] = {}
+
+    local = _local_quantities(results['current_restaurant'])
+    sister = results['sister_restaurant'] if isinstance(results['sister_restaurant'], dict) else {}
+
+    merged = []
+    for ingredient in ingredients:
+        quantity = local.get(ingredient)
+        sister_available = bool(sister.get(ingredient, False))
+        merged.append({
+            'ingredient': ingredient,
+            'quantity': quantity,
+            'sister_available': sister_available,
+            'available': quantity is not None or sister_available,
+        })
+    logger.info(f"Inventory fan-out finished in {time.monotonic() - started:.3f}s")
+    return merged
+
 
 
 def check_inventory(ingredients: List[str], inventory_choice: str) -> Dict[str, bool]:
+    if INVENTORY_FANOUT:
+        return check_inventory_fanout(ingredients)
     # LLM decides if it's current restaurant or if it's something else
-    if inventory_choice == "current_restaurant":
+    elif inventory_choice == "current_restaurant":
         return check_inventory_dynamodb(ingredients) if USE_DYNAMODB else check_inventory_static(ingredients)
     elif inventory_choice == "sister_restaurant":
         return check_inventory_sister_restaurant(ingredients)
@@ -130,13 +278,33 @@ def check_inventory(ingredients: List[str], inventory_choice: str) -> Dict[str,
         return {ingredient: False for ingredient in ingredients}
 
 
+context_window = ConversationWindow(
+    max_tokens=CONTEXT_MAX_TOKENS,
+    keep_turns=CONTEXT_KEEP_TURNS,
+    summary_max_tokens=CONTEXT_SUMMARY_MAX_TOKENS,
+)
+
+
+def manage_context(state: AgentState):
+    """Fit the conversation into the token budget, folding turns that leave the window into the summary."""
+    system_prompt = STRUCTURED_SYSTEM_PROMPT if INTERPRETATION_MODE == "structured" else SYSTEM_PROMPT
+    context, summary, report = context_window.fit(state["messages"], state.get("context_summary"), system_prompt)
+    if report['turns_summarized']:
+        logger.info(f"Context kept {report['turns_kept']} turns verbatim and summarized {report['turns_summarized']}, "
+                    f"saving {report['tokens_saved']} of {report['tokens_full']} tokens")
+    return {"context_messages": context, "context_summary": summary}
+
+
 def agent(state: AgentState):
     messages = state["messages"]
-    response = model.invoke(prompt.invoke({"messages": messages}))
 
     try:
-        parsed_response = json.loads(response.content)
-    except json.JSONDecodeError:
+        # The model only sees the windowed conversation, the state keeps all of it
+        parsed_response, response = interpret_order(state.get("context_messages") or messages)
+        usage = getattr(response, 'usage_metadata', None) or {}
+        logger.info(f"LLM used {usage.get('input_tokens', 0)} prompt and {usage.get('output_tokens', 0)} completion tokens")
+    except ValueError as e:  # includes json.JSONDecodeError
+        logger.error(f"Could not interpret order: {e}")
         parsed_response = {
             "intent": "unknown",
             "ingredients": [],
@@ -156,6 +324,8 @@ def agent(state: AgentState):
         ingredient = item["ingredient"]
         amount_remaining = item['quantity']
         result_message += f"- {ingredient}: amount remaining: {amount_remaining}\n"
+        if 'sister_available' in item:
+            result_message += f"  sister restaurant: {'Available' if item['sister_available'] else 'Not available'}\n"
 
     return {
         "messages": messages + [AIMessage(content=result_message)],
@@ -166,8 +336,10 @@ def agent(state: AgentState):
 
 
 workflow = StateGraph(AgentState)
+workflow.add_node("manage_context", manage_context)
 workflow.add_node("agent", agent)
-workflow.set_entry_point("agent")
+workflow.set_entry_point("manage_context")
+workflow.add_edge("manage_context", "agent")
 workflow.add_edge("agent", END)
 
 app = workflow.compile()
@@ -1,17 +1,51 @@
-from typing import TypedDict, Literal, Optional, List, Dict
-from datetime import datetime
-from IPython.display import Image
-from botocore.exceptions import ClientError
-from langgraph.graph import StateGraph, START, END
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from uuid import uuid4
-import os
+from coldstart import cold_start, lazy_component
+
+with cold_start.measure('import:stdlib'):
+    from typing import TypedDict, Literal, Optional, List, Dict
+    from datetime import datetime
+    from uuid import uuid4
+    import copy
+    import functools
+    import hashlib
+    import os
+    import sys
+    import json
+    import logging
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+with cold_start.measure('import:boto3'):
+    import boto3
+    from botocore.exceptions import ClientError
+
+with cold_start.measure('import:langgraph'):
+    from langgraph.graph import StateGraph, START, END
+
+# Modules shared with the other functions are deployed as a layer (/opt/python); locally they are read from the repo
+SHARED_MODULES_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shared', 'python'))
+if os.path.isdir(SHARED_MODULES_DIR) and SHARED_MODULES_DIR not in sys.path:
+    sys.path.append(SHARED_MODULES_DIR)
+
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-import json
-import logging
-from boto3.dynamodb.conditions import Attr
-import boto3
+from checkpoints import create_checkpointer
+from conversation_context import ConversationWindow, drop_folded_turns
+from delivery import DeliveryPlanner
+from inventory_backends import create_inventory_backend
+from inventory_cache import InventorySnapshotCache, is_inventory_stream_event
+from ingredient_index import IngredientIndex, load_synonyms
+from kitchen import KitchenScheduler
+from interpretation_cache import InterpretationCache, interpretation_cache_key
+from recipe_catalog import RecipeCatalog
+from streaming import iter_order_events, format_sse, wants_event_stream
+from metrics import MetricsRecorder, token_usage
+from singleflight import SingleFlight, MicroBatcher
+from structured_interpretation import INTERPRETATION_SCHEMA, STRUCTURED_SYSTEM_PROMPT, to_interpretation
+from order_response import OrderResponse, dumps
+
+with cold_start.measure('import:numpy'):
+    from feasibility import FeasibilityEngine
+    from pricing import PriceTable
+    from availability import AvailabilityView
 
 # Set up logging
 logger = logging.getLogger()
@@ -21,36 +55,169 @@ logger.setLevel(logging.INFO)
 load_dotenv()
 
 # Environment variables
-OPENAI_API_KEY_PARAM_NAME = os.environ['OPENAI_API_KEY_PARAM_NAME']
+# SSM parameter holding the OpenAI key; OPENAI_API_KEY is used directly when it is not set (local runs)
+OPENAI_API_KEY_PARAM_NAME = os.environ.get('OPENAI_API_KEY_PARAM_NAME')
 DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'Ingredients')
+RESERVATIONS_TABLE_NAME = os.environ.get('RESERVATIONS_TABLE_NAME', 'OrderReservations')
+# Set to http://localhost:8000 to run against DynamoDB Local
+DYNAMODB_ENDPOINT_URL = os.environ.get('DYNAMODB_ENDPOINT_URL')
+OPENAI_MODEL_NAME = os.environ.get('OPENAI_MODEL_NAME', 'gpt-3.5-turbo')
+# 'structured' asks for the model's native structured output against a strict schema, 'json' parses free-form JSON
+INTERPRETATION_MODE = os.environ.get('INTERPRETATION_MODE', 'structured').lower()
+# 'function_calling' works with every tool-calling model, 'json_schema' needs a model with Structured Outputs
+STRUCTURED_OUTPUT_METHOD = os.environ.get('STRUCTURED_OUTPUT_METHOD', 'function_calling')
+INGREDIENT_SYNONYMS_PATH = os.environ.get(
+    'INGREDIENT_SYNONYMS_PATH', os.path.join(os.path.dirname(__file__), 'ingredient_synonyms.json'))
+RECIPE_CATALOG_PATH = os.environ.get(
+    'RECIPE_CATALOG_PATH', os.path.join(os.path.dirname(__file__), 'recipes.json'))
+# Kitchen stations, their capacities and the steps of each dish, for load-aware ETAs
+KITCHEN_CONFIG_PATH = os.environ.get(
+    'KITCHEN_CONFIG_PATH', os.path.join(os.path.dirname(__file__), 'kitchen.json'))
+# Ingredient costs per kg, dish base prices and price modifiers
+PRICING_PATH = os.environ.get('PRICING_PATH', os.path.join(os.path.dirname(__file__), 'pricing.json'))
+# Delivery zones (postcodes, keywords, coordinates), drivers and batching rules; planned offline
+DELIVERY_ZONES_PATH = os.environ.get(
+    'DELIVERY_ZONES_PATH', os.path.join(os.path.dirname(__file__), 'delivery_zones.json'))
+
+# Inventory engine: 'dynamodb', or 'memory' / 'sqlite' to keep stock in the process (seeded from INVENTORY_SEED_PATH)
+INVENTORY_BACKEND = os.environ.get('INVENTORY_BACKEND', 'dynamodb').lower()
+INVENTORY_SQLITE_PATH = os.environ.get('INVENTORY_SQLITE_PATH', ':memory:')
+INVENTORY_SEED_PATH = os.environ.get('INVENTORY_SEED_PATH')
+
+# Conversation checkpoints: 'dynamodb' (CHECKPOINT_TABLE_NAME), or 'off'. 'memory' is for local runs and tests
+# only: it keeps checkpoints in one container, so a follow-up served by another container starts a new order
+CHECKPOINTER = os.environ.get('CHECKPOINTER', 'dynamodb').lower()
+CHECKPOINT_TABLE_NAME = os.environ.get('CHECKPOINT_TABLE_NAME', 'OrderCheckpoints')
+CHECKPOINT_TTL_SECONDS = int(os.environ.get('CHECKPOINT_TTL_SECONDS', str(7 * 24 * 3600)))
+# 'exit' writes one checkpoint per turn, 'async'/'sync' one per graph step
+CHECKPOINT_DURABILITY = os.environ.get('CHECKPOINT_DURABILITY', 'exit')
+
+# Warm-container inventory snapshot (set the TTL to 0 to disable)
+INVENTORY_CACHE_TTL_SECONDS = float(os.environ.get('INVENTORY_CACHE_TTL_SECONDS', '30'))
+INVENTORY_CACHE_MAX_ENTRIES = int(os.environ.get('INVENTORY_CACHE_MAX_ENTRIES', '512'))
+
+# Memoized LLM interpretations: in-process LRU plus an optional shared DynamoDB table
+INTERPRETATION_CACHE_TTL_SECONDS = float(os.environ.get('INTERPRETATION_CACHE_TTL_SECONDS', '3600'))
+INTERPRETATION_CACHE_MAX_ENTRIES = int(os.environ.get('INTERPRETATION_CACHE_MAX_ENTRIES', '1024'))
+INTERPRETATION_CACHE_TABLE_NAME = os.environ.get('INTERPRETATION_CACHE_TABLE_NAME')
+INTERPRETATION_CACHE_SHARED_TTL_SECONDS = int(os.environ.get('INTERPRETATION_CACHE_SHARED_TTL_SECONDS', '86400'))
+
+# In-memory menu availability view, reloaded from the table once older than this
+AVAILABILITY_VIEW_MAX_AGE_SECONDS = float(os.environ.get('AVAILABILITY_VIEW_MAX_AGE_SECONDS', '60'))
+
+# Bump whenever the system prompt changes so cached interpretations are not reused across prompts
+PROMPT_VERSION = f"v2-{INTERPRETATION_MODE}"
+
+# Token budget of the interpretation prompt: system prompt, summary of older turns and the last turns verbatim
+CONTEXT_MAX_TOKENS = int(os.environ.get('CONTEXT_MAX_TOKENS', '1500'))
+CONTEXT_KEEP_TURNS = int(os.environ.get('CONTEXT_KEEP_TURNS', '4'))
+CONTEXT_SUMMARY_MAX_TOKENS = int(os.environ.get('CONTEXT_SUMMARY_MAX_TOKENS', '300'))
+# Count tokens with tiktoken (downloads its encoding on first use) instead of estimating them
+CONTEXT_EXACT_TOKENS = os.environ.get('CONTEXT_EXACT_TOKENS', 'False').lower() == 'true'
+
+# Concurrent identical interpretation requests share one LLM call
+LLM_SINGLE_FLIGHT = os.environ.get('LLM_SINGLE_FLIGHT', 'True').lower() == 'true'
+# Distinct prompts arriving within this window go to the model as one batch (0 disables batching)
+LLM_BATCH_WINDOW_MS = float(os.environ.get('LLM_BATCH_WINDOW_MS', '0'))
+LLM_BATCH_MAX_SIZE = int(os.environ.get('LLM_BATCH_MAX_SIZE', '8'))
+# Upper bound on concurrent LLM requests from one container when batching
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', '4'))
+INTERPRETATION_FIELDS = ('intent', 'food_type', 'ingredients', 'inventory_choice')
+
+# Orders of one batch processed at the same time
+ORDER_BATCH_CONCURRENCY = int(os.environ.get('ORDER_BATCH_CONCURRENCY', '4'))
+
+# Create clients, the secret and the compiled graph on first use (set to false to create everything at import)
+LAZY_INIT = os.environ.get('LAZY_INIT', 'True').lower() == 'true'
+# Cold-start budget in milliseconds; the first invocation logs a warning when it is exceeded
+COLD_START_BUDGET_MS = float(os.environ['COLD_START_BUDGET_MS']) if os.environ.get('COLD_START_BUDGET_MS') else None
+
+# Per-node metrics: 'emf' writes CloudWatch embedded-metric lines, 'local' keeps p50/p99 rollups in memory, 'off'
+METRICS_MODE = os.environ.get('METRICS_MODE', 'emf').lower()
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'RestaurantOrders')
+
+metrics = MetricsRecorder(mode=METRICS_MODE, namespace=METRICS_NAMESPACE)
+
+
+# Initialize AWS clients on first use
+@lazy_component('ssm_client')
+def get_ssm_client():
+    return boto3.client('ssm')
+
+
+# boto3 resources are not thread-safe, so every thread (batch workers included) gets its own
+@lazy_component('dynamodb_resource', per_thread=True)
+def get_dynamodb():
+    dynamodb = boto3.session.Session().resource('dynamodb', endpoint_url=DYNAMODB_ENDPOINT_URL)
+    metrics.instrument_dynamodb(dynamodb.meta.client)
+    return dynamodb
+
+
+@lazy_component('checkpointer')
+def get_checkpointer():
+    return create_checkpointer(
+        CHECKPOINTER,
+        dynamodb=lambda: get_dynamodb(),
+        table_name=CHECKPOINT_TABLE_NAME,
+        ttl_seconds=CHECKPOINT_TTL_SECONDS,
+    )
+
+
+@lazy_component('inventory_backend')
+def get_inventory_backend():
+    # The DynamoDB engine looks the per-thread resource up on every call
+    return create_inventory_backend(
+        INVENTORY_BACKEND,
+        dynamodb=lambda: get_dynamodb(),
+        table_name=DYNAMODB_TABLE_NAME,
+        reservations_table_name=RESERVATIONS_TABLE_NAME,
+        sqlite_path=INVENTORY_SQLITE_PATH,
+        seed_path=INVENTORY_SEED_PATH,
+    )
 
 
 # Retrieve OpenAI API key from SSM Parameter Store
 def get_ssm_parameter(param_name):
     try:
-        response = ssm.get_parameter(Name=param_name, WithDecryption=True)
+        response = get_ssm_client().get_parameter(Name=param_name, WithDecryption=True)
         return response['Parameter']['Value']
     except Exception as e:
         logger.error(f"Error retrieving SSM parameter: {str(e)}")
         raise
 
-openai_api_key = get_ssm_parameter(OPENAI_API_KEY_PARAM_NAME)
 
-# Initialize AWS clients
-ssm = boto3.client('ssm')
-dynamodb = boto3.resource('dynamodb')
+@lazy_component('openai_api_key')
+def get_openai_api_key():
+    if OPENAI_API_KEY_PARAM_NAME:
+        return get_ssm_parameter(OPENAI_API_KEY_PARAM_NAME)
+    return os.environ['OPENAI_API_KEY']
 
-table = dynamodb.Table(DYNAMODB_TABLE_NAME)
+
+inventory_cache = InventorySnapshotCache(
+    ttl_seconds=INVENTORY_CACHE_TTL_SECONDS,
+    max_entries=INVENTORY_CACHE_MAX_ENTRIES,
+)
+
+interpretation_cache = InterpretationCache(
+    ttl_seconds=INTERPRETATION_CACHE_TTL_SECONDS,
+    max_entries=INTERPRETATION_CACHE_MAX_ENTRIES,
+    shared_table_getter=(
+        (lambda: get_dynamodb().Table(INTERPRETATION_CACHE_TABLE_NAME)) if INTERPRETATION_CACHE_TABLE_NAME else None
+    ),
+    shared_ttl_seconds=INTERPRETATION_CACHE_SHARED_TTL_SECONDS,
+)
 
 
 # Define the state type
 class PizzaOrderState(TypedDict):
     # Order details
     order_id: str
-    order_status: Literal['initiated', 'ingredients_checked', 'submitted', 'type_decided', 'completed']
+    order_status: Literal['initiated', 'ingredients_checked', 'reserved', 'submitted', 'type_decided', 'completed', 'cancelled']
     order_type: Optional[Literal['pickup', 'delivery']]
+    order_type_revision: int  # bumped whenever a later turn switches between pickup and delivery
 
     # Order interpretation
+    menu_item: Optional[str]  # recipe catalog entry when the order skipped the LLM
     intent: str
     food_type: str
     required_ingredients: Dict[str, float]  # ingredient name to weight in kg
@@ -59,6 +226,7 @@ class PizzaOrderState(TypedDict):
     # Inventory and availability
     ingredients_available: bool
     missing_ingredients: list[str]
+    reserved_ingredients: Dict[str, float]  # ingredient name to reserved weight in kg
 
     # Timing
     order_time: datetime
@@ -69,20 +237,28 @@ class PizzaOrderState(TypedDict):
     customer_name: str
     delivery_address: Optional[str]
     phone_number: str
-    customer_message: str  # Store the original customer message
+    customer_message: str  # The customer's words; other request fields have their own keys
 
-    # Order details
-    items: list[dict]
     total_price: float
 
     # Processing metadata
-    errors: list[str]
-    notes: list[str]
-    messages: List[dict]  # Store conversation history
+    errors: list[str]  # this turn's only, a follow-up starts with none
+    notes: list[str]  # this turn's only, a follow-up starts with none
+    messages: List[dict]  # Turns not yet folded into context_summary
+    context_messages: List[dict]  # What the model is sent this turn: summary of older turns plus the last turns
+    context_summary: Optional[dict]  # Running summary of the turns outside the window
+    node_runs: Dict[str, dict]  # node name to the fingerprint of its inputs and the status it left
 
 # State processing functions
-def interpret_order(state: PizzaOrderState) -> PizzaOrderState:
-    """Process the customer's order using the chat prompt."""
+def customer_text(body) -> str:
+    """The customer's words, whether the handler passed a plain string or the whole request body."""
+    if isinstance(body, dict):
+        return body.get('message') or json.dumps(body, sort_keys=True)
+    return str(body)
+
+
+def match_catalog(state: PizzaOrderState) -> PizzaOrderState:
+    """Resolve known menu items straight from the recipe catalog so they skip the LLM."""
     # Generate order ID if not present
     if not state['order_id']:
         state['order_id'] = str(uuid4())
@@ -91,19 +267,168 @@ def interpret_order(state: PizzaOrderState) -> PizzaOrderState:
     if 'messages' not in state:
         state['messages'] = []
 
+    # A resumed turn without new words (only customer fields changed) keeps its interpretation
+    if not state['customer_message']:
+        return state
+
     state['messages'].append({"role": "user", "content": state['customer_message']})
 
-    try:
-        # Direct invocation of prompt and model
-        response = model.invoke(prompt.invoke({"messages": state['messages']}))
+    # Follow-up turns depend on the conversation, only a first turn can be a plain menu item
+    if len(state['messages']) != 1:
+        state['menu_item'] = None
+        return state
+
+    match = get_recipe_catalog().match(state['customer_message'])
+    if match is None:
+        return state
+
+    state['menu_item'] = match['menu_item']
+    state['intent'] = match['intent']
+    state['food_type'] = match['food_type']
+    state['required_ingredients'] = resolve_required_ingredients(match['ingredients'])
+    state['inventory_choice'] = match['inventory_choice']
+
+    state['order_status'] = 'initiated'
+    state['order_time'] = datetime.now()
+    size = f"{match['size']} " if match['size'] else ""
+    state['notes'].append(f"Order matched catalog item '{size}{match['menu_item']}' at {datetime.now()}")
+
+    return state
+
+
+def _interpretation_model():
+    return get_structured_model() if INTERPRETATION_MODE == 'structured' else get_model()
+
+
+def _invoke_model_batch(prompt_values):
+    # One failed prompt must not fail the others of the batch
+    return _interpretation_model().batch(
+        prompt_values, config={"max_concurrency": LLM_MAX_CONCURRENCY}, return_exceptions=True)
+
+
+context_window = ConversationWindow(
+    max_tokens=CONTEXT_MAX_TOKENS,
+    keep_turns=CONTEXT_KEEP_TURNS,
+    summary_max_tokens=CONTEXT_SUMMARY_MAX_TOKENS,
+    exact_tokens=CONTEXT_EXACT_TOKENS,
+)
+
+
+def manage_context(state: PizzaOrderState) -> PizzaOrderState:
+    """Fit the conversation into the token budget, folding turns that leave the window into the summary."""
+    system_prompt = STRUCTURED_SYSTEM_PROMPT if INTERPRETATION_MODE == 'structured' else LEGACY_SYSTEM_PROMPT
+    context, summary, report = context_window.fit(state['messages'], state['context_summary'], system_prompt)
+    state['context_messages'] = context
+    # Folded turns live on in the summary only, so the checkpointed history stays within the window
+    state['messages'], state['context_summary'] = drop_folded_turns(state['messages'], summary, report['turns_kept'])
+
+    metrics.add('ContextTokensSaved', report['tokens_saved'])
+    if report['turns_summarized']:
+        state['notes'].append(
+            f"Context kept {report['turns_kept']} turns verbatim and summarized {report['turns_summarized']}, "
+            f"saving {report['tokens_saved']} of {report['tokens_full']} tokens"
+        )
+    return state
+
+
+llm_flights = SingleFlight()
+llm_batcher = MicroBatcher(
+    _invoke_model_batch,
+    window_ms=LLM_BATCH_WINDOW_MS,
+    max_batch_size=LLM_BATCH_MAX_SIZE,
+    max_concurrency=LLM_MAX_CONCURRENCY,
+)
+
+
+def call_interpretation_model(prompt_value):
+    """Invoke the interpretation model directly, or through the micro-batcher when a window is set."""
+    if LLM_BATCH_WINDOW_MS > 0:
+        return llm_batcher.submit(prompt_value)
+    return _interpretation_model().invoke(prompt_value)
+
+
+def invoke_interpreter(messages):
+    """
+    Ask the model to interpret the conversation.
 
-        # Parse the response (assuming it returns JSON string)
-        parsed_response = json.loads(response.content)
+    Returns:
+        tuple: (dict with INTERPRETATION_FIELDS, the model's raw AIMessage)
+
+    Raises:
+        ValueError: When a structured reply does not match the schema
+        json.JSONDecodeError: When a free-form reply is not valid JSON
+    """
+    if INTERPRETATION_MODE == 'structured':
+        result = call_interpretation_model(get_structured_prompt().invoke({"messages": messages}))
+        if result['parsed'] is None:
+            raise ValueError(f"Structured output did not match the schema: {result['parsing_error']}")
+        return to_interpretation(result['parsed']), result['raw']
+
+    response = call_interpretation_model(get_prompt().invoke({"messages": messages}))
+    return json.loads(response.content), response
+
+
+def interpret_with_single_flight(messages, flight_key):
+    """
+    Interpret the conversation, sharing the LLM call with concurrent identical requests.
+
+    Returns:
+        tuple: (interpretation dict, raw AIMessage, True if another request's call was shared)
+    """
+    if not LLM_SINGLE_FLIGHT:
+        return (*invoke_interpreter(messages), False)
+
+    (parsed_response, response), shared = llm_flights.do(flight_key, lambda: invoke_interpreter(messages))
+    if shared:
+        # Every waiter gets its own copy, the nodes mutate what they are given
+        parsed_response = copy.deepcopy(parsed_response)
+    return parsed_response, response, shared
+
+
+def interpret_order(state: PizzaOrderState) -> PizzaOrderState:
+    """Process the customer's order using the chat prompt."""
+    try:
+        # Only a first turn can be answered from the cache, later turns depend on the conversation
+        cache_key = None
+        parsed_response = None
+        if len(state['messages']) == 1:
+            cache_key = interpretation_cache_key(state['customer_message'], PROMPT_VERSION, OPENAI_MODEL_NAME)
+            parsed_response = interpretation_cache.get(cache_key)
+
+        if parsed_response is not None:
+            state['notes'].append("Order interpretation served from cache")
+        else:
+            # The model only sees the windowed conversation, so that is what identical requests share
+            messages = state['context_messages'] or state['messages']
+            flight_key = cache_key or hashlib.sha256(
+                f"{PROMPT_VERSION}|{json.dumps(messages, sort_keys=True, default=str)}".encode('utf-8')
+            ).hexdigest()
+            with metrics.http_call('openai'):
+                parsed_response, response, shared = interpret_with_single_flight(messages, flight_key)
+
+            if shared:
+                state['notes'].append("Order interpretation shared with an identical in-flight request")
+            else:
+                # Tokens are only counted for the request that made the call
+                metrics.record_llm_usage(response)
+                prompt_tokens, completion_tokens = token_usage(response)
+                state['notes'].append(f"LLM used {prompt_tokens} prompt and {completion_tokens} completion tokens")
+
+            if cache_key is not None:
+                interpretation_cache.put(cache_key, {field: parsed_response[field] for field in INTERPRETATION_FIELDS})
+
+        # A reply without a food order leaves the interpretation of earlier turns as it was
+        if parsed_response['intent'] != 'order_food' or not parsed_response['ingredients']:
+            state['errors'].append(
+                f"No food order found in the message (intent '{parsed_response['intent']}', "
+                f"{len(parsed_response['ingredients'])} ingredients)")
+            return state
 
         # Update state with parsed response
         state['intent'] = parsed_response['intent']
         state['food_type'] = parsed_response['food_type']
-        state['required_ingredients'] = parsed_response['ingredients']
+        # Resolve free-form names before any database call
+        state['required_ingredients'] = resolve_required_ingredients(parsed_response['ingredients'])
         state['inventory_choice'] = parsed_response['inventory_choice']
 
         state['order_status'] = 'initiated'
@@ -153,42 +478,64 @@ def can_make_meal(available_ingredients, required_ingredients):
         required_ingredients: Dict with ingredient names as keys and required quantities as values
 
     Returns:
-        tuple: (bool, str) - (True/False if meal can be made, explanation message)
+        tuple: (bool, str | list) - (True/False if meal can be made, explanation message
+        or every missing ingredient)
     """
-    # Convert available ingredients to a more convenient format
+    # Ingredients that are absent or have no quantity count as empty
     available_dict = {item['ingredient']: item['quantity'] for item in available_ingredients}
+    required = {ingredient: convert_kg_to_float(amount) for ingredient, amount in required_ingredients.items()}
 
-    # Check if we have all required ingredients
-    for ingredient, required_amount in required_ingredients.items():
-        # Check if ingredient exists in available ingredients
-        if ingredient not in available_dict:
-            return False, f"Missing ingredient: {ingredient}"
+    engine = FeasibilityEngine(required)
+    result = engine.check([required], available_dict)
 
-        # Convert required amount to float
-        required_amount = convert_kg_to_float(required_amount)
+    if result.feasible[0]:
+        return True, "All ingredients available in sufficient quantities"
+    return False, result.missing_ingredients(0)
 
-        # Check if we have enough quantity
-        available_amount = available_dict[ingredient]
 
-        missing_ingredients = []
+def menu_capacity_report():
+    """
+    Count how many more of each catalog menu item the current inventory allows.
+
+    Returns:
+        dict: Menu item to the number of regular-size servings that can still be made
+    """
+    return {menu_item: entry["servings"] for menu_item, entry in get_fresh_availability_view().menu().items()}
 
-        # If quantity is None, we assume it's a boolean ingredient (just needs to be present)
-        if available_amount is None:
-            missing_ingredients.append(ingredient)
-            return False, missing_ingredients
 
-        if available_amount < required_amount:
-            missing_ingredients.append(ingredient)
-            return False, missing_ingredients
+def resolve_required_ingredients(required_ingredients):
+    """
+    Map the LLM's ingredient names onto canonical inventory names.
 
-    return True, "All ingredients available in sufficient quantities"
+    Names that resolve to the same inventory item have their amounts added up;
+    names the index cannot resolve are kept as they are.
+    """
+    resolved = {}
+    for ingredient, amount in required_ingredients.items():
+        canonical = get_ingredient_index().resolve(ingredient) or ingredient
+        if canonical in resolved:
+            amount = f"{convert_kg_to_float(resolved[canonical]) + convert_kg_to_float(amount)}kg"
+        resolved[canonical] = amount
+    return resolved
 
 
 def check_ingredients(state: PizzaOrderState) -> PizzaOrderState:
     """Check if all required ingredients are available in the chosen inventory."""
     state['order_status'] = 'ingredients_checked'
 
-    inventory_available = check_inventory_dynamodb(list(state['required_ingredients'].keys()))
+    # Catalog dishes are checked against the in-memory availability view when it is fresh
+    quantities = None
+    if state.get('menu_item'):
+        view = get_availability_view()
+        quantities = view.quantities(list(state['required_ingredients'])) if view.fresh else None
+
+    if quantities is not None:
+        inventory_available = [
+            {'ingredient': ingredient, 'quantity': quantity if quantity > 0 else None}
+            for ingredient, quantity in quantities.items()
+        ]
+    else:
+        inventory_available = check_inventory_dynamodb(list(state['required_ingredients'].keys()))
 
     required_ingredients = state['required_ingredients']
 
@@ -205,6 +552,38 @@ def check_ingredients(state: PizzaOrderState) -> PizzaOrderState:
     return state
 
 
+def reserve_inventory(state: PizzaOrderState) -> PizzaOrderState:
+    """Atomically reserve the order's ingredients so concurrent orders cannot oversell stock."""
+    required_amounts = {
+        ingredient: convert_kg_to_float(amount)
+        for ingredient, amount in state['required_ingredients'].items()
+    }
+
+    try:
+        # A follow-up turn that changed the order hands back what the earlier turn reserved
+        if state['reserved_ingredients'] and state['reserved_ingredients'] != required_amounts:
+            release_ingredients(state['order_id'])
+            state['reserved_ingredients'] = {}
+            state['notes'].append("Earlier reservation released, the order changed")
+
+        reserved, lost = reserve_ingredients(state['order_id'], required_amounts)
+    except Exception as e:
+        logger.error(f"Error reserving ingredients: {str(e)}")
+        state['errors'].append(f"Error reserving ingredients: {str(e)}")
+        return state
+
+    if reserved:
+        state['order_status'] = 'reserved'
+        state['reserved_ingredients'] = required_amounts
+        state['notes'].append(f"Ingredients reserved at {datetime.now()}")
+    else:
+        state['ingredients_available'] = False
+        state['missing_ingredients'] = lost
+        state['errors'].append(f"Ingredients taken by another order: {', '.join(lost)}")
+
+    return state
+
+
 def submit_order(state: PizzaOrderState) -> PizzaOrderState:
     """Process the order submission."""
     if not state['ingredients_available']:
@@ -213,14 +592,9 @@ def submit_order(state: PizzaOrderState) -> PizzaOrderState:
 
     state['order_status'] = 'submitted'
 
-    # Calculate total price (mock calculation)
-    base_price = 10.0  # TODO:  Base price for any order
-    float_list = [float(x) for x in list(state['required_ingredients'].values())]
-
-    # TODO: this is wrong, but ok
-    ingredient_cost = sum(0.5 * amount for amount in float_list)
-
-    state['total_price'] = base_price + ingredient_cost
+    # The reservation holds the order's quantities already parsed to kg
+    state['total_price'] = get_price_table().price(
+        state['reserved_ingredients'], state['menu_item'], state['food_type'])
 
     # Add processing note
     state['notes'].append(f"Order submitted with total price: ${state['total_price']:.2f}")
@@ -233,13 +607,20 @@ def decide_order_type(state: PizzaOrderState) -> PizzaOrderState:
     state['order_status'] = 'type_decided'
 
     # Determine order type based on delivery address presence
-    # if state.get('delivery_address'):
-    if False:
-        state['order_type'] = 'delivery'
-        state['notes'].append("Order type set to delivery")
-    else:
-        state['order_type'] = 'pickup'
-        state['notes'].append("Order type set to pickup")
+    order_type = 'delivery' if state.get('delivery_address') else 'pickup'
+    previous = state['order_type']
+    state['order_type'] = order_type
+    state['notes'].append(f"Order type set to {order_type}")
+
+    if previous and previous != order_type:
+        # A follow-up turn switched type: the estimate and driver run of the old type go.
+        # The kitchen entry stays, the new type's node schedules the order again
+        state['estimated_pickup_time'] = None
+        state['estimated_delivery_time'] = None
+        if previous == 'delivery':
+            get_delivery_planner().cancel(state['order_id'])
+        state['order_type_revision'] = state.get('order_type_revision', 0) + 1
+        state['notes'].append(f"Order changed from {previous} to {order_type}")
 
     return state
 
@@ -249,9 +630,7 @@ def calculate_pickup_time(state: PizzaOrderState) -> PizzaOrderState:
     if state['order_type'] != 'pickup':
         return state
 
-    # Mock time calculation: current time + 30 minutes
-    pickup_time = datetime.now()
-    pickup_time = pickup_time.replace(minute=pickup_time.minute + 30)
+    pickup_time = schedule_in_kitchen(state)
     state['estimated_pickup_time'] = pickup_time
 
     state['notes'].append(f"Estimated pickup time set to: {pickup_time}")
@@ -261,6 +640,12 @@ def calculate_pickup_time(state: PizzaOrderState) -> PizzaOrderState:
     return state
 
 
+def schedule_in_kitchen(state: PizzaOrderState) -> datetime:
+    """Queue the order on the kitchen's stations and return when it will be ready."""
+    ready_at = get_kitchen().schedule(state['order_id'], state['menu_item'], state['food_type'])
+    return datetime.fromtimestamp(ready_at)
+
+
 def process_pickup_order(state: PizzaOrderState) -> PizzaOrderState:
     """Handle pickup-specific processing."""
     state['order_status'] = 'completed'
@@ -274,24 +659,104 @@ def process_pickup_order(state: PizzaOrderState) -> PizzaOrderState:
 
 def process_delivery_order(state: PizzaOrderState) -> PizzaOrderState:
     """Handle delivery-specific processing."""
-    state['order_status'] = 'completed'
+    ready_at = schedule_in_kitchen(state)
+    try:
+        delivery_at, run = get_delivery_planner().plan(
+            state['order_id'], state['delivery_address'], ready_at.timestamp())
+    except ValueError as e:
+        # An order that cannot be delivered holds up neither the kitchen nor the stock
+        state['errors'].append(f"Error planning delivery: {str(e)}")
+        drop_reservation(state, "Reservation released, the order cannot be delivered")
+        return state
 
-    # Mock delivery time calculation: current time + 45 minutes
-    delivery_time = datetime.now()
-    delivery_time = delivery_time.replace(minute=delivery_time.minute + 45)
-    state['estimated_delivery_time'] = delivery_time
+    state['order_status'] = 'completed'
+    state['estimated_delivery_time'] = datetime.fromtimestamp(delivery_at)
 
     # Add processing notes
+    state['notes'].append(
+        f"Delivery to {run['zone']} on a run of {run['run_orders']} orders leaving at "
+        f"{datetime.fromtimestamp(run['departure'])}"
+    )
     state['notes'].append(
         f"Delivery order processed. Estimated delivery time: {state['estimated_delivery_time']}"
     )
     return state
 
 
+def settle_order(state: PizzaOrderState) -> PizzaOrderState:
+    """
+    Last step of every turn: an order that did not complete gives its stock back
+    and leaves the kitchen and its driver run.
+
+    Whatever ended the turn early (ingredients gone, a failed reservation, an
+    address that cannot be delivered to), nothing is held for an order that may
+    never be finished. This includes a follow-up that changed a completed order
+    into one that cannot be made: the earlier turn's order is withdrawn too.
+    """
+    # The prompt is rebuilt from messages and the summary on the next turn, it is not worth checkpointing
+    state['context_messages'] = []
+    if state['order_status'] == 'completed':
+        return state
+
+    # The next turn looks at the stock again instead of reusing this turn's check
+    state['node_runs'].pop('check_ingredients', None)
+    if state['reserved_ingredients']:
+        drop_reservation(state, "Reservation released, the order did not complete")
+    return state
+
+
 # Routing functions
+def input_fingerprint(state, fields):
+    """Short hash of the state fields a node reads."""
+    encoded = json.dumps([state.get(field) for field in fields], sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:16]
+
+
+def skip_unchanged(name, fields, node):
+    """
+    Wrap a node so a resumed conversation skips it while its inputs are unchanged.
+
+    After a run that added no errors the node's input fingerprint and the status it
+    left are kept in state['node_runs']. A later turn with the same fingerprint
+    restores that status instead of running the node again.
+    """
+    @functools.wraps(node)
+    def wrapper(state):
+        fingerprint = input_fingerprint(state, fields)
+        last_run = state['node_runs'].get(name)
+        if last_run and last_run['inputs'] == fingerprint:
+            state['order_status'] = last_run['status']
+            state['notes'].append(f"Skipped {name}, inputs unchanged since the last turn")
+            return state
+
+        errors_before = len(state['errors'])
+        state = node(state)
+        if len(state['errors']) == errors_before:
+            state['node_runs'][name] = {'inputs': fingerprint, 'status': state['order_status']}
+        return state
+
+    return wrapper
+
+
+def route_after_catalog(state: PizzaOrderState) -> str:
+    """Catalog hits go straight to the inventory check, everything else to the LLM."""
+    return "check_ingredients" if state['menu_item'] else "manage_context"
+
+
+def route_after_interpretation(state: PizzaOrderState) -> str:
+    """Only food orders with ingredients go on to the inventory; a follow-up keeps the order of earlier turns."""
+    is_order = state['intent'] == 'order_food' and bool(state['required_ingredients'])
+    return "check_ingredients" if is_order else "settle_order"
+
+
 def route_after_ingredients_check(state: PizzaOrderState) -> str:
     """Determine next state after ingredients check."""
-    return "submit_order" if state['ingredients_available'] else END
+    return "reserve_inventory" if state['ingredients_available'] else "settle_order"
+
+
+def route_after_reservation(state: PizzaOrderState) -> str:
+    """Only orders holding a reservation are submitted."""
+    return "submit_order" if state['reserved_ingredients'] else "settle_order"
 
 
 def route_after_order_type(state: PizzaOrderState) -> str:
@@ -299,109 +764,356 @@ def route_after_order_type(state: PizzaOrderState) -> str:
     return "pickup_order" if state['order_type'] == 'pickup' else "delivery_order"
 
 
-def check_ingredient_quantity_by_name(ingredient_name):
-    try:
-        filter_expression = Attr('IngredientName').eq(ingredient_name)
-        logger.info(f"Scanning table for ingredient: {ingredient_name}")
-        response = table.scan(FilterExpression=filter_expression)
-
-        if response['Count'] == 0:
-            logger.warning(f"Ingredient '{ingredient_name}' not found.")
-            return None
+def batch_get_ingredient_quantities(ingredient_names):
+    """
+    Fetch stock quantities for several ingredients in one backend call.
 
-        item = response['Items'][0]
-        quantity = int(item.get('Quantity', 0))
+    Returns:
+        dict: Ingredient name to quantity for every ingredient found in the inventory
+    """
+    return get_inventory_backend().batch_get(ingredient_names)
 
-        if quantity > 0:
-            logger.info(f"Ingredient '{ingredient_name}' found. Quantity: {quantity}")
-            return quantity
-        else:
-            logger.warning(f"Ingredient '{ingredient_name}' found, but quantity is 0.")
-            return None
 
-    except ClientError as e:
-        logger.error(f"An error occurred: {e.response['Error']['Message']}")
-        return None
-    except Exception as e:
-        logger.error(f"An unexpected error occurred: {str(e)}")
-        return None
+def check_ingredient_quantity_by_name(ingredient_name):
+    return check_inventory_dynamodb([ingredient_name])[0]['quantity']
 
 
 def check_inventory_dynamodb(ingredients: List[str]) -> list[dict[str, str | None | int]]:
+    quantities, missing = inventory_cache.get_many(ingredients)
+    if missing:
+        try:
+            fetched = batch_get_ingredient_quantities(missing)
+            inventory_cache.put_many(fetched)
+            quantities.update(fetched)
+        except ClientError as e:
+            logger.error(f"An error occurred: {e.response['Error']['Message']}")
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {str(e)}")
+
     recipe_ingredients = []
     for ingredient in ingredients:
-        quantity = check_ingredient_quantity_by_name(ingredient)
+        quantity = quantities.get(ingredient)
+        if quantity is None:
+            logger.warning(f"Ingredient '{ingredient}' not found.")
+        elif quantity <= 0:
+            logger.warning(f"Ingredient '{ingredient}' found, but quantity is 0.")
+            quantity = None
         inventory_status = {'ingredient': ingredient, 'quantity': quantity}
         recipe_ingredients.append(inventory_status)
     return recipe_ingredients
 
+
+def load_ingredient_names():
+    """Every ingredient name in the inventory (a projected scan on DynamoDB)."""
+    return get_inventory_backend().list_names()
+
+
+def load_inventory_snapshot():
+    """Read every ingredient's quantity in one pass."""
+    return get_inventory_backend().list_quantities()
+
+
+@lazy_component('recipe_catalog')
+def get_recipe_catalog():
+    """Menu items with exact ingredient quantities, loaded once per container."""
+    return RecipeCatalog.from_file(RECIPE_CATALOG_PATH)
+
+
+@lazy_component('price_table')
+def get_price_table():
+    return PriceTable.from_file(PRICING_PATH)
+
+
+@lazy_component('menu_prices')
+def get_menu_prices():
+    """Price of every catalog menu item at every size, computed once per container."""
+    catalog = get_recipe_catalog()
+    food_types = {menu_item: recipe.get('food_type') for menu_item, recipe in catalog.recipes.items()}
+    return get_price_table().quote_menu(catalog.requirements(), food_types, catalog.sizes)
+
+
+def menu_with_prices():
+    """The availability menu with each item's prices per size."""
+    menu = get_fresh_availability_view().menu()
+    prices = get_menu_prices()
+    for menu_item, entry in menu.items():
+        entry["prices"] = prices.get(menu_item, {})
+    return menu
+
+
+def quote_orders(orders):
+    """
+    Price a list of orders without placing them.
+
+    Args:
+        orders: List of dicts with 'ingredients' (name -> '<number>kg') and optional 'menu_item' and 'food_type'
+
+    Returns:
+        list: Price per order, in order
+
+    Raises:
+        ValueError: When an amount is not in '<number>kg' format; the message names the order's index
+    """
+    quantities = []
+    for index, order in enumerate(orders):
+        try:
+            quantities.append({name: convert_kg_to_float(amount)
+                               for name, amount in resolve_required_ingredients(order.get('ingredients', {})).items()})
+        except ValueError as e:
+            raise ValueError(f"Order {index}: {e}") from e
+    return get_price_table().quote_orders(
+        quantities, [order.get('menu_item') for order in orders], [order.get('food_type') for order in orders])
+
+
+@lazy_component('kitchen')
+def get_kitchen():
+    """The kitchen schedule of this container; orders stay in it until their ready time."""
+    return KitchenScheduler.from_file(KITCHEN_CONFIG_PATH)
+
+
+@lazy_component('delivery_planner')
+def get_delivery_planner():
+    """Driver runs of this container, with the zone travel times computed once."""
+    return DeliveryPlanner.from_file(DELIVERY_ZONES_PATH)
+
+
+@lazy_component('availability_view')
+def get_availability_view():
+    return AvailabilityView(get_recipe_catalog().requirements(), AVAILABILITY_VIEW_MAX_AGE_SECONDS)
+
+
+def get_fresh_availability_view():
+    """The availability view, reloaded with one scan when it is empty or too old."""
+    view = get_availability_view()
+    if not view.fresh:
+        view.load(load_inventory_snapshot())
+    return view
+
+
+def is_menu_request(event):
+    """True for GET /menu from API Gateway (HTTP API or REST API events)."""
+    http = event.get('requestContext', {}).get('http', {})
+    method = http.get('method') or event.get('httpMethod')
+    path = event.get('rawPath') or event.get('path') or ''
+    return method == 'GET' and path.rstrip('/').endswith('/menu')
+
+
+@lazy_component('ingredient_index')
+def get_ingredient_index():
+    """Build the ingredient name index once per container from the table and the synonym file."""
+    try:
+        ingredient_names = load_ingredient_names()
+    except Exception as e:
+        logger.error(f"Could not load ingredient names, index uses synonyms only: {str(e)}")
+        ingredient_names = []
+    return IngredientIndex.build(ingredient_names, load_synonyms(INGREDIENT_SYNONYMS_PATH))
+
+
+def reserve_ingredients(order_id, required_amounts):
+    """
+    Atomically decrement the stock of every ingredient an order needs.
+
+    The backend takes all amounts or none of them, so either the whole order is
+    reserved or nothing is. Re-running a reservation for an order that is
+    already reserved is a no-op.
+
+    Args:
+        order_id: Order the reservation belongs to
+        required_amounts: Dict with ingredient names as keys and amounts in kg as values
+
+    Returns:
+        tuple: (bool, list) - (True if the order is reserved, ingredients that lacked stock)
+    """
+    ingredient_names = list(required_amounts)
+    reserved, lost = get_inventory_backend().reserve(order_id, required_amounts)
+    inventory_cache.invalidate(ingredient_names)
+
+    if reserved:
+        get_availability_view().adjust(required_amounts, decrement=True)
+        logger.info(f"Reserved ingredients for order {order_id}: {ingredient_names}")
+    return reserved, lost
+
+
+def release_ingredients(order_id):
+    """
+    Return the stock held by an order's reservation (cancelled or failed orders).
+
+    Releasing an order twice only returns its stock once.
+
+    Returns:
+        bool: True if a reservation was released
+    """
+    amounts = get_inventory_backend().release(order_id)
+    if not amounts:
+        logger.info(f"No reservation to release for order {order_id}")
+        return False
+
+    inventory_cache.invalidate(list(amounts))
+    get_availability_view().adjust(amounts, decrement=False)
+    logger.info(f"Released ingredients for order {order_id}: {list(amounts)}")
+    return True
+
+
+def drop_reservation(state: PizzaOrderState, note: str) -> PizzaOrderState:
+    """
+    Release an order's reservation, take it out of the kitchen and off its driver
+    run, and clear what was derived from them.
+
+    The reservation, submission and estimates are forgotten in state['node_runs'],
+    so a later turn of the conversation reserves, prices and schedules the order again.
+    """
+    release_ingredients(state['order_id'])
+    get_kitchen().cancel(state['order_id'])
+    get_delivery_planner().cancel(state['order_id'])
+    state['reserved_ingredients'] = {}
+    state['total_price'] = 0.0
+    state['estimated_pickup_time'] = None
+    state['estimated_delivery_time'] = None
+    for name in ('reserve_inventory', 'submit_order', 'calculate_pickup_time', 'delivery_order'):
+        state['node_runs'].pop(name, None)
+    state['notes'].append(note)
+    return state
+
+
 def check_inventory_sister_restaurant(ingredients):
     return False
 
 # Example initial state
-def create_initial_state(customer_message: str) -> PizzaOrderState:
+def create_initial_state(body) -> PizzaOrderState:
+    """
+    Args:
+        body: The request body (dict with 'message' and optional customer fields) or a plain message
+    """
+    customer = body if isinstance(body, dict) else {}
     return {
         "order_id": "",
         "order_status": "initiated",
         "order_type": None,
+        "order_type_revision": 0,
+        "menu_item": None,
         "intent": "",
         "food_type": "",
         "required_ingredients": {},
         "inventory_choice": "current_restaurant",
         "ingredients_available": False,
         "missing_ingredients": [],
+        "reserved_ingredients": {},
         "order_time": datetime.now(),
         "estimated_pickup_time": None,
         "estimated_delivery_time": None,
-        "customer_name": "",
-        "delivery_address": None,
-        "phone_number": "",
-        "customer_message": customer_message,
-        "items": [],
+        "customer_name": customer.get('customer_name', ''),
+        "delivery_address": customer.get('delivery_address'),
+        "phone_number": customer.get('phone_number', ''),
+        "customer_message": customer_text(body),
         "total_price": 0.0,
         "errors": [],
         "notes": [],
-        "messages": []
+        "messages": [],
+        "context_messages": [],
+        "context_summary": None,
+        "node_runs": {}
     }
 
 
 # Create the prompt template
-prompt = ChatPromptTemplate.from_messages([
-    ("system", """You are an AI assistant for a restaurant. Interpret the user's food order, identifying the intent, ingredients, and type of food. 
+LEGACY_SYSTEM_PROMPT = """You are an AI assistant for a restaurant. Interpret the user's food order, identifying the intent, ingredients, and type of food. 
     After identifying food provide generic amounts of ingredients required in kilograms. 
     Respond in the following JSON format:
-    {{"intent": "order_food", "ingredients": ["ingredient1": "weight1", "ingredient2": "weight2"], "food_type": "type_of_food"}}
+    {{"intent": "order_food", "ingredients": {{"ingredient1": "weight1", "ingredient2": "weight2"}}, "food_type": "type_of_food"}}
     After analyzing the order, decide which inventory to check:
     - If the order is for pizza or pasta, use the "current_restaurant" inventory.
     - For all other food types, use the "sister_restaurant" inventory.
     Include your decision in the JSON response as "inventory_choice": "current_restaurant" or "inventory_choice": "sister_restaurant".
-    """),
-    MessagesPlaceholder(variable_name="messages"),
-])
+    """
+
+
+@lazy_component('prompt')
+def get_prompt():
+    with cold_start.measure('import:langchain'):
+        from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+    return ChatPromptTemplate.from_messages([
+        ("system", LEGACY_SYSTEM_PROMPT),
+        MessagesPlaceholder(variable_name="messages"),
+    ])
+
+
+@lazy_component('structured_prompt')
+def get_structured_prompt():
+    with cold_start.measure('import:langchain'):
+        from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+    return ChatPromptTemplate.from_messages([
+        ("system", STRUCTURED_SYSTEM_PROMPT),
+        MessagesPlaceholder(variable_name="messages"),
+    ])
+
+
+@lazy_component('structured_model')
+def get_structured_model():
+    """The chat model bound to the interpretation schema; replies carry the raw message for token counts."""
+    return get_model().with_structured_output(
+        INTERPRETATION_SCHEMA, method=STRUCTURED_OUTPUT_METHOD, strict=True, include_raw=True)
+
+
+@lazy_component('model')
+def get_model():
+    with cold_start.measure('import:langchain_openai'):
+        from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(api_key=get_openai_api_key(), model=OPENAI_MODEL_NAME)
 
-model = ChatOpenAI(api_key=openai_api_key)
 
 # Build the graph
 builder = StateGraph(PizzaOrderState)
 
-# Add nodes
-builder.add_node("interpret_order", interpret_order)
-builder.add_node("check_ingredients", check_ingredients)
-builder.add_node("submit_order", submit_order)
-builder.add_node("decide_order_type", decide_order_type)
-builder.add_node("calculate_pickup_time", calculate_pickup_time)
-builder.add_node("pickup_order", process_pickup_order)
-builder.add_node("delivery_order", process_delivery_order)
+# Add nodes, each wrapped so its latency, DynamoDB calls and LLM tokens are recorded
+builder.add_node("match_catalog", metrics.instrument_node("match_catalog", match_catalog))
+# Nodes after the catalog match are skipped on follow-up turns that did not change what they read
+builder.add_node("manage_context", metrics.instrument_node("manage_context", skip_unchanged(
+    "manage_context", ('messages',), manage_context)))
+builder.add_node("interpret_order", metrics.instrument_node("interpret_order", skip_unchanged(
+    "interpret_order", ('messages',), interpret_order)))
+builder.add_node("check_ingredients", metrics.instrument_node("check_ingredients", skip_unchanged(
+    "check_ingredients", ('required_ingredients', 'inventory_choice'), check_ingredients)))
+builder.add_node("reserve_inventory", metrics.instrument_node("reserve_inventory", skip_unchanged(
+    "reserve_inventory", ('order_id', 'required_ingredients'), reserve_inventory)))
+builder.add_node("submit_order", metrics.instrument_node("submit_order", skip_unchanged(
+    "submit_order", ('required_ingredients', 'ingredients_available'), submit_order)))
+builder.add_node("decide_order_type", metrics.instrument_node("decide_order_type", skip_unchanged(
+    "decide_order_type", ('delivery_address',), decide_order_type)))
+builder.add_node("calculate_pickup_time", metrics.instrument_node("calculate_pickup_time", skip_unchanged(
+    "calculate_pickup_time", ('order_type', 'order_type_revision', 'required_ingredients'), calculate_pickup_time)))
+builder.add_node("pickup_order", metrics.instrument_node("pickup_order", process_pickup_order))
+builder.add_node("delivery_order", metrics.instrument_node("delivery_order", skip_unchanged(
+    "delivery_order", ('order_type', 'order_type_revision', 'delivery_address', 'required_ingredients'),
+    process_delivery_order)))
+builder.add_node("settle_order", metrics.instrument_node("settle_order", settle_order))
 
 # Add edges
-builder.add_edge(START, "interpret_order")
-builder.add_edge("interpret_order", "check_ingredients")
+builder.add_edge(START, "match_catalog")
+
+builder.add_conditional_edges(
+    "match_catalog",
+    route_after_catalog
+)
+
+builder.add_edge("manage_context", "interpret_order")
+builder.add_conditional_edges(
+    "interpret_order",
+    route_after_interpretation
+)
 
 builder.add_conditional_edges(
     "check_ingredients",
     route_after_ingredients_check
 )
 
+builder.add_conditional_edges(
+    "reserve_inventory",
+    route_after_reservation
+)
+
 builder.add_edge("submit_order", "decide_order_type")
 
 builder.add_conditional_edges(
@@ -410,49 +1122,312 @@ builder.add_conditional_edges(
 )
 
 builder.add_edge("pickup_order", "calculate_pickup_time")
-builder.add_edge("calculate_pickup_time", END)
-builder.add_edge("delivery_order", END)
+builder.add_edge("calculate_pickup_time", "settle_order")
+builder.add_edge("delivery_order", "settle_order")
+builder.add_edge("settle_order", END)
+
+
+# Compile the graph on first use; render the diagram offline with render_graph.py
+@lazy_component('graph')
+def get_graph():
+    return builder.compile(checkpointer=get_checkpointer())
+
+
+def warm_up():
+    """Create every lazily initialized component now (used when LAZY_INIT is false)."""
+    if INVENTORY_BACKEND == 'dynamodb':
+        get_dynamodb()
+    get_inventory_backend()
+    get_openai_api_key()
+    if INTERPRETATION_MODE == 'structured':
+        get_structured_prompt()
+        get_structured_model()
+    else:
+        get_prompt()
+        get_model()
+    get_checkpointer()
+    get_graph()
+    get_ingredient_index()
+    get_recipe_catalog()
+    get_kitchen()
+    get_delivery_planner()
+    get_menu_prices()
+
+
+if not LAZY_INIT:
+    warm_up()
+
+
+def build_response(final_state) -> OrderResponse:
+    """Response body for a processed order."""
+    return OrderResponse.from_state(final_state)
+
+
+def create_follow_up_input(body, order_id):
+    """Graph input for a later turn: the new words and changed customer fields, merged into the checkpoint."""
+    turn = {"order_id": order_id, "customer_message": body.get('message') or '', "errors": [], "notes": []}
+    for field in ('customer_name', 'delivery_address', 'phone_number'):
+        if field in body:
+            turn[field] = body[field]
+    return turn
+
+
+def start_order(body):
+    """
+    Work out where an order's turn starts.
+
+    The conversation id (or the order id) is the checkpoint thread. A body naming a
+    thread that has a checkpoint resumes it; anything else starts a new order under
+    a new order id. Reservations are keyed by order id and outlive checkpoints, so a
+    new order never takes the id the client sent: it could name an old reservation
+    and the order would be marked reserved without taking any stock.
+
+    Returns:
+        tuple: (graph input, graph config, True if the turn resumes a checkpointed order)
+    """
+    customer = body if isinstance(body, dict) else {}
+    thread_id = customer.get('conversation_id') or customer.get('order_id')
+
+    if get_checkpointer() is not None and thread_id:
+        config = {"configurable": {"thread_id": thread_id}}
+        saved = get_graph().get_state(config).values
+        if saved:
+            return create_follow_up_input(customer, saved['order_id']), config, True
+
+    # The order id is assigned up front so a failed run can release its reservation
+    order_id = str(uuid4())
+    config = {"configurable": {"thread_id": customer.get('conversation_id') or order_id}}
+    initial_state = create_initial_state(body)
+    initial_state['order_id'] = order_id
+    if customer.get('order_id'):
+        initial_state['notes'].append(f"No saved order {customer['order_id']}, started order {order_id}")
+    return initial_state, config, False
+
+
+def process_order(body):
+    """Run one order turn through the graph and return its response body."""
+    graph_input, config, resumed = start_order(body)
+
+    try:
+        final_state = get_graph().invoke(graph_input, config, durability=CHECKPOINT_DURABILITY)
+    except Exception:
+        # A follow-up that raised is not checkpointed, so what the earlier turns reserved
+        # stays with their checkpoint. Turns that end without completing are settled by settle_order
+        if not resumed:
+            release_ingredients(graph_input['order_id'])
+        raise
+
+    return build_response(final_state)
 
-# Compile the graph
-graph = builder.compile()
 
-# Save the graph visualization
-img = graph.get_graph().draw_mermaid_png()
-with open("restaurant_order_flow.png", "wb") as f:
-    f.write(img)
+@lazy_component('order_executor')
+def get_order_executor():
+    # Kept for the container's lifetime so worker threads keep their DynamoDB resources between batches
+    return ThreadPoolExecutor(max_workers=ORDER_BATCH_CONCURRENCY, thread_name_prefix='order')
+
+
+def extract_batch_orders(event):
+    """
+    Pull (item id, order body) pairs out of a batch event.
+
+    Accepts SQS batches (one order per message), EventBridge events whose detail
+    holds an 'orders' list, and direct invocations with an 'orders' list.
+    """
+    if event.get('Records'):
+        return [(record['messageId'], json.loads(record['body'])) for record in event['Records']]
+
+    orders = event.get('detail', event).get('orders', [])
+    return [(order.get('order_id') or str(index), order) for index, order in enumerate(orders)]
+
+
+def is_order_batch_event(event):
+    records = event.get('Records')
+    if records:
+        return all(record.get('eventSource') == 'aws:sqs' for record in records)
+    return isinstance(event.get('detail', event).get('orders'), list)
+
+
+def batch_handler(event, context):
+    """
+    Process a batch of orders concurrently with bounded parallelism.
+
+    The whole batch shares one inventory snapshot: it is read with a single scan
+    and loaded into the inventory cache before any order runs. Each order succeeds
+    or fails on its own. Failed SQS messages are listed in batchItemFailures so
+    only they are redelivered.
+    """
+    orders = extract_batch_orders(event)
+
+    if inventory_cache.enabled and orders:
+        try:
+            inventory_cache.put_many(load_inventory_snapshot())
+        except Exception as e:
+            logger.error(f"Could not load inventory snapshot, orders read inventory individually: {str(e)}")
+
+    futures = [(item_id, get_order_executor().submit(process_order, body)) for item_id, body in orders]
+
+    results = []
+    failures = []
+    for item_id, future in futures:
+        try:
+            results.append({"id": item_id, "status": "processed", "response": future.result().as_dict()})
+        except Exception as e:
+            logger.error(f"Error processing order {item_id}: {str(e)}")
+            results.append({"id": item_id, "status": "failed", "error": str(e)})
+            failures.append({"itemIdentifier": item_id})
+
+    log_cache_stats()
+    logger.info(f"Processed batch of {len(orders)} orders, {len(failures)} failed")
+    return {"batchItemFailures": failures, "results": results}
+
+
+def log_cache_stats():
+    logger.info(f"Inventory cache stats: {json.dumps(inventory_cache.stats())}")
+    logger.info(f"Interpretation cache stats: {json.dumps(interpretation_cache.stats())}")
+    logger.info(f"LLM single-flight stats: {json.dumps(llm_flights.stats())}")
+    logger.info(f"Conversation context stats: {json.dumps(context_window.stats())}")
+    logger.info(f"Kitchen stats: {json.dumps(get_kitchen().stats())}")
+    logger.info(f"Delivery stats: {json.dumps(get_delivery_planner().stats())}")
+    if LLM_BATCH_WINDOW_MS > 0:
+        logger.info(f"LLM micro-batch stats: {json.dumps(llm_batcher.stats())}")
+    if get_checkpointer() is not None:
+        logger.info(f"Checkpoint stats: {json.dumps(get_checkpointer().stats())}")
+
+
+def stream_order_events(body):
+    """
+    Process one order and yield (event, data) pairs as each graph node finishes.
+
+    A failed run releases the order's reservation and ends with an 'error' event.
+    """
+    graph_input, config, resumed = start_order(body)
+
+    try:
+        yield from iter_order_events(get_graph(), graph_input, build_response, config, durability=CHECKPOINT_DURABILITY)
+    except Exception as e:
+        logger.error(f"Error streaming order: {str(e)}")
+        if not resumed:
+            release_ingredients(graph_input['order_id'])
+        yield 'error', {"order_id": graph_input['order_id'], "error": "Internal server error", "message": str(e)}
+    finally:
+        log_cache_stats()
 
 
 def lambda_handler(event, context):
     try:
+        return handle_event(event, context)
+    finally:
+        # The first invocation finishes the lazy initialization, so report the cold start after it
+        cold_start.log_once(COLD_START_BUDGET_MS)
+        if metrics.mode == 'local':
+            logger.info(f"Node metrics: {json.dumps(metrics.rollup())}")
+
+
+def handle_event(event, context):
+    # SQS batches and EventBridge/direct invocations carrying an 'orders' list
+    if is_order_batch_event(event):
+        return batch_handler(event, context)
+
+    # Change events from the Ingredients table stream only invalidate the inventory cache
+    if is_inventory_stream_event(event):
+        invalidated = inventory_cache.apply_stream_records(event['Records'])
+        for record in event['Records']:
+            if record.get('eventName') == 'INSERT':
+                get_ingredient_index().add(record['dynamodb']['Keys']['IngredientName']['S'])
+        get_availability_view().apply_stream_records(event['Records'])
+        return {"statusCode": 200, "body": json.dumps({"invalidated": invalidated})}
+
+    try:
+        # What can be made right now, served from memory
+        if is_menu_request(event):
+            return {
+                "statusCode": 200,
+                "body": json.dumps({"menu": menu_with_prices()}),
+                "headers": {
+                    "Content-Type": "application/json"
+                }
+            }
+
         # Parse the incoming event
         body = json.loads(event['body']) if isinstance(event.get('body'), str) else event.get('body', {})
 
-        # Create initial state
-        initial_state = create_initial_state(body)
+        # Cancelled orders hand their reserved stock back
+        if isinstance(body, dict) and body.get('action') == 'cancel':
+            released = release_ingredients(body['order_id'])
+            get_kitchen().cancel(body['order_id'])
+            get_delivery_planner().cancel(body['order_id'])
+            if get_checkpointer() is not None:
+                get_checkpointer().delete_thread(body.get('conversation_id') or body['order_id'])
+            return {
+                "statusCode": 200,
+                "body": json.dumps({"order_id": body['order_id'], "status": "cancelled", "released": released}),
+                "headers": {
+                    "Content-Type": "application/json"
+                }
+            }
+
+        # The kitchen finished an order; the orders queued behind it get earlier ETAs
+        if isinstance(body, dict) and body.get('action') == 'complete':
+            get_kitchen().complete(body['order_id'])
+            return {
+                "statusCode": 200,
+                "body": json.dumps({"order_id": body['order_id'], "status": "completed", "kitchen": get_kitchen().load()}),
+                "headers": {
+                    "Content-Type": "application/json"
+                }
+            }
 
-        # Process the order through the graph
-        final_state = graph.invoke(initial_state)
+        # Prices for a list of orders, quoted together
+        if isinstance(body, dict) and body.get('action') == 'quote':
+            try:
+                prices = quote_orders(body.get('orders', []))
+            except ValueError as e:
+                return {
+                    "statusCode": 400,
+                    "body": json.dumps({
+                        "error": "Invalid quote request",
+                        "message": str(e)
+                    }),
+                    "headers": {
+                        "Content-Type": "application/json"
+                    }
+                }
+            return {
+                "statusCode": 200,
+                "body": json.dumps({"prices": prices}),
+                "headers": {
+                    "Content-Type": "application/json"
+                }
+            }
 
-        # Prepare the response
-        response = {
-            "order_id": final_state['order_id'],
-            "status": final_state['order_status'],
-            "total_price": final_state['total_price'],
-            "notes": final_state['notes'],
-            "errors": final_state['errors']
-        }
+        # Servings left per menu item
+        if isinstance(body, dict) and body.get('action') == 'capacity':
+            return {
+                "statusCode": 200,
+                "body": json.dumps({"menu_capacity": menu_capacity_report()}),
+                "headers": {
+                    "Content-Type": "application/json"
+                }
+            }
 
-        # Add delivery/pickup specific information
-        if final_state['order_type'] == 'pickup':
-            response['estimated_pickup_time'] = final_state['estimated_pickup_time'].isoformat() if final_state[
-                'estimated_pickup_time'] else None
-        else:
-            response['estimated_delivery_time'] = final_state['estimated_delivery_time'].isoformat() if final_state[
-                'estimated_delivery_time'] else None
+        # Progress events for clients that asked for text/event-stream. The standard Lambda
+        # runtime buffers the body, run streaming.py behind a streaming proxy for incremental delivery
+        if wants_event_stream(event):
+            return {
+                "statusCode": 200,
+                "body": "".join(format_sse(name, data) for name, data in stream_order_events(body)),
+                "headers": {
+                    "Content-Type": "text/event-stream",
+                    "Cache-Control": "no-cache"
+                }
+            }
+
+        response = process_order(body)
+        log_cache_stats()
 
         return {
             "statusCode": 200,
-            "body": json.dumps(response),
+            "body": dumps(response),
             "headers": {
                 "Content-Type": "application/json"
             }
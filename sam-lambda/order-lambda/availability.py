@@ -0,0 +1,161 @@
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+
+from feasibility import menu_capacity
+from ingredient_index import normalize_ingredient_name
+
+logger = logging.getLogger()
+
+
+class AvailabilityView:
+    """
+    Materialized "what can we make right now" view over the recipe set.
+
+    Holds the stock of every ingredient used by a recipe and, per menu item, how
+    many regular-size servings that stock allows. A change to one ingredient only
+    recomputes the menu items that use it; reading a menu item is a dict lookup.
+    The view is fed by Ingredients stream records (NEW_IMAGE) and by this
+    container's own reservations, and reloaded once it is older than max_age_seconds
+    because stream batches only reach the container that processes them.
+
+    Recipes name ingredients the way the catalog does ('tomato sauce') while the
+    table, and the orders resolved against it, may not ('tomato_sauce'), so the
+    view is keyed on normalize_ingredient_name() of both.
+    """
+
+    def __init__(self, recipes, max_age_seconds=60.0):
+        self.recipes = {}  # menu item -> normalized ingredient -> kg
+        for menu_item, ingredients in recipes.items():
+            normalized = {}
+            for ingredient, required in ingredients.items():
+                key = normalize_ingredient_name(ingredient)
+                normalized[key] = normalized.get(key, 0.0) + required
+            self.recipes[menu_item] = normalized
+        self.max_age_seconds = max_age_seconds
+        self._users = defaultdict(set)  # normalized ingredient -> menu items that use it
+        for menu_item, ingredients in self.recipes.items():
+            for ingredient in ingredients:
+                self._users[ingredient].add(menu_item)
+
+        self._stock = {}
+        self._servings = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def fresh(self):
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at <= self.max_age_seconds
+
+    def load(self, quantities):
+        """Rebuild the whole view from a full inventory snapshot."""
+        stock = dict.fromkeys(self._users, 0.0)
+        for name, quantity in quantities.items():
+            key = normalize_ingredient_name(name)
+            if key in stock:
+                stock[key] += float(quantity or 0)
+        servings = menu_capacity(self.recipes, stock)
+        with self._lock:
+            self._stock = stock
+            self._servings = servings
+            self._loaded_at = time.monotonic()
+
+    def _recompute(self, menu_item):
+        servings = math.inf
+        for ingredient, required in self.recipes[menu_item].items():
+            if required > 0:
+                servings = min(servings, self._stock.get(ingredient, 0.0) / required)
+        self._servings[menu_item] = int(servings) if math.isfinite(servings) else 0
+
+    def set_quantity(self, ingredient, quantity):
+        """
+        Record a new absolute stock level and recompute the dishes using it.
+
+        Returns:
+            list: Menu items whose servings changed
+        """
+        return self._apply({ingredient: float(quantity or 0)}, absolute=True)
+
+    def adjust(self, amounts, decrement):
+        """
+        Apply stock changes made by this container (reservations and releases).
+
+        Args:
+            amounts: Dict of ingredient name to kg
+            decrement: True for a reservation, False for a release
+
+        Returns:
+            list: Menu items whose servings changed
+        """
+        sign = -1.0 if decrement else 1.0
+        return self._apply({ingredient: sign * float(amount) for ingredient, amount in amounts.items()}, absolute=False)
+
+    def _apply(self, changes, absolute):
+        changed = []
+        with self._lock:
+            if self._loaded_at is None:
+                return changed
+            affected = set()
+            for ingredient, value in changes.items():
+                ingredient = normalize_ingredient_name(ingredient)
+                if ingredient not in self._users:
+                    continue
+                self._stock[ingredient] = value if absolute else self._stock.get(ingredient, 0.0) + value
+                affected.update(self._users[ingredient])
+            for menu_item in affected:
+                before = self._servings.get(menu_item)
+                self._recompute(menu_item)
+                if self._servings[menu_item] != before:
+                    changed.append(menu_item)
+        return changed
+
+    def apply_stream_records(self, records):
+        """
+        Update stock from DynamoDB stream records carrying the new item image.
+
+        Returns:
+            list: Menu items whose servings changed
+        """
+        changed = []
+        for record in records:
+            data = record.get('dynamodb', {})
+            name = data.get('Keys', {}).get('IngredientName', {}).get('S')
+            if name is None:
+                continue
+            if record.get('eventName') == 'REMOVE':
+                changed.extend(self.set_quantity(name, 0))
+            elif 'NewImage' in data:
+                changed.extend(self.set_quantity(name, data['NewImage'].get('Quantity', {}).get('N', 0)))
+        if changed:
+            logger.info(f"Availability changed for: {sorted(set(changed))}")
+        return changed
+
+    def servings(self, menu_item):
+        """Servings of the menu item that can still be made, None if it is not in the view."""
+        return self._servings.get(menu_item)
+
+    def quantities(self, ingredient_names):
+        """
+        Stock of the given ingredients from memory.
+
+        Returns:
+            dict or None: Ingredient name to stock, None if any of them is not tracked
+        """
+        keys = {name: normalize_ingredient_name(name) for name in ingredient_names}
+        with self._lock:
+            if any(key not in self._users for key in keys.values()):
+                return None
+            return {name: self._stock.get(key, 0.0) for name, key in keys.items()}
+
+    def menu(self):
+        """
+        Returns:
+            dict: Menu item to {'available': bool, 'servings': int}
+        """
+        with self._lock:
+            return {
+                menu_item: {"available": servings > 0, "servings": servings}
+                for menu_item, servings in self._servings.items()
+            }
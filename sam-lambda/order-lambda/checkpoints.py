@@ -0,0 +1,476 @@
+"""
+Checkpointer for the order graph that stores per-step deltas.
+
+Every channel value of a checkpoint is serialized once and stored as a blob
+addressed by its content hash. A checkpoint row only lists the blob of each
+channel, so a step writes blobs just for the channels whose value actually
+changed and every other channel points at the blob an earlier step wrote.
+The graph's nodes return the whole state, so LangGraph bumps every channel's
+version on every step; the content hash is what keeps unchanged values out.
+
+Rows live in a CheckpointStore under (thread id, key):
+
+    checkpoint#<ns>#<checkpoint id>        checkpoint without values, metadata, blob map
+    blob#<ns>#<channel>#<digest>            one serialized channel value
+    write#<ns>#<checkpoint id>#<task>#<i>   pending writes of a task
+
+DynamoDBCheckpointStore keeps them in a table (hash key ThreadId, range key Key)
+and MemoryCheckpointStore in the process, for local runs and tests.
+
+A blob is only skipped while the store is known to still hold it: the saver
+forgets the blobs of threads the store drops, and with a TTL a blob is written
+again (which refreshes its ExpiresAt) once a fraction of its lifetime is gone. A
+checkpoint row never outlives the blobs it points at.
+"""
+import hashlib
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+logger = logging.getLogger()
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_RETRIES = 5
+BATCH_GET_BASE_DELAY = 0.05
+
+# Blob keys already written by this process, so unchanged values are not written again
+KNOWN_BLOBS_MAX_ENTRIES = 4096
+# With a TTL, a known blob is written again once this share of its lifetime has passed
+BLOB_REFRESH_FRACTION = 0.1
+
+
+def _bytes(value):
+    # boto3 returns Binary attributes wrapped, the memory store plain bytes
+    return getattr(value, 'value', value)
+
+
+def _expires_at(row):
+    expires_at = row.get('ExpiresAt')
+    return int(expires_at) if expires_at is not None else None
+
+
+class CheckpointStore(ABC):
+    """
+    Rows of one thread, addressed by a sort key (see the module docstring).
+
+    ttl_seconds is how long a row is kept after it was written (0: until its thread
+    is deleted). on_evict, when set, is called with every thread the store drops
+    on its own.
+    """
+
+    ttl_seconds = 0
+    on_evict = None
+
+    @abstractmethod
+    def put_items(self, thread_id, items):
+        """Write rows; every row is a dict with its 'Key' and attributes."""
+
+    @abstractmethod
+    def get_item(self, thread_id, key):
+        """The row stored under key, or None."""
+
+    @abstractmethod
+    def get_items(self, thread_id, keys):
+        """
+        Returns:
+            dict: Key to row for every key that exists
+        """
+
+    @abstractmethod
+    def query(self, thread_id, prefix, descending=False, limit=None):
+        """Rows whose key starts with prefix, in key order."""
+
+    @abstractmethod
+    def delete_thread(self, thread_id):
+        """Drop every row of a thread."""
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """
+    Rows in dicts guarded by one lock.
+
+    Args:
+        max_threads: Threads kept; the least recently used thread is dropped beyond it
+    """
+
+    def __init__(self, max_threads=1024):
+        self.max_threads = max_threads
+        self._threads = OrderedDict()  # thread id -> {key: row}
+        self._lock = threading.Lock()
+
+    def _rows(self, thread_id):
+        rows = self._threads.get(thread_id)
+        if rows is not None:
+            self._threads.move_to_end(thread_id)
+        return rows
+
+    def put_items(self, thread_id, items):
+        evicted = []
+        with self._lock:
+            rows = self._rows(thread_id)
+            if rows is None:
+                rows = self._threads[thread_id] = {}
+                while len(self._threads) > self.max_threads:
+                    evicted.append(self._threads.popitem(last=False)[0])
+            for item in items:
+                rows[item['Key']] = dict(item)
+        if self.on_evict is not None:
+            for evicted_thread in evicted:
+                self.on_evict(evicted_thread)
+
+    def get_item(self, thread_id, key):
+        with self._lock:
+            return (self._rows(thread_id) or {}).get(key)
+
+    def get_items(self, thread_id, keys):
+        with self._lock:
+            rows = self._rows(thread_id) or {}
+            return {key: rows[key] for key in keys if key in rows}
+
+    def query(self, thread_id, prefix, descending=False, limit=None):
+        with self._lock:
+            rows = self._rows(thread_id) or {}
+            keys = sorted((key for key in rows if key.startswith(prefix)), reverse=descending)
+            return [rows[key] for key in keys[:limit]]
+
+    def delete_thread(self, thread_id):
+        with self._lock:
+            self._threads.pop(thread_id, None)
+
+
+class DynamoDBCheckpointStore(CheckpointStore):
+    """
+    Rows in a DynamoDB table with hash key ThreadId and range key Key.
+
+    Args:
+        dynamodb: Callable returning the DynamoDB resource, called per request
+        table_name: Checkpoint table
+        ttl_seconds: Rows get an ExpiresAt attribute this far in the future (0 disables)
+    """
+
+    def __init__(self, dynamodb, table_name, ttl_seconds=0):
+        self.dynamodb = dynamodb
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds
+
+    def _table(self):
+        return self.dynamodb().Table(self.table_name)
+
+    def put_items(self, thread_id, items):
+        # Rows may bring their own ExpiresAt (checkpoints expire with their oldest blob)
+        expires_at = {'ExpiresAt': int(time.time() + self.ttl_seconds)} if self.ttl_seconds else {}
+        rows = [{'ThreadId': thread_id, **expires_at, **item} for item in items]
+        table = self._table()
+        if len(rows) == 1:
+            table.put_item(Item=rows[0])
+            return
+        # The batch writer splits into BatchWriteItem calls of 25 and resends unprocessed rows
+        with table.batch_writer() as batch:
+            for row in rows:
+                batch.put_item(Item=row)
+
+    def get_item(self, thread_id, key):
+        response = self._table().get_item(Key={'ThreadId': thread_id, 'Key': key}, ConsistentRead=True)
+        return response.get('Item')
+
+    def get_items(self, thread_id, keys):
+        unique_keys = list(dict.fromkeys(keys))
+        found = {}
+        for start in range(0, len(unique_keys), BATCH_GET_MAX_KEYS):
+            request_items = {
+                self.table_name: {
+                    'Keys': [{'ThreadId': thread_id, 'Key': key} for key in unique_keys[start:start + BATCH_GET_MAX_KEYS]],
+                    'ConsistentRead': True,
+                }
+            }
+            attempt = 0
+            while request_items:
+                response = self.dynamodb().batch_get_item(RequestItems=request_items)
+                for item in response['Responses'].get(self.table_name, []):
+                    found[item['Key']] = item
+
+                request_items = response.get('UnprocessedKeys') or {}
+                if request_items:
+                    attempt += 1
+                    if attempt > BATCH_GET_MAX_RETRIES:
+                        raise RuntimeError(f"Checkpoint rows still unprocessed after {BATCH_GET_MAX_RETRIES} retries")
+                    time.sleep(min(BATCH_GET_BASE_DELAY * 2 ** attempt, 1.0))
+        return found
+
+    def query(self, thread_id, prefix, descending=False, limit=None):
+        query_kwargs = {
+            'KeyConditionExpression': '#thread = :thread AND begins_with(#key, :prefix)',
+            'ExpressionAttributeNames': {'#thread': 'ThreadId', '#key': 'Key'},
+            'ExpressionAttributeValues': {':thread': thread_id, ':prefix': prefix},
+            'ScanIndexForward': not descending,
+            'ConsistentRead': True,
+        }
+        if limit:
+            query_kwargs['Limit'] = limit
+
+        table = self._table()
+        items = []
+        while True:
+            response = table.query(**query_kwargs)
+            items.extend(response['Items'])
+            if 'LastEvaluatedKey' not in response or (limit and len(items) >= limit):
+                return items[:limit] if limit else items
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def delete_thread(self, thread_id):
+        table = self._table()
+        query_kwargs = {
+            'KeyConditionExpression': '#thread = :thread',
+            'ExpressionAttributeNames': {'#thread': 'ThreadId', '#key': 'Key'},
+            'ExpressionAttributeValues': {':thread': thread_id},
+            'ProjectionExpression': '#key',
+        }
+        with table.batch_writer() as batch:
+            while True:
+                response = table.query(**query_kwargs)
+                for item in response['Items']:
+                    batch.delete_item(Key={'ThreadId': thread_id, 'Key': item['Key']})
+                if 'LastEvaluatedKey' not in response:
+                    return
+                query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+class DeltaCheckpointSaver(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer writing content-addressed channel blobs to a CheckpointStore.
+
+    Only the synchronous API is implemented; the order graph runs with invoke/stream.
+    """
+
+    def __init__(self, store, serde=None):
+        super().__init__(serde=serde)
+        self.store = store
+        store.on_evict = self._forget_thread
+        self._known_blobs = OrderedDict()  # (thread id, blob key) -> ExpiresAt or None
+        self._known_lock = threading.Lock()
+
+        self.checkpoints_written = 0
+        self.blobs_written = 0
+        self.blobs_reused = 0
+        self.blobs_refreshed = 0
+
+    @staticmethod
+    def _config(thread_id, checkpoint_ns, checkpoint_id):
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}}
+
+    def _reusable(self, thread_id, key, now):
+        """
+        Returns:
+            tuple: ('reuse' for a blob the store still holds, 'refresh' for one past its
+            refresh point (written again to push its ExpiresAt out), 'new' otherwise;
+            the blob's ExpiresAt when it is reused)
+        """
+        with self._known_lock:
+            if (thread_id, key) not in self._known_blobs:
+                return 'new', None
+            expires_at = self._known_blobs[(thread_id, key)]
+            if expires_at is not None and expires_at - now < self.store.ttl_seconds * (1 - BLOB_REFRESH_FRACTION):
+                return 'refresh', None
+            self._known_blobs.move_to_end((thread_id, key))
+            return 'reuse', expires_at
+
+    def _remember(self, thread_id, expiries):
+        """expiries: blob key -> ExpiresAt (None when the store keeps rows until the thread is deleted)"""
+        with self._known_lock:
+            for key, expires_at in expiries.items():
+                self._known_blobs[(thread_id, key)] = expires_at
+                self._known_blobs.move_to_end((thread_id, key))
+            while len(self._known_blobs) > KNOWN_BLOBS_MAX_ENTRIES:
+                self._known_blobs.popitem(last=False)
+
+    def _forget(self, thread_id, keys):
+        with self._known_lock:
+            for key in keys:
+                self._known_blobs.pop((thread_id, key), None)
+
+    def _forget_thread(self, thread_id):
+        with self._known_lock:
+            for key in [key for key in self._known_blobs if key[0] == thread_id]:
+                del self._known_blobs[key]
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+
+        saved = checkpoint.copy()
+        values = saved.pop("channel_values")
+
+        now = time.time()
+        ttl = self.store.ttl_seconds
+        new_expires_at = int(now + ttl) if ttl else None
+        blob_map = {}
+        new_blobs = []
+        expires_at = new_expires_at
+        for channel, value in values.items():
+            value_type, data = self.serde.dumps_typed(value)
+            digest = hashlib.sha256(value_type.encode('utf-8') + b'\0' + data).hexdigest()[:32]
+            key = f"blob#{checkpoint_ns}#{channel}#{digest}"
+            blob_map[channel] = digest
+            status, blob_expires_at = self._reusable(thread_id, key, now)
+            if status == 'reuse':
+                self.blobs_reused += 1
+                if blob_expires_at is not None:
+                    expires_at = min(expires_at, blob_expires_at)
+                continue
+            if status == 'refresh':
+                self.blobs_refreshed += 1
+            new_blobs.append({'Key': key, 'Type': value_type, 'Value': data})
+
+        checkpoint_type, checkpoint_data = self.serde.dumps_typed(saved)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        row = {
+            'Key': f"checkpoint#{checkpoint_ns}#{checkpoint['id']}",
+            'Type': checkpoint_type,
+            'Value': checkpoint_data,
+            'MetadataType': metadata_type,
+            'Metadata': metadata_data,
+            'Blobs': blob_map,
+        }
+        if parent_id:
+            row['ParentId'] = parent_id
+        if ttl:
+            # The row expires with the oldest blob it points at, never after it
+            row['ExpiresAt'] = expires_at
+
+        # Blobs go first, so a checkpoint row never points at a blob that is not stored yet
+        if new_blobs:
+            self.store.put_items(thread_id, new_blobs)
+            self._remember(thread_id, {blob['Key']: new_expires_at for blob in new_blobs})
+        self.store.put_items(thread_id, [row])
+        self.checkpoints_written += 1
+        self.blobs_written += len(new_blobs)
+
+        return self._config(thread_id, checkpoint_ns, checkpoint['id'])
+
+    def put_writes(self, config, writes, task_id, task_path=''):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, data = self.serde.dumps_typed(value)
+            rows.append({
+                'Key': f"write#{checkpoint_ns}#{checkpoint_id}#{task_id}#{WRITES_IDX_MAP.get(channel, idx)}",
+                'TaskId': task_id,
+                'TaskPath': task_path,
+                'Channel': channel,
+                'Type': value_type,
+                'Value': data,
+            })
+        if rows:
+            self.store.put_items(thread_id, rows)
+
+    def _load(self, thread_id, checkpoint_ns, row):
+        checkpoint_id = row['Key'].rsplit('#', 1)[1]
+        checkpoint = self.serde.loads_typed((row['Type'], _bytes(row['Value'])))
+
+        blob_keys = {channel: f"blob#{checkpoint_ns}#{channel}#{digest}" for channel, digest in row['Blobs'].items()}
+        blobs = self.store.get_items(thread_id, list(blob_keys.values()))
+        missing = [key for key in blob_keys.values() if key not in blobs]
+        if missing:
+            # The next checkpoint writes these blobs again instead of pointing at them
+            self._forget(thread_id, missing)
+            logger.error(f"Checkpoint {checkpoint_id} of thread {thread_id} points at missing blobs: {missing}")
+            raise RuntimeError(f"Checkpoint {checkpoint_id} of thread {thread_id} is missing {len(missing)} channel values")
+
+        self._remember(thread_id, {key: _expires_at(blob) for key, blob in blobs.items()})
+        checkpoint["channel_values"] = {
+            channel: self.serde.loads_typed((blobs[key]['Type'], _bytes(blobs[key]['Value'])))
+            for channel, key in blob_keys.items()
+        }
+
+        writes = self.store.query(thread_id, f"write#{checkpoint_ns}#{checkpoint_id}#")
+        pending_writes = [
+            (write['TaskId'], write['Channel'], self.serde.loads_typed((write['Type'], _bytes(write['Value']))))
+            for write in writes
+        ]
+
+        parent_id = row.get('ParentId')
+        return CheckpointTuple(
+            config=self._config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed((row['MetadataType'], _bytes(row['Metadata']))),
+            parent_config=self._config(thread_id, checkpoint_ns, parent_id) if parent_id else None,
+            pending_writes=pending_writes,
+        )
+
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        if checkpoint_id:
+            row = self.store.get_item(thread_id, f"checkpoint#{checkpoint_ns}#{checkpoint_id}")
+        else:
+            # Checkpoint ids sort by creation time, so the last key is the latest checkpoint
+            rows = self.store.query(thread_id, f"checkpoint#{checkpoint_ns}#", descending=True, limit=1)
+            row = rows[0] if rows else None
+        return self._load(thread_id, checkpoint_ns, row) if row else None
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        if not config:
+            return
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        before_id = get_checkpoint_id(before) if before else None
+
+        returned = 0
+        for row in self.store.query(thread_id, f"checkpoint#{checkpoint_ns}#", descending=True):
+            if before_id and row['Key'].rsplit('#', 1)[1] >= before_id:
+                continue
+            checkpoint_tuple = self._load(thread_id, checkpoint_ns, row)
+            if filter and any(checkpoint_tuple.metadata.get(key) != value for key, value in filter.items()):
+                continue
+            yield checkpoint_tuple
+            returned += 1
+            if limit and returned >= limit:
+                return
+
+    def delete_thread(self, thread_id):
+        self.store.delete_thread(thread_id)
+        self._forget_thread(thread_id)
+
+    def stats(self):
+        return {
+            "checkpoints_written": self.checkpoints_written,
+            "blobs_written": self.blobs_written,
+            "blobs_reused": self.blobs_reused,
+            "blobs_refreshed": self.blobs_refreshed,
+        }
+
+
+def create_checkpointer(kind, dynamodb=None, table_name=None, ttl_seconds=0):
+    """
+    Build the checkpointer named by kind ('dynamodb', 'memory' or 'off').
+
+    Returns:
+        DeltaCheckpointSaver | None: None when checkpointing is off
+    """
+    kind = (kind or 'off').lower()
+    if kind == 'off':
+        return None
+    if kind == 'memory':
+        return DeltaCheckpointSaver(MemoryCheckpointStore())
+    if kind == 'dynamodb':
+        if not table_name:
+            raise ValueError("The DynamoDB checkpointer needs CHECKPOINT_TABLE_NAME")
+        return DeltaCheckpointSaver(DynamoDBCheckpointStore(dynamodb, table_name, ttl_seconds))
+    raise ValueError(f"Unknown checkpointer: {kind}")
@@ -0,0 +1,108 @@
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger()
+
+_UNSET = object()
+
+
+class ColdStartTracker:
+    """
+    Records how long each import and lazily created component took in this container,
+    so cold starts can be broken down and checked against a budget.
+    """
+
+    def __init__(self):
+        self.timings = {}  # component -> milliseconds
+        self.top_level = set()  # components not measured inside another component
+        self.reported = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def measure(self, component):
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._local.depth = depth
+            with self._lock:
+                self.timings[component] = self.timings.get(component, 0.0) + elapsed_ms
+                if depth == 0:
+                    self.top_level.add(component)
+
+    def report(self, budget_ms=None):
+        """
+        Returns:
+            dict: Per-component milliseconds (slowest first), their total and the budget verdict
+        """
+        with self._lock:
+            components = dict(sorted(self.timings.items(), key=lambda item: item[1], reverse=True))
+            # Nested measurements (an import inside a component) are already part of the outer one
+            total_ms = sum(ms for name, ms in components.items() if name in self.top_level)
+        return {
+            "components_ms": {name: round(ms, 2) for name, ms in components.items()},
+            "total_ms": round(total_ms, 2),
+            "budget_ms": budget_ms,
+            "over_budget": budget_ms is not None and total_ms > budget_ms,
+        }
+
+    def log_once(self, budget_ms=None):
+        """Log the report on the first invocation of the container only."""
+        if self.reported:
+            return
+        self.reported = True
+        report = self.report(budget_ms)
+        if report["over_budget"]:
+            logger.warning(f"Cold start over budget: {report}")
+        else:
+            logger.info(f"Cold start report: {report}")
+
+
+cold_start = ColdStartTracker()
+
+
+def lazy_component(component, per_thread=False):
+    """
+    Turn a zero-argument factory into a memoized getter.
+
+    The factory runs on the first call only (thread-safe), its duration is recorded
+    under the component name, and the result is kept for the container's lifetime.
+    With per_thread=True every thread gets its own instance, for objects such as
+    boto3 resources that must not be shared between threads.
+    """
+    def decorator(factory):
+        lock = threading.Lock()
+        local = threading.local()
+        value = _UNSET
+
+        @functools.wraps(factory)
+        def getter():
+            nonlocal value
+            if per_thread:
+                if getattr(local, 'value', _UNSET) is _UNSET:
+                    with cold_start.measure(component):
+                        local.value = factory()
+                return local.value
+            if value is _UNSET:
+                with lock:
+                    if value is _UNSET:
+                        with cold_start.measure(component):
+                            value = factory()
+            return value
+
+        def reset():
+            nonlocal value, local
+            value = _UNSET
+            local = threading.local()
+
+        getter.reset = reset
+        return getter
+
+    return decorator
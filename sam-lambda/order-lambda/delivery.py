@@ -0,0 +1,309 @@
+"""
+Delivery planning from a local zone file, without any network call.
+
+- addresses are geocoded to a delivery zone by postcode or keyword, and cached
+- travel times between the restaurant and every zone are computed once, when the
+  zone file is loaded
+- orders ready within a short window of each other share a driver run
+- an order's ETA is its arrival along the run's route, so a query is a dict lookup
+"""
+import heapq
+import json
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger()
+
+EARTH_RADIUS_KM = 6371.0
+# Index of the restaurant in the travel-time matrix
+RESTAURANT = 0
+
+_NON_WORD = re.compile(r'[^\w]+')
+
+
+def normalize_address(address):
+    """Case-fold, drop punctuation and collapse whitespace: '12 Bedford Ave., 11211' -> '12 bedford ave 11211'."""
+    return ' '.join(_NON_WORD.sub(' ', str(address).casefold()).split())
+
+
+def haversine_km(a, b):
+    """Great-circle distance between two (lat, lon) points."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+class ZoneGeocoder:
+    """
+    Resolves addresses to delivery zones: a postcode listed for a zone wins, then the
+    longest keyword (street or neighbourhood) found in the address, then the default
+    zone. Results are kept in an LRU cache keyed by the normalized address.
+    """
+
+    def __init__(self, zones, default_zone=None, cache_max_entries=4096):
+        self.default_zone = default_zone
+        self.cache_max_entries = cache_max_entries
+        self._postcodes = {}  # postcode -> zone
+        keywords = []
+        for zone, spec in zones.items():
+            for postcode in spec.get('postcodes', []):
+                self._postcodes[normalize_address(postcode).replace(' ', '')] = zone
+            for keyword in spec.get('keywords', []):
+                keywords.append((f" {normalize_address(keyword)} ", zone))
+        self._keywords = sorted(keywords, key=lambda item: len(item[0]), reverse=True)
+
+        self._cache = OrderedDict()  # normalized address -> zone or None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def geocode(self, address):
+        """
+        Returns:
+            str or None: The address's delivery zone, None when no zone matches and there is no default
+        """
+        key = normalize_address(address)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+
+        zone = self._lookup(key)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = zone
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+        return zone
+
+    def _lookup(self, key):
+        # Postcodes usually come last
+        tokens = key.split()
+        for token in reversed(tokens):
+            zone = self._postcodes.get(token)
+            if zone is not None:
+                return zone
+
+        padded = f" {key} "
+        for keyword, zone in self._keywords:
+            if keyword in padded:
+                return zone
+        return self.default_zone
+
+
+class DeliveryPlanner:
+    """
+    Groups delivery orders into driver runs and estimates each order's arrival.
+
+    An order joins an open run (one that has not left yet) when it is ready within
+    batch_window_minutes of the run's first order, the run has room and the run is
+    its driver's latest; among those, the run with the smallest detour wins.
+    Otherwise it starts a run on the driver who is free first. A run leaves when
+    its last order is ready and its driver is back, and visits its zones nearest
+    first. Orders are dropped once delivered, runs once they have left.
+
+    Args:
+        zones: Zone name to {"lat", "lon", "postcodes", "keywords"}
+        restaurant: {"lat", "lon"} of the restaurant
+        average_speed_kmh: Driving speed used for travel times
+        road_factor: Road distance over straight-line distance
+        handoff_minutes: Time spent at each stop
+        batch_window_minutes: How far apart the ready times of one run's orders may be
+        max_orders_per_run: Orders one driver takes at a time
+        drivers: Drivers on shift
+        default_zone: Zone of addresses that match none
+        clock: Current time in seconds since the epoch
+    """
+
+    def __init__(self, zones, restaurant, average_speed_kmh=22.0, road_factor=1.35, handoff_minutes=2.0,
+                 batch_window_minutes=8.0, max_orders_per_run=4, drivers=3, default_zone=None, clock=time.time):
+        self.geocoder = ZoneGeocoder(zones, default_zone)
+        self.handoff_seconds = handoff_minutes * 60
+        self.batch_window_seconds = batch_window_minutes * 60
+        self.max_orders_per_run = max(1, max_orders_per_run)
+        self.clock = clock
+
+        # Travel seconds between every pair of points, the restaurant first
+        self.zone_index = {zone: index + 1 for index, zone in enumerate(zones)}
+        points = [(restaurant['lat'], restaurant['lon'])] + [(spec['lat'], spec['lon']) for spec in zones.values()]
+        seconds_per_km = 3600 / average_speed_kmh
+        self.travel_seconds = [
+            [haversine_km(a, b) * road_factor * seconds_per_km for b in points] for a in points
+        ]
+
+        self._drivers = [{'free_at': 0.0, 'last_run': None} for _ in range(max(1, drivers))]
+        self._runs = []  # runs that have not left yet
+        self._orders = {}  # order id -> {'run', 'zone', 'eta'}
+        self._due = []  # heap of (eta, order id)
+        self._lock = threading.Lock()
+
+        self.runs = 0
+        self.planned = 0
+
+    @classmethod
+    def from_file(cls, path, clock=time.time):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(
+            data['zones'],
+            data['restaurant'],
+            average_speed_kmh=data.get('average_speed_kmh', 22.0),
+            road_factor=data.get('road_factor', 1.35),
+            handoff_minutes=data.get('handoff_minutes', 2.0),
+            batch_window_minutes=data.get('batch_window_minutes', 8.0),
+            max_orders_per_run=data.get('max_orders_per_run', 4),
+            drivers=data.get('drivers', 3),
+            default_zone=data.get('default_zone'),
+            clock=clock,
+        )
+
+    def plan(self, order_id, address, ready_at):
+        """
+        Put an order on a driver run; an order that is already planned is planned again.
+
+        Args:
+            order_id: The order
+            address: The delivery address
+            ready_at: When the kitchen has the order ready (seconds since the epoch)
+
+        Returns:
+            tuple: (estimated arrival in seconds since the epoch, dict with the order's
+            zone, the number of orders on its run and the run's departure)
+
+        Raises:
+            ValueError: When the address is in none of the delivery zones
+        """
+        zone = self.geocoder.geocode(address)
+        if zone is None:
+            raise ValueError(f"Address is outside the delivery zones: {address}")
+        stop = self.zone_index[zone]
+
+        with self._lock:
+            replanned = order_id in self._orders
+            if replanned:
+                self._remove(order_id)
+            self._prune(self.clock())
+
+            run = self._best_run(stop, ready_at)
+            if run is None:
+                driver = min(self._drivers, key=lambda candidate: candidate['free_at'])
+                run = {'driver': driver, 'first_ready': ready_at, 'free_before': driver['free_at'],
+                       'previous': driver['last_run'], 'orders': {}, 'open': True}
+                driver['last_run'] = run
+                self._runs.append(run)
+                self.runs += 1
+
+            run['orders'][order_id] = (zone, stop, ready_at)
+            self._schedule(run)
+            if not replanned:
+                self.planned += 1
+            return self._orders[order_id]['eta'], {
+                "zone": zone, "run_orders": len(run['orders']), "departure": run['departure']}
+
+    def eta(self, order_id):
+        """Estimated arrival of an order, None once it is delivered or when it is unknown."""
+        with self._lock:
+            order = self._orders.get(order_id)
+            return order['eta'] if order else None
+
+    def cancel(self, order_id):
+        """Take an order off its run; the rest of the run is routed again."""
+        with self._lock:
+            if order_id not in self._orders:
+                return False
+            self._remove(order_id)
+        return True
+
+    def _route(self, stops):
+        """Nearest-first visiting order of the stops from the restaurant."""
+        route = []
+        position = RESTAURANT
+        remaining = set(stops)
+        while remaining:
+            position = min(remaining, key=lambda stop: (self.travel_seconds[position][stop], stop))
+            remaining.discard(position)
+            route.append(position)
+        return route
+
+    def _round_trip_seconds(self, stops):
+        position = RESTAURANT
+        total = 0.0
+        for stop in self._route(stops):
+            total += self.travel_seconds[position][stop] + self.handoff_seconds
+            position = stop
+        return total + self.travel_seconds[position][RESTAURANT]
+
+    def _best_run(self, stop, ready_at):
+        best = None
+        best_detour = None
+        for run in self._runs:
+            if (run['driver']['last_run'] is not run or len(run['orders']) >= self.max_orders_per_run
+                    or abs(ready_at - run['first_ready']) > self.batch_window_seconds):
+                continue
+            stops = {order_stop for _, order_stop, _ in run['orders'].values()}
+            detour = self._round_trip_seconds(stops | {stop}) - self._round_trip_seconds(stops)
+            if best is None or detour < best_detour:
+                best, best_detour = run, detour
+        return best
+
+    def _schedule(self, run):
+        """Departure, route and the arrival of every order of a run."""
+        departure = max([run['free_before']] + [ready_at for _, _, ready_at in run['orders'].values()])
+        arrivals = {}
+        position = RESTAURANT
+        now = departure
+        for stop in self._route({stop for _, stop, _ in run['orders'].values()}):
+            now += self.travel_seconds[position][stop]
+            arrivals[stop] = now
+            now += self.handoff_seconds
+            position = stop
+
+        run['departure'] = departure
+        if run['driver']['last_run'] is run:
+            run['driver']['free_at'] = now + self.travel_seconds[position][RESTAURANT]
+        for order_id, (zone, stop, _) in run['orders'].items():
+            self._orders[order_id] = {'run': run, 'zone': zone, 'eta': arrivals[stop]}
+            heapq.heappush(self._due, (arrivals[stop], order_id))
+
+    def _remove(self, order_id):
+        run = self._orders.pop(order_id)['run']
+        if not run['open']:
+            return
+        del run['orders'][order_id]
+        if run['orders']:
+            self._schedule(run)
+            return
+
+        run['open'] = False
+        self._runs = [other for other in self._runs if other is not run]
+        driver = run['driver']
+        if driver['last_run'] is run:
+            driver['free_at'] = run['free_before']
+            driver['last_run'] = run['previous']
+
+    def _prune(self, now):
+        # Runs that left take no more orders; delivered orders are forgotten (the heap may hold stale ETAs)
+        for run in self._runs:
+            run['open'] = run['departure'] > now
+        self._runs = [run for run in self._runs if run['open']]
+        while self._due and self._due[0][0] <= now:
+            eta, order_id = heapq.heappop(self._due)
+            order = self._orders.get(order_id)
+            if order is not None and order['eta'] == eta:
+                del self._orders[order_id]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "orders": len(self._orders),
+                "open_runs": len(self._runs),
+                "runs": self.runs,
+                "mean_orders_per_run": round(self.planned / self.runs, 2) if self.runs else 0.0,
+                "geocode_cache_hits": self.geocoder.hits,
+                "geocode_cache_misses": self.geocoder.misses,
+            }
@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class FeasibilityResult:
+    """Answers for one orders x ingredients check, all computed in the same pass."""
+
+    def __init__(self, ingredients, required, available):
+        self.ingredients = ingredients
+        self.required = required
+        self.available = available
+
+        # Per order and ingredient: how much is missing (0 where there is enough)
+        self.shortfall = np.clip(required - available, 0.0, None)
+        self.feasible = ~(self.shortfall > 0).any(axis=1)
+
+        # How many times each order could be made from the full inventory
+        with np.errstate(divide='ignore', invalid='ignore'):
+            servings = np.where(required > 0, available / required, np.inf)
+        servings = servings.min(axis=1, initial=np.inf)
+        self.max_servings = np.where(np.isfinite(servings), np.floor(servings), 0).astype(np.int64)
+
+    def missing_ingredients(self, order_index):
+        """Every ingredient the order is short of, in column order."""
+        return [self.ingredients[column] for column in np.flatnonzero(self.shortfall[order_index] > 0)]
+
+
+class FeasibilityEngine:
+    """
+    Checks many orders against one inventory with array operations.
+
+    Orders become rows of a requirement matrix (kg per ingredient column) and the
+    inventory a vector over the same columns, so feasibility, every missing
+    ingredient and the number of possible servings come out of a few NumPy
+    operations instead of a Python loop per order.
+    """
+
+    def __init__(self, ingredients):
+        self.ingredients = list(dict.fromkeys(ingredients))
+        self.columns = {name: column for column, name in enumerate(self.ingredients)}
+
+    @classmethod
+    def for_orders(cls, orders):
+        """Engine covering every ingredient used by the given orders."""
+        return cls(name for order in orders for name in order)
+
+    def requirement_matrix(self, orders):
+        """
+        Args:
+            orders: List of dicts mapping ingredient name to required kg (floats)
+
+        Returns:
+            np.ndarray: orders x ingredients matrix of required kg
+        """
+        matrix = np.zeros((len(orders), len(self.ingredients)))
+        for row, order in enumerate(orders):
+            for name, amount in order.items():
+                matrix[row, self.columns[name]] += amount
+        return matrix
+
+    def inventory_vector(self, quantities):
+        """
+        Args:
+            quantities: Dict of ingredient name to stock; missing names and None count as empty
+
+        Returns:
+            np.ndarray: Stock per ingredient column
+        """
+        return np.array([quantities.get(name) or 0.0 for name in self.ingredients], dtype=float)
+
+    def check(self, orders, quantities):
+        """
+        Check every order independently against the same inventory.
+
+        Args:
+            orders: List of dicts mapping ingredient name to required kg (floats)
+            quantities: Dict of ingredient name to stock
+
+        Returns:
+            FeasibilityResult: feasible flags, shortfalls and possible servings per order
+        """
+        return FeasibilityResult(self.ingredients, self.requirement_matrix(orders), self.inventory_vector(quantities))
+
+
+def menu_capacity(recipes, quantities):
+    """
+    How many more of each menu item the inventory allows.
+
+    Args:
+        recipes: Dict of menu item to its ingredients as ingredient name -> kg (floats)
+        quantities: Dict of ingredient name to stock
+
+    Returns:
+        dict: Menu item to the number of servings that can still be made
+    """
+    menu_items = list(recipes)
+    engine = FeasibilityEngine.for_orders(recipes.values())
+    result = engine.check([recipes[item] for item in menu_items], quantities)
+    return dict(zip(menu_items, result.max_servings.tolist()))
@@ -0,0 +1,159 @@
+import json
+import logging
+import re
+from itertools import combinations
+
+logger = logging.getLogger()
+
+_NON_WORD = re.compile(r'[^a-z0-9 ]+')
+_SPACES = re.compile(r'\s+')
+
+
+def _singular(token):
+    """Cheap English singularization, good enough for ingredient names."""
+    if len(token) <= 3:
+        return token
+    if token.endswith('ies'):
+        return token[:-3] + 'y'
+    if token.endswith(('oes', 'ches', 'shes', 'sses', 'xes')):
+        return token[:-2]
+    if token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def normalize_ingredient_name(name):
+    """
+    Normalize an ingredient name for lookups.
+
+    Case-folds, treats underscores and dashes as spaces, drops punctuation,
+    collapses whitespace and singularizes every word:
+    'Tomato_Sauce' -> 'tomato sauce', 'chicken Breasts' -> 'chicken breast'.
+    """
+    text = _NON_WORD.sub(' ', str(name).casefold().replace('_', ' ').replace('-', ' '))
+    return ' '.join(_singular(token) for token in _SPACES.split(text.strip()) if token)
+
+
+def _deletes(word, max_distance):
+    """All strings reachable from word by removing up to max_distance characters."""
+    variants = {word}
+    for distance in range(1, min(max_distance, len(word) - 1) + 1):
+        for positions in combinations(range(len(word)), distance):
+            variants.add(''.join(char for i, char in enumerate(word) if i not in positions))
+    return variants
+
+
+def _edit_distance(a, b, limit):
+    """Optimal string alignment distance, or limit + 1 once it is known to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class IngredientIndex:
+    """
+    Resolves free-form ingredient names to the canonical names stored in the inventory table.
+
+    Built once per container from the table's ingredient names plus a synonym file.
+    Lookups try the normalized name, then known aliases, then a bounded fuzzy match
+    over precomputed delete variants (symmetric delete), so a resolve never touches
+    the database.
+    """
+
+    def __init__(self, max_distance=2):
+        self.max_distance = max_distance
+        self._canonical = {}   # normalized name or alias -> canonical table name
+        self._deletes = {}     # delete variant -> set of normalized keys
+        self._resolved = {}    # memoized raw name -> canonical name or None
+
+    @classmethod
+    def build(cls, ingredient_names, synonyms=None, max_distance=2):
+        """
+        Args:
+            ingredient_names: Names as stored in the inventory table
+            synonyms: Dict of canonical name -> list of aliases
+        """
+        index = cls(max_distance=max_distance)
+        for name in ingredient_names:
+            index.add(name)
+        for canonical, aliases in (synonyms or {}).items():
+            target = index._canonical.get(normalize_ingredient_name(canonical), canonical)
+            for alias in [canonical, *aliases]:
+                index.add(alias, canonical=target)
+        logger.info(f"Ingredient index built with {len(index._canonical)} names")
+        return index
+
+    def add(self, name, canonical=None):
+        """Register a name (and optionally the canonical table name it stands for)."""
+        key = normalize_ingredient_name(name)
+        if not key:
+            return
+        existing = self._canonical.get(key)
+        if existing is not None and existing != (canonical or name):
+            logger.info(f"Ingredient '{name}' normalizes to '{key}', keeping '{existing}'")
+            return
+        self._canonical[key] = canonical or name
+        for variant in _deletes(key, self.max_distance):
+            self._deletes.setdefault(variant, set()).add(key)
+        self._resolved.clear()
+
+    def resolve(self, name):
+        """
+        Returns:
+            str or None: Canonical inventory name, or None if there is no unambiguous match
+        """
+        if name in self._resolved:
+            return self._resolved[name]
+
+        key = normalize_ingredient_name(name)
+        canonical = self._canonical.get(key)
+        if canonical is None and key:
+            canonical = self._fuzzy(key)
+
+        self._resolved[name] = canonical
+        return canonical
+
+    def _fuzzy(self, key):
+        # Short names get a tighter bound so 'ham' does not turn into 'jam'
+        limit = 1 if len(key) < 6 else self.max_distance
+        if len(key) < 4:
+            return None
+
+        candidates = set()
+        for variant in _deletes(key, limit):
+            candidates.update(self._deletes.get(variant, ()))
+
+        best_distance = limit + 1
+        best = set()
+        for candidate in candidates:
+            distance = _edit_distance(key, candidate, limit)
+            if distance < best_distance:
+                best_distance, best = distance, {self._canonical[candidate]}
+            elif distance == best_distance:
+                best.add(self._canonical[candidate])
+
+        if best_distance <= limit and len(best) == 1:
+            return best.pop()
+        return None
+
+
+def load_synonyms(path):
+    """Load the synonym file, a JSON object of canonical name -> list of aliases."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"Ingredient synonym file not found: {path}")
+        return {}
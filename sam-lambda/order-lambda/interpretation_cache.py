@@ -0,0 +1,119 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger()
+
+_NON_WORD = re.compile(r'[^\w\s]+')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_message(message):
+    """Case-fold, drop punctuation and collapse whitespace: 'Large  Pepperoni pizza!' -> 'large pepperoni pizza'."""
+    return _SPACES.sub(' ', _NON_WORD.sub(' ', str(message).casefold())).strip()
+
+
+def interpretation_cache_key(message, prompt_version, model_name):
+    """Cache key for one customer message under a given prompt version and model."""
+    raw = f"{prompt_version}|{model_name}|{normalize_message(message)}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class InterpretationCache:
+    """
+    Two-tier cache of parsed LLM order interpretations.
+
+    The first tier is an in-process LRU with a TTL. The optional second tier is a
+    DynamoDB table shared by all containers (hash key CacheKey, TTL attribute
+    ExpiresAt). Interpretations are stored as JSON so every hit returns a fresh copy.
+    """
+
+    def __init__(self, ttl_seconds=3600.0, max_entries=1024, shared_table_getter=None, shared_ttl_seconds=86400):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.shared_table_getter = shared_table_getter
+        self.shared_ttl_seconds = shared_ttl_seconds
+        self._entries = OrderedDict()  # key -> (interpretation json, stored_at)
+        self._lock = threading.Lock()
+
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns:
+            dict or None: The cached interpretation, or None on a miss
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.local_hits += 1
+                return json.loads(entry[0])
+            if entry is not None:
+                del self._entries[key]
+
+        payload = self._get_shared(key)
+        if payload is not None:
+            self._put_local(key, payload)
+            with self._lock:
+                self.shared_hits += 1
+            return json.loads(payload)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, interpretation):
+        payload = json.dumps(interpretation, sort_keys=True)
+        self._put_local(key, payload)
+        self._put_shared(key, payload)
+
+    def _put_local(self, key, payload):
+        with self._lock:
+            self._entries[key] = (payload, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_shared(self, key):
+        if self.shared_table_getter is None:
+            return None
+        try:
+            item = self.shared_table_getter().get_item(Key={'CacheKey': key}).get('Item')
+        except Exception as e:
+            logger.warning(f"Shared interpretation cache read failed: {str(e)}")
+            return None
+        # DynamoDB deletes expired items lazily, so check the TTL ourselves
+        if not item or int(item.get('ExpiresAt', 0)) < time.time():
+            return None
+        return item['Interpretation']
+
+    def _put_shared(self, key, payload):
+        if self.shared_table_getter is None:
+            return
+        try:
+            self.shared_table_getter().put_item(Item={
+                'CacheKey': key,
+                'Interpretation': payload,
+                'ExpiresAt': int(time.time() + self.shared_ttl_seconds),
+            })
+        except Exception as e:
+            logger.warning(f"Shared interpretation cache write failed: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.local_hits + self.shared_hits + self.misses
+            return {
+                "local_hits": self.local_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "hit_rate": (self.local_hits + self.shared_hits) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger()
+
+
+class InventorySnapshotCache:
+    """
+    In-process snapshot of ingredient quantities for a warm Lambda container.
+
+    Entries expire after ttl_seconds and at most max_entries ingredients are kept
+    (least recently used first out). Change events from the Ingredients table stream
+    invalidate entries early. Stream batches only reach the container that
+    processes them, so the TTL is what bounds staleness everywhere else.
+    """
+
+    def __init__(self, ttl_seconds=30.0, max_entries=512):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # ingredient name -> (quantity, stored_at)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get_many(self, ingredient_names):
+        """
+        Look up several ingredients in the snapshot.
+
+        Args:
+            ingredient_names: Iterable of ingredient names
+
+        Returns:
+            tuple: (dict of cached name -> quantity, list of names that must be fetched)
+        """
+        cached = {}
+        missing = []
+        now = time.monotonic()
+
+        with self._lock:
+            for name in dict.fromkeys(ingredient_names):
+                entry = self._entries.get(name) if self.enabled else None
+                if entry is None:
+                    self.misses += 1
+                    missing.append(name)
+                elif now - entry[1] > self.ttl_seconds:
+                    self.stale += 1
+                    del self._entries[name]
+                    missing.append(name)
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(name)
+                    cached[name] = entry[0]
+
+        return cached, missing
+
+    def put_many(self, quantities):
+        """
+        Store freshly read quantities. A quantity of None records that the
+        ingredient is not in the table.
+        """
+        if not self.enabled:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            for name, quantity in quantities.items():
+                self._entries[name] = (quantity, now)
+                self._entries.move_to_end(name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, ingredient_names=None):
+        """Drop the given ingredients, or the whole snapshot when no names are given."""
+        with self._lock:
+            if ingredient_names is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                return
+            for name in ingredient_names:
+                if self._entries.pop(name, None) is not None:
+                    self.invalidations += 1
+
+    def apply_stream_records(self, records):
+        """
+        Invalidate entries touched by DynamoDB stream records.
+
+        Args:
+            records: The 'Records' list of a DynamoDB stream Lambda event
+
+        Returns:
+            int: Number of ingredient keys seen in the batch
+        """
+        names = []
+        for record in records:
+            keys = record.get('dynamodb', {}).get('Keys', {})
+            name = keys.get('IngredientName', {}).get('S')
+            if name is not None:
+                names.append(name)
+
+        self.invalidate(names)
+        logger.info(f"Inventory cache invalidated {len(names)} ingredient(s) from stream")
+        return len(names)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def is_inventory_stream_event(event):
+    """Return True for a Lambda event delivered by the DynamoDB stream event source mapping."""
+    records = event.get('Records') if isinstance(event, dict) else None
+    return bool(records) and all(record.get('eventSource') == 'aws:dynamodb' for record in records)
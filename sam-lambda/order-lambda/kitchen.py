@@ -0,0 +1,202 @@
+import heapq
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from ingredient_index import normalize_ingredient_name
+
+logger = logging.getLogger()
+
+
+class KitchenScheduler:
+    """
+    Ready times of orders from the load on the kitchen's stations.
+
+    A dish is a sequence of steps, each taking some minutes on one station (prep,
+    oven, fryer). A station works on `capacity` dishes at once; a min-heap holds
+    the time each of its slots frees up, so placing a step is one heap replace,
+    O(log capacity), and a new order's ready time is known as soon as it is
+    scheduled. A second heap per station holds the in-flight jobs by finish time.
+
+    Orders are assumed done at their ready time. complete() reports an order that
+    finished early and cancel() one that was dropped; both replay the orders still
+    waiting from the current time, so their ETAs move up (O(n log capacity) for n
+    orders in the kitchen). The schedule lives in the process, so each container
+    only sees the orders it scheduled itself.
+
+    Args:
+        stations: Station name to the dishes it works on at the same time
+        dishes: Menu item or food type to its steps as [station, minutes] pairs
+        default_steps: Steps of dishes that are not listed
+        clock: Current time in seconds since the epoch
+    """
+
+    def __init__(self, stations, dishes=None, default_steps=None, clock=time.time):
+        self.capacity = {station: max(1, int(capacity)) for station, capacity in stations.items()}
+        self.dishes = {
+            normalize_ingredient_name(dish): self._parse_steps(steps) for dish, steps in (dishes or {}).items()
+        }
+        self.default_steps = self._parse_steps(default_steps or [])
+        self.clock = clock
+
+        self._free_at = {station: [0.0] * capacity for station, capacity in self.capacity.items()}
+        self._jobs = {station: [] for station in self.capacity}  # station -> heap of (finish, order id)
+        self._orders = OrderedDict()  # order id -> {'steps', 'jobs': [(station, start, finish)], 'ready_at'}
+        self._due = []  # heap of (ready_at, order id)
+        self._lock = threading.Lock()
+
+        self.scheduled = 0
+        self.completed = 0
+        self.replays = 0
+
+    @classmethod
+    def from_file(cls, path, clock=time.time):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"Kitchen config not found: {path}")
+            data = {}
+        return cls(data.get('stations', {}), data.get('dishes'), data.get('default'), clock)
+
+    def _parse_steps(self, steps):
+        parsed = []
+        for station, minutes in steps:
+            if station not in self.capacity:
+                raise ValueError(f"Unknown kitchen station: {station}")
+            parsed.append((station, float(minutes) * 60))
+        return parsed
+
+    def steps_for(self, menu_item=None, food_type=None):
+        """Steps of a catalog menu item, else of its food type, else the default steps."""
+        for dish in (menu_item, food_type):
+            if dish:
+                steps = self.dishes.get(normalize_ingredient_name(dish))
+                if steps is not None:
+                    return steps
+        return self.default_steps
+
+    def schedule(self, order_id, menu_item=None, food_type=None):
+        """
+        Queue an order's dish on the stations; a scheduled order is rescheduled.
+
+        Returns:
+            float: The time (seconds since the epoch) the order is expected to be ready
+        """
+        steps = self.steps_for(menu_item, food_type)
+        with self._lock:
+            now = self.clock()
+            if order_id in self._orders:
+                del self._orders[order_id]
+                self._replay(now)
+            else:
+                self._prune(now)
+            ready_at = self._place(order_id, steps, [], now, 0)
+            self.scheduled += 1
+        return ready_at
+
+    def complete(self, order_id):
+        """
+        Mark an order done now; the orders behind it move up.
+
+        Returns:
+            bool: False when the order is not in the kitchen (unknown or already past its ready time)
+        """
+        with self._lock:
+            if order_id not in self._orders:
+                return False
+            del self._orders[order_id]
+            self._replay(self.clock())
+            self.completed += 1
+        return True
+
+    def cancel(self, order_id):
+        """Drop an order from the kitchen; the orders behind it move up."""
+        with self._lock:
+            if order_id not in self._orders:
+                return False
+            del self._orders[order_id]
+            self._replay(self.clock())
+        return True
+
+    def eta(self, order_id):
+        """Current ready time of an order, None once it is out of the kitchen."""
+        with self._lock:
+            self._prune(self.clock())
+            order = self._orders.get(order_id)
+            return order['ready_at'] if order else None
+
+    def _place(self, order_id, steps, jobs, ready, first_step):
+        for station, seconds in steps[first_step:]:
+            slots = self._free_at[station]
+            start = max(slots[0], ready)
+            ready = start + seconds
+            heapq.heapreplace(slots, ready)
+            heapq.heappush(self._jobs[station], (ready, order_id))
+            jobs.append((station, start, ready))
+
+        self._orders[order_id] = {'steps': steps, 'jobs': jobs, 'ready_at': ready}
+        heapq.heappush(self._due, (ready, order_id))
+        return ready
+
+    def _prune(self, now):
+        # Orders past their ready time are done; the heaps may hold stale entries of replayed orders
+        while self._due and self._due[0][0] <= now:
+            ready_at, order_id = heapq.heappop(self._due)
+            order = self._orders.get(order_id)
+            if order is not None and order['ready_at'] == ready_at:
+                del self._orders[order_id]
+        for jobs in self._jobs.values():
+            while jobs and jobs[0][0] <= now:
+                heapq.heappop(jobs)
+
+    def _replay(self, now):
+        """Rebuild the schedule from now: running steps keep their slot, waiting steps are placed again."""
+        self._prune(now)
+        orders = list(self._orders.items())
+        self._orders = OrderedDict()
+        self._due = []
+        self._jobs = {station: [] for station in self.capacity}
+
+        running = {station: [] for station in self.capacity}
+        for order_id, order in orders:
+            for station, start, finish in order['jobs']:
+                if start <= now < finish:
+                    running[station].append(finish)
+                    self._jobs[station].append((finish, order_id))
+        for station, capacity in self.capacity.items():
+            slots = running[station] + [now] * max(0, capacity - len(running[station]))
+            heapq.heapify(slots)
+            self._free_at[station] = slots
+            heapq.heapify(self._jobs[station])
+
+        # Orders keep their place in line; steps that started stay as they are
+        for order_id, order in orders:
+            jobs = [job for job in order['jobs'] if job[1] <= now]
+            ready = max([now] + [finish for _, _, finish in jobs])
+            self._place(order_id, order['steps'], jobs, ready, len(jobs))
+        self.replays += 1
+
+    def load(self):
+        """Per station: dishes in flight and minutes until a slot frees up."""
+        with self._lock:
+            now = self.clock()
+            self._prune(now)
+            return {
+                station: {
+                    "in_flight": len(self._jobs[station]),
+                    "wait_minutes": round(max(0.0, self._free_at[station][0] - now) / 60, 1),
+                }
+                for station in self.capacity
+            }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "orders": len(self._orders),
+                "scheduled": self.scheduled,
+                "completed": self.completed,
+                "replays": self.replays,
+            }
@@ -0,0 +1,183 @@
+import contextvars
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger()
+
+# Metric name -> CloudWatch unit
+UNITS = {
+    'Duration': 'Milliseconds',
+    'DynamoDBCalls': 'Count',
+    'DynamoDBLatency': 'Milliseconds',
+    'ConsumedCapacity': 'Count',
+    'HttpCalls': 'Count',
+    'HttpLatency': 'Milliseconds',
+    'PromptTokens': 'Count',
+    'CompletionTokens': 'Count',
+    'ContextTokensSaved': 'Count',
+}
+
+# The node being executed in this context, its counters collect everything measured inside it
+_current_node = contextvars.ContextVar('current_node', default=None)
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def token_usage(response):
+    """(prompt tokens, completion tokens) from a LangChain chat model response."""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage:
+        return usage.get('input_tokens', 0), usage.get('output_tokens', 0)
+    counts = (getattr(response, 'response_metadata', None) or {}).get('token_usage') or {}
+    return counts.get('prompt_tokens', 0), counts.get('completion_tokens', 0)
+
+
+class MetricsRecorder:
+    """
+    Per-node metrics for the order graph.
+
+    Every wrapped node records its wall time plus the DynamoDB calls, consumed
+    capacity, HTTP calls and LLM tokens made while it ran. In 'emf' mode each node
+    run is written to stdout as one CloudWatch embedded-metric-format line; in
+    'local' mode the values are kept in memory and rollup() returns p50/p99 per
+    node; 'off' records nothing.
+    """
+
+    def __init__(self, mode='emf', namespace='RestaurantOrders', stream=None):
+        self.mode = mode
+        self.namespace = namespace
+        self.stream = stream or sys.stdout
+        self._samples = {}  # node -> metric -> list of values
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.mode in ('emf', 'local')
+
+    def instrument_node(self, name, node):
+        """Wrap a graph node so every run of it is measured under the given node name."""
+        @functools.wraps(node)
+        def wrapper(state, *args, **kwargs):
+            if not self.enabled:
+                return node(state, *args, **kwargs)
+
+            values = dict.fromkeys(UNITS, 0)
+            token = _current_node.set(values)
+            started = time.perf_counter()
+            try:
+                return node(state, *args, **kwargs)
+            finally:
+                values['Duration'] = (time.perf_counter() - started) * 1000
+                _current_node.reset(token)
+                self._record(name, values, state.get('order_id') if isinstance(state, dict) else None)
+
+        return wrapper
+
+    def add(self, metric, value):
+        """Add to a metric of the node running in this context; ignored outside a node."""
+        values = _current_node.get()
+        if values is not None:
+            values[metric] += value
+
+    @contextmanager
+    def http_call(self, target):
+        """Time an outbound HTTP call made by the current node."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.add('HttpCalls', 1)
+            self.add('HttpLatency', elapsed_ms)
+            logger.debug(f"HTTP call to {target} took {elapsed_ms:.1f}ms")
+
+    def record_llm_usage(self, response):
+        prompt_tokens, completion_tokens = token_usage(response)
+        self.add('PromptTokens', prompt_tokens)
+        self.add('CompletionTokens', completion_tokens)
+
+    def instrument_dynamodb(self, client):
+        """
+        Count calls, latency and consumed capacity of a botocore DynamoDB client
+        through its event hooks. Operations that support it are asked for TOTAL capacity.
+        """
+        if not self.enabled:
+            return
+        events = client.meta.events
+        events.register('provide-client-params.dynamodb.*', self._request_capacity)
+        events.register('before-call.dynamodb.*', self._before_call)
+        events.register('after-call.dynamodb.*', self._after_call)
+
+    @staticmethod
+    def _request_capacity(params, model, **kwargs):
+        if 'ReturnConsumedCapacity' in model.input_shape.members:
+            params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+
+    @staticmethod
+    def _before_call(context, **kwargs):
+        context['metrics_started'] = time.perf_counter()
+
+    def _after_call(self, parsed, context, **kwargs):
+        self.add('DynamoDBCalls', 1)
+        if 'metrics_started' in context:
+            self.add('DynamoDBLatency', (time.perf_counter() - context['metrics_started']) * 1000)
+        consumed = parsed.get('ConsumedCapacity') or []
+        if isinstance(consumed, dict):
+            consumed = [consumed]
+        self.add('ConsumedCapacity', sum(float(entry.get('CapacityUnits', 0)) for entry in consumed))
+
+    def _record(self, node, values, order_id):
+        if self.mode == 'local':
+            with self._lock:
+                samples = self._samples.setdefault(node, {})
+                for metric, value in values.items():
+                    samples.setdefault(metric, []).append(value)
+            return
+
+        line = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": self.namespace,
+                    "Dimensions": [["Node"]],
+                    "Metrics": [{"Name": metric, "Unit": unit} for metric, unit in UNITS.items()],
+                }],
+            },
+            "Node": node,
+            "OrderId": order_id,
+            **{metric: round(value, 3) for metric, value in values.items()},
+        }
+        self.stream.write(json.dumps(line) + "\n")
+        self.stream.flush()
+
+    def rollup(self):
+        """
+        Returns:
+            dict: Node -> metric -> count, p50, p99 and mean of the values recorded in local mode
+        """
+        with self._lock:
+            samples = {node: {metric: sorted(values) for metric, values in metrics.items()}
+                       for node, metrics in self._samples.items()}
+        return {
+            node: {
+                metric: {
+                    "count": len(values),
+                    "p50": round(_percentile(values, 0.50), 3),
+                    "p99": round(_percentile(values, 0.99), 3),
+                    "mean": round(sum(values) / len(values), 3),
+                }
+                for metric, values in metrics.items()
+            }
+            for node, metrics in samples.items()
+        }
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
@@ -0,0 +1,84 @@
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:  # local runs without the Lambda requirements
+    orjson = None
+
+
+@dataclass(slots=True)
+class OrderResponse:
+    """
+    Wire schema of a processed order, the body returned for every order.
+
+    Every field is always present; the estimate that does not apply to the order
+    type is null. Field order is the order of the JSON keys.
+    """
+
+    order_id: str
+    status: str
+    order_type: Optional[str] = None
+    total_price: float = 0.0
+    estimated_pickup_time: Optional[datetime] = None
+    estimated_delivery_time: Optional[datetime] = None
+    notes: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+    @classmethod
+    def from_state(cls, state):
+        """Take the response fields straight from the final graph state, without copying the lists."""
+        return cls(
+            order_id=state['order_id'],
+            status=state['order_status'],
+            order_type=state['order_type'],
+            total_price=state['total_price'],
+            estimated_pickup_time=state['estimated_pickup_time'],
+            estimated_delivery_time=state['estimated_delivery_time'],
+            notes=state['notes'],
+            errors=state['errors'],
+        )
+
+    def as_dict(self):
+        """Plain dict for callers that serialize on their own (batch results returned to the runtime)."""
+        return json.loads(dumps(self))
+
+
+ORDER_RESPONSE_FIELDS = OrderResponse.__slots__
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, OrderResponse):
+        return {name: getattr(value, name) for name in ORDER_RESPONSE_FIELDS}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(default=_default, separators=(',', ':'))
+
+
+def _dumps_response(response):
+    # Encodes the slots one by one, so no intermediate dict is built for the response itself
+    return '{' + ','.join(
+        f'"{name}":{_encoder.encode(getattr(response, name))}' for name in ORDER_RESPONSE_FIELDS
+    ) + '}'
+
+
+def dumps(value):
+    """
+    Serialize a response body to a JSON string.
+
+    Handles datetimes (ISO 8601), Decimals from DynamoDB and OrderResponse natively.
+    Uses orjson when it is installed and the standard library otherwise.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_default).decode('utf-8')
+    if isinstance(value, OrderResponse):
+        return _dumps_response(value)
+    return _encoder.encode(value)
@@ -0,0 +1,166 @@
+import json
+import logging
+
+import numpy as np
+
+from ingredient_index import normalize_ingredient_name
+
+logger = logging.getLogger()
+
+
+class PriceTable:
+    """
+    Prices compiled once per container from the pricing file.
+
+    price = base price of the dish (menu item, else food type, else the default)
+            + markup * sum of kg x cost per kg over the order's ingredients,
+    then raised to minimum_price, taxed at tax_rate and rounded to round_to.
+
+    Costs per kg are kept both in a dict, so a single order is priced in one pass
+    over its parsed quantities, and as a vector over ingredient columns, so a batch
+    of orders or the whole menu at every size is priced with one matrix product.
+    Ingredients without a cost are charged default_cost_per_kg.
+    """
+
+    def __init__(self, ingredient_costs, base_prices=None, default_cost_per_kg=0.0, default_base_price=0.0,
+                 markup=1.0, minimum_price=0.0, tax_rate=0.0, round_to=0.01):
+        self.ingredients = list(dict.fromkeys(normalize_ingredient_name(name) for name in ingredient_costs))
+        self.columns = {name: column for column, name in enumerate(self.ingredients)}
+        self._costs = {}  # raw and normalized ingredient name -> cost per kg
+        for name, cost in ingredient_costs.items():
+            self._costs[name] = self._costs[normalize_ingredient_name(name)] = float(cost)
+        # One extra column collects the kg of ingredients without a cost
+        self.cost_vector = np.array(
+            [self._costs[name] for name in self.ingredients] + [default_cost_per_kg], dtype=float)
+
+        self.base_prices = {normalize_ingredient_name(dish): float(price) for dish, price in (base_prices or {}).items()}
+        self.default_cost_per_kg = float(default_cost_per_kg)
+        self.default_base_price = float(default_base_price)
+        self.markup = markup
+        self.minimum_price = minimum_price
+        self.tax_rate = tax_rate
+        self.round_to = round_to
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"Pricing file not found: {path}")
+            data = {}
+        modifiers = data.get('modifiers', {})
+        return cls(
+            data.get('ingredient_cost_per_kg', {}),
+            data.get('base_prices'),
+            default_cost_per_kg=data.get('default_cost_per_kg', 0.0),
+            default_base_price=data.get('default_base_price', 0.0),
+            markup=modifiers.get('markup', 1.0),
+            minimum_price=modifiers.get('minimum_price', 0.0),
+            tax_rate=modifiers.get('tax_rate', 0.0),
+            round_to=modifiers.get('round_to', 0.01),
+        )
+
+    def cost_per_kg(self, ingredient):
+        cost = self._costs.get(ingredient)
+        if cost is None:
+            cost = self._costs.get(normalize_ingredient_name(ingredient), self.default_cost_per_kg)
+        return cost
+
+    def base_price(self, menu_item=None, food_type=None):
+        """Base price of a catalog menu item, else of its food type, else the default."""
+        for dish in (menu_item, food_type):
+            if dish:
+                price = self.base_prices.get(dish)
+                if price is None:
+                    price = self.base_prices.get(normalize_ingredient_name(dish))
+                if price is not None:
+                    return price
+        return self.default_base_price
+
+    def _finish(self, prices):
+        prices = np.maximum(prices, self.minimum_price) * (1 + self.tax_rate)
+        if self.round_to:
+            prices = np.round(prices / self.round_to) * self.round_to
+        return np.round(prices, 2)
+
+    def _finish_one(self, price):
+        # Same steps as _finish without the NumPy overhead of a scalar (both round half to even)
+        price = max(price, self.minimum_price) * (1 + self.tax_rate)
+        if self.round_to:
+            price = round(price / self.round_to) * self.round_to
+        return round(price, 2)
+
+    def price(self, quantities, menu_item=None, food_type=None):
+        """
+        Args:
+            quantities: Dict of ingredient name to kg (floats)
+            menu_item: Catalog menu item of the order, if any
+            food_type: Food type of the order
+
+        Returns:
+            float: The order's price
+        """
+        cost = 0.0
+        for ingredient, kg in quantities.items():
+            cost += self.cost_per_kg(ingredient) * kg
+        return self._finish_one(self.base_price(menu_item, food_type) + self.markup * cost)
+
+    def quantity_matrix(self, orders):
+        """
+        Args:
+            orders: List of dicts mapping ingredient name to kg (floats)
+
+        Returns:
+            np.ndarray: orders x (ingredients + 1) matrix of kg, the last column for ingredients without a cost
+        """
+        other = len(self.ingredients)
+        matrix = np.zeros((len(orders), other + 1))
+        for row, order in enumerate(orders):
+            for name, kg in order.items():
+                column = self.columns.get(name)
+                if column is None:
+                    column = self.columns.get(normalize_ingredient_name(name), other)
+                matrix[row, column] += kg
+        return matrix
+
+    def quote_orders(self, orders, menu_items=None, food_types=None):
+        """
+        Price many orders with one matrix product.
+
+        Args:
+            orders: List of dicts mapping ingredient name to kg (floats)
+            menu_items: Catalog menu item per order (None entries allowed)
+            food_types: Food type per order (None entries allowed)
+
+        Returns:
+            list: Price per order, in order
+        """
+        menu_items = menu_items or [None] * len(orders)
+        food_types = food_types or [None] * len(orders)
+        bases = np.array([self.base_price(item, food_type) for item, food_type in zip(menu_items, food_types)])
+        costs = self.quantity_matrix(orders) @ self.cost_vector
+        return self._finish(bases + self.markup * costs).tolist()
+
+    def quote_menu(self, recipes, food_types=None, sizes=None):
+        """
+        Price every menu item at every size in one pass.
+
+        Args:
+            recipes: Dict of menu item to its regular-size ingredients as name -> kg (floats)
+            food_types: Dict of menu item to its food type
+            sizes: Dict of size name to the factor applied to the ingredients
+
+        Returns:
+            dict: Menu item to {size: price}; a single 'regular' size when no sizes are given
+        """
+        menu_items = list(recipes)
+        sizes = sizes or {'regular': 1.0}
+        food_types = food_types or {}
+        bases = np.array([self.base_price(item, food_types.get(item)) for item in menu_items])
+        costs = self.quantity_matrix([recipes[item] for item in menu_items]) @ self.cost_vector
+        factors = np.array(list(sizes.values()), dtype=float)
+
+        # menu items x sizes: the base stays, the ingredients scale with the size
+        prices = self._finish(bases[:, None] + self.markup * np.outer(costs, factors)).tolist()
+        return {item: dict(zip(sizes, row)) for item, row in zip(menu_items, prices)}
@@ -0,0 +1,111 @@
+import json
+import logging
+
+from ingredient_index import normalize_ingredient_name
+
+logger = logging.getLogger()
+
+# Words that carry no meaning for which dish was ordered
+FILLER_WORDS = frozenset({
+    'i', 'd', 'id', 'im', 'we', 'me', 'my', 'like', 'love', 'want', 'would', 'could', 'can', 'may',
+    'a', 'an', 'the', 'please', 'order', 'get', 'have', 'to', 'some', 'for', 'just', 'thank', 'thanks',
+    'you', 'hi', 'hello', 'hey', 'pick', 'up', 'one', 'single',
+})
+
+# Words that change the recipe or the number of items; orders containing them go to the LLM
+MODIFIER_WORDS = frozenset({
+    'extra', 'no', 'without', 'add', 'plus', 'with', 'and', 'but', 'instead', 'half', 'except',
+    'less', 'more', 'double', 'triple', 'two', 'three', 'four', 'five', 'six', 'dozen', 'also', 'or',
+    'swap', 'remove', 'hold', 'light', 'heavy', 'gluten', 'vegan', 'vegetarian',
+})
+
+
+def _parse_kg(amount):
+    return float(amount.lower().replace('kg', '').strip())
+
+
+def _format_kg(value):
+    return f"{round(value, 3):g}kg"
+
+
+class RecipeCatalog:
+    """
+    Menu items with exact ingredient quantities, matched against customer messages.
+
+    A message matches only when, after dropping filler words and at most one size
+    word, its words are exactly those of one menu item or alias. Anything with a
+    modifier, a number or a second dish is left for the LLM, so a catalog hit is
+    always unambiguous. Lookups are a single dict access on a precomputed key.
+    """
+
+    def __init__(self, recipes, sizes=None):
+        self.recipes = recipes
+        self.sizes = {normalize_ingredient_name(size): factor for size, factor in (sizes or {}).items()}
+        self._by_words = {}  # frozenset of alias words -> menu item
+
+        for menu_item, recipe in recipes.items():
+            for alias in [menu_item, *recipe.get('aliases', [])]:
+                words = frozenset(normalize_ingredient_name(alias).split()) - FILLER_WORDS
+                existing = self._by_words.setdefault(words, menu_item)
+                if existing != menu_item:
+                    logger.warning(f"Catalog alias '{alias}' of '{menu_item}' already used by '{existing}'")
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"Recipe catalog not found: {path}")
+            data = {}
+        return cls(data.get('recipes', {}), data.get('sizes'))
+
+    def requirements(self):
+        """
+        Returns:
+            dict: Menu item to its regular-size ingredients as ingredient name -> kg
+        """
+        return {
+            menu_item: {ingredient: _parse_kg(amount) for ingredient, amount in recipe['ingredients'].items()}
+            for menu_item, recipe in self.recipes.items()
+        }
+
+    def match(self, message):
+        """
+        Args:
+            message: The customer's order text
+
+        Returns:
+            dict or None: 'menu_item', 'size', 'intent', 'food_type', 'ingredients' and
+            'inventory_choice' for an exact catalog hit, None when the LLM should decide
+        """
+        words = normalize_ingredient_name(message).split()
+        if any(word.isdigit() for word in words) or MODIFIER_WORDS.intersection(words):
+            return None
+
+        remaining = set(words) - FILLER_WORDS
+        sizes = remaining.intersection(self.sizes)
+        if len(sizes) > 1:
+            return None
+        remaining -= sizes
+
+        menu_item = self._by_words.get(frozenset(remaining))
+        if menu_item is None:
+            return None
+
+        recipe = self.recipes[menu_item]
+        size = sizes.pop() if sizes else None
+        factor = self.sizes.get(size, 1.0)
+        ingredients = {
+            ingredient: _format_kg(_parse_kg(amount) * factor)
+            for ingredient, amount in recipe['ingredients'].items()
+        }
+
+        return {
+            'menu_item': menu_item,
+            'size': size,
+            'intent': 'order_food',
+            'food_type': recipe['food_type'],
+            'ingredients': ingredients,
+            'inventory_choice': recipe.get('inventory_choice', 'current_restaurant'),
+        }
@@ -0,0 +1,20 @@
+"""
+Render the order graph diagram offline (kept out of the Lambda cold start).
+
+Usage:
+    python render_graph.py [output.png]
+"""
+import sys
+
+from app import get_graph
+
+
+def main(output_path="restaurant_order_flow.png"):
+    img = get_graph().get_graph().draw_mermaid_png()
+    with open(output_path, "wb") as f:
+        f.write(img)
+    print(f"Saved graph diagram to {output_path}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
@@ -0,0 +1,131 @@
+import logging
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers that arrive while it is
+    still running wait for it and get the same result (or exception). Nothing is
+    kept once the call finishes, so this is not a cache.
+    """
+
+    def __init__(self):
+        self._in_flight = {}  # key -> Future
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        """
+        Returns:
+            tuple: (fn's result, True if it came from another caller's in-flight call)
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result(), False
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._in_flight)}
+
+
+class MicroBatcher:
+    """
+    Groups inputs submitted within a short window into one batch call.
+
+    The first input of a window waits window_ms for others to join, or less once
+    max_batch_size inputs are pending, then runs batch_fn over everything pending in
+    batches of at most max_batch_size (inputs can keep arriving while it wakes up).
+    At most max_concurrency batches run at the same time, which caps upstream
+    concurrency. batch_fn receives a list of inputs and returns a list of results
+    in the same order; a result that is an exception is raised to its caller only.
+    """
+
+    def __init__(self, batch_fn, window_ms=10.0, max_batch_size=8, max_concurrency=4):
+        self.batch_fn = batch_fn
+        self.window_seconds = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._pending = []  # (input, Future)
+        self._full = threading.Event()
+        self._lock = threading.Lock()
+
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item):
+        """Add an input to the current window and wait for its result."""
+        future = Future()
+        with self._lock:
+            self._pending.append((item, future))
+            leader = len(self._pending) == 1
+            if len(self._pending) >= self.max_batch_size:
+                self._full.set()
+
+        if leader:
+            self._full.wait(self.window_seconds)
+            while self._flush():
+                pass
+        return future.result()
+
+    def _flush(self):
+        """
+        Run batch_fn over the oldest max_batch_size pending inputs.
+
+        Returns:
+            bool: True when inputs are still pending; the next input submitted
+            after the last flush leads a new window
+        """
+        with self._lock:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            more = bool(self._pending)
+            if len(self._pending) < self.max_batch_size:
+                self._full.clear()
+
+        with self._slots:
+            try:
+                results = self.batch_fn([item for item, _ in batch])
+            except BaseException as e:
+                results = [e] * len(batch)
+
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        return more
+
+    def stats(self):
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            }
@@ -0,0 +1,156 @@
+"""
+Incremental order progress built on the graph's node-by-node stream.
+
+Every finished node becomes one event (interpreted, ingredients_checked, reserved,
+submitted, eta, ...) which can be written as server-sent events or as lines of a
+chunked response. run_server() serves POST /order as a real SSE stream for local
+use or behind a response-streaming proxy such as the Lambda Web Adapter.
+"""
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from order_response import dumps
+
+logger = logging.getLogger()
+
+
+def _interpreted(state):
+    return {
+        "order_id": state['order_id'],
+        "menu_item": state.get('menu_item'),
+        "food_type": state['food_type'],
+        "required_ingredients": state['required_ingredients'],
+    }
+
+
+def _ingredients_checked(state):
+    return {
+        "ingredients_available": state['ingredients_available'],
+        "missing_ingredients": state['missing_ingredients'],
+    }
+
+
+def _reserved(state):
+    return {
+        "reserved_ingredients": state['reserved_ingredients'],
+        "missing_ingredients": state['missing_ingredients'],
+    }
+
+
+def _submitted(state):
+    return {"total_price": state['total_price']}
+
+
+def _order_type(state):
+    return {"order_type": state['order_type']}
+
+
+def _eta(state):
+    return {
+        "order_type": state['order_type'],
+        "estimated_pickup_time": state['estimated_pickup_time'],
+        "estimated_delivery_time": state['estimated_delivery_time'],
+    }
+
+
+# Graph node -> (event name, payload builder)
+NODE_EVENTS = {
+    'match_catalog': ('interpreted', _interpreted),
+    'interpret_order': ('interpreted', _interpreted),
+    'check_ingredients': ('ingredients_checked', _ingredients_checked),
+    'reserve_inventory': ('reserved', _reserved),
+    'submit_order': ('submitted', _submitted),
+    'decide_order_type': ('order_type_decided', _order_type),
+    'calculate_pickup_time': ('eta', _eta),
+    'delivery_order': ('eta', _eta),
+}
+
+
+def iter_order_events(graph, initial_state, build_response, config=None, **stream_kwargs):
+    """
+    Run the order through the graph and yield (event, data) pairs as nodes finish.
+
+    The first event is sent before the graph starts, the last one ('completed')
+    carries the same body the blocking handler returns.
+
+    Args:
+        graph: The compiled order graph
+        initial_state: State from create_initial_state, or a follow-up turn's input
+        build_response: Callable turning the final state into the response body
+        config: Graph config (the checkpoint thread of the order)
+        stream_kwargs: Passed on to graph.stream (durability)
+    """
+    yield 'accepted', {"order_id": initial_state['order_id']}
+
+    final_state = initial_state
+    errors_seen = 0
+    for mode, chunk in graph.stream(initial_state, config, stream_mode=["updates", "values"], **stream_kwargs):
+        if mode == "values":
+            final_state = chunk
+            continue
+
+        for node, state in chunk.items():
+            if node not in NODE_EVENTS or not state:
+                continue
+            # A catalog miss produces nothing to report yet, interpret_order will
+            if node == 'match_catalog' and not state.get('menu_item'):
+                continue
+            event, payload = NODE_EVENTS[node]
+            data = payload(state)
+            data["status"] = state['order_status']
+            if len(state['errors']) > errors_seen:
+                data["errors"] = state['errors'][errors_seen:]
+                errors_seen = len(state['errors'])
+            yield event, data
+
+    yield 'completed', build_response(final_state)
+
+
+def format_sse(event, data):
+    """Encode one event as a server-sent events frame."""
+    return f"event: {event}\ndata: {dumps(data)}\n\n"
+
+
+def wants_event_stream(event):
+    """True when an API Gateway request asks for text/event-stream or ?stream=true."""
+    headers = {key.lower(): value for key, value in (event.get('headers') or {}).items()}
+    query = event.get('queryStringParameters') or {}
+    return 'text/event-stream' in headers.get('accept', '') or str(query.get('stream', '')).lower() == 'true'
+
+
+class OrderStreamHandler(BaseHTTPRequestHandler):
+    """POST /order with the usual JSON body, answered as a chunked SSE stream."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        from app import stream_order_events
+
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        for event, data in stream_order_events(body):
+            frame = format_sse(event, data).encode('utf-8')
+            self.wfile.write(f"{len(frame):X}\r\n".encode('ascii') + frame + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def run_server(host='0.0.0.0', port=8080):
+    server = ThreadingHTTPServer((host, port), OrderStreamHandler)
+    logger.info(f"Streaming order server listening on {host}:{port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    import os
+
+    logging.basicConfig(level=logging.INFO)
+    run_server(port=int(os.environ.get('PORT', '8080')))
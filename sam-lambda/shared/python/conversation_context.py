@@ -0,0 +1,240 @@
+"""
+Token-budgeted conversation context for the interpretation prompt.
+
+Instead of the whole history, the model gets the system prompt, the last few
+turns verbatim and, once the conversation outgrows the token budget, a running
+summary of the older turns. The summary is carried from turn to turn (in the
+graph state), so only turns that newly fell out of the window are folded into
+it, and folds are memoized per process.
+Works with LangChain messages and with {"role", "content"} dicts.
+"""
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+try:
+    import tiktoken
+except ImportError:  # token counts are estimated from the text length
+    tiktoken = None
+
+logger = logging.getLogger()
+
+# Tokens the chat format adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_PREFIX = "Conversation so far (older turns, summarized):"
+
+_ROLES = {'human': 'user', 'ai': 'assistant', 'system': 'system'}
+_encoding = None
+
+
+def _exact_encoding():
+    # tiktoken downloads the encoding on first use, so a failure falls back to the estimate for good
+    global _encoding
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding('cl100k_base')
+        except Exception as e:
+            logger.warning(f"tiktoken encoding unavailable, estimating token counts: {e}")
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text, exact=False):
+    """
+    Tokens in text: about four characters per token, or the cl100k count when exact
+    is set and tiktoken is installed.
+    """
+    if not text:
+        return 0
+    encoding = _exact_encoding() if exact and tiktoken is not None else None
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def _role(message):
+    if isinstance(message, dict):
+        return message.get('role', 'user')
+    return _ROLES.get(getattr(message, 'type', 'human'), 'user')
+
+
+def _content(message):
+    content = message.get('content', '') if isinstance(message, dict) else getattr(message, 'content', '')
+    return content if isinstance(content, str) else json.dumps(content, sort_keys=True, default=str)
+
+
+def message_tokens(message, exact=False):
+    return count_tokens(_content(message), exact) + MESSAGE_OVERHEAD_TOKENS
+
+
+def split_turns(messages):
+    """Group messages into turns, each starting at a user message."""
+    turns = []
+    for message in messages:
+        if _role(message) == 'user' or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return turns
+
+
+def drop_folded_turns(messages, summary, turns_kept):
+    """
+    Keep only the turns fit() sent verbatim, so a stored conversation stops growing.
+
+    Args:
+        messages: The whole conversation passed to fit()
+        summary: The summary fit() returned
+        turns_kept: fit()'s report['turns_kept']
+
+    Returns:
+        tuple: (the kept messages, the summary with folded_turns counted from the first kept turn)
+    """
+    turns = split_turns(messages)
+    first_kept = len(turns) - turns_kept
+    kept = [message for turn in turns[first_kept:] for message in turn]
+    return kept, {**summary, 'folded_turns': max(0, summary['folded_turns'] - first_kept)}
+
+
+def extractive_summary(previous, messages, max_tokens):
+    """
+    Fold messages into the previous summary without a model call: one short line
+    per message, the oldest lines dropped once the summary exceeds max_tokens.
+    """
+    lines = previous.splitlines() if previous else []
+    for message in messages:
+        text = ' '.join(_content(message).split())
+        if len(text) > 200:
+            text = text[:197] + '...'
+        lines.append(f"- {'Customer' if _role(message) == 'user' else 'Restaurant'}: {text}")
+
+    while len(lines) > 1 and count_tokens('\n'.join(lines)) > max_tokens:
+        lines.pop(0)
+    return '\n'.join(lines)
+
+
+class ConversationWindow:
+    """
+    Fits a conversation into a token budget.
+
+    Args:
+        max_tokens: Budget for the system prompt, the summary and the verbatim turns
+        keep_turns: Most recent turns sent verbatim once the whole conversation no longer
+            fits (fewer when they do not fit either)
+        summary_max_tokens: Cap on the running summary
+        summarize: Callable (previous summary, messages to fold, max tokens) -> summary;
+            defaults to extractive_summary
+        cache_max_entries: Memoized folds kept per process
+        exact_tokens: Count tokens with tiktoken instead of estimating them
+    """
+
+    def __init__(self, max_tokens=1500, keep_turns=4, summary_max_tokens=300, summarize=None,
+                 cache_max_entries=256, exact_tokens=False):
+        self.max_tokens = max_tokens
+        self.keep_turns = max(1, keep_turns)
+        self.summary_max_tokens = summary_max_tokens
+        self.summarize = summarize or extractive_summary
+        self.cache_max_entries = cache_max_entries
+        self.exact_tokens = exact_tokens
+        self._folds = OrderedDict()  # hash of (summary, folded messages) -> summary
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.folds = 0
+        self.fold_cache_hits = 0
+        self.tokens_saved = 0
+
+    def _fold(self, previous, messages):
+        key = hashlib.sha256(json.dumps(
+            [previous, [(_role(message), _content(message)) for message in messages]]).encode('utf-8')).hexdigest()
+        with self._lock:
+            if key in self._folds:
+                self._folds.move_to_end(key)
+                self.fold_cache_hits += 1
+                return self._folds[key]
+
+        summary = self.summarize(previous, messages, self.summary_max_tokens)
+        with self._lock:
+            self.folds += 1
+            self._folds[key] = summary
+            while len(self._folds) > self.cache_max_entries:
+                self._folds.popitem(last=False)
+        return summary
+
+    def _summary_message(self, text, like):
+        content = f"{SUMMARY_PREFIX}\n{text}"
+        if isinstance(like, dict):
+            return {"role": "system", "content": content}
+        from langchain_core.messages import SystemMessage
+        return SystemMessage(content=content)
+
+    def fit(self, messages, summary=None, system_prompt=''):
+        """
+        Choose what to send for this turn.
+
+        Args:
+            messages: The whole conversation, oldest first
+            summary: The summary returned by the previous turn's fit(), or None
+            system_prompt: The prompt's system text, counted against the budget
+
+        Returns:
+            tuple: (messages to send, summary to keep for the next turn, report dict with
+            tokens_full, tokens_sent, tokens_saved, turns_kept and turns_summarized)
+        """
+        turns = split_turns(messages)
+        exact = self.exact_tokens
+        system_tokens = count_tokens(system_prompt, exact) + MESSAGE_OVERHEAD_TOKENS if system_prompt else 0
+        turn_tokens = [sum(message_tokens(message, exact) for message in turn) for turn in turns]
+
+        # The summary covers a prefix of the conversation; a shorter conversation is a new one
+        summary = dict(summary) if summary else {'text': '', 'folded_turns': 0}
+        if summary['folded_turns'] > len(turns):
+            summary = {'text': '', 'folded_turns': 0}
+
+        # A conversation that fits is sent whole, summarizing it would not save anything
+        keep = len(turns)
+        if system_tokens + sum(turn_tokens) > self.max_tokens:
+            keep = min(self.keep_turns, len(turns))
+        while True:
+            first_kept = len(turns) - keep
+            if first_kept > summary['folded_turns']:
+                newly_folded = [message for turn in turns[summary['folded_turns']:first_kept] for message in turn]
+                summary = {'text': self._fold(summary['text'], newly_folded), 'folded_turns': first_kept}
+
+            summary_tokens = count_tokens(summary['text'], exact) + MESSAGE_OVERHEAD_TOKENS if summary['text'] else 0
+            total = system_tokens + summary_tokens + sum(turn_tokens[first_kept:])
+            if total <= self.max_tokens or keep <= 1:
+                break
+            keep -= 1
+
+        if total > self.max_tokens:
+            logger.warning(f"Conversation needs {total} tokens even with one verbatim turn, budget is {self.max_tokens}")
+
+        # Turns folded on an earlier call but back inside the window are sent verbatim and in the summary
+        context = [message for turn in turns[len(turns) - keep:] for message in turn]
+        if summary['text'] and messages:
+            context.insert(0, self._summary_message(summary['text'], messages[0]))
+
+        tokens_full = system_tokens + sum(turn_tokens)
+        report = {
+            'tokens_full': tokens_full,
+            'tokens_sent': total,
+            'tokens_saved': max(0, tokens_full - total),
+            'turns_kept': keep,
+            'turns_summarized': len(turns) - keep,
+        }
+        with self._lock:
+            self.calls += 1
+            self.tokens_saved += report['tokens_saved']
+        return context, summary, report
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "folds": self.folds,
+                "fold_cache_hits": self.fold_cache_hits,
+                "tokens_saved": self.tokens_saved,
+            }
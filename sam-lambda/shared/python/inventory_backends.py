@@ -0,0 +1,459 @@
+"""
+Storage engines for ingredient stock and order reservations.
+
+Every engine offers the same operations: batch get, list, reserve and release.
+DynamoDBInventoryBackend is the production store. MemoryInventoryBackend and
+SQLiteInventoryBackend keep everything in the process (or in one SQLite file),
+for benchmarks, tests and single-box deployments without DynamoDB round trips.
+create_inventory_backend picks one by name (the INVENTORY_BACKEND setting).
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger()
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_RETRIES = 5
+BATCH_GET_BASE_DELAY = 0.05
+
+# TransactWriteItems accepts at most 100 actions per transaction
+TRANSACT_MAX_ITEMS = 100
+RESERVATION_MAX_RETRIES = 3
+
+# Stay below SQLite's default limit on host parameters per statement
+SQLITE_MAX_PARAMETERS = 500
+
+
+class InventoryBackend(ABC):
+    """
+    Ingredient stock and the reservations that hold some of it.
+
+    Reservations are keyed by order id: reserving an order that already holds a
+    reservation succeeds without taking stock again, and releasing an order
+    returns its stock once.
+    """
+
+    name = None
+
+    @abstractmethod
+    def batch_get(self, ingredient_names):
+        """
+        Returns:
+            dict: Ingredient name to quantity for every ingredient found
+        """
+
+    @abstractmethod
+    def list_quantities(self):
+        """
+        Returns:
+            dict: Ingredient name to quantity for every ingredient in stock
+        """
+
+    def list_names(self):
+        return list(self.list_quantities())
+
+    @abstractmethod
+    def reserve(self, order_id, amounts):
+        """
+        Take the amounts of every ingredient an order needs, all or nothing.
+
+        Args:
+            order_id: Order the reservation belongs to
+            amounts: Dict with ingredient names as keys and amounts in kg as values
+
+        Returns:
+            tuple: (bool, list) - (True if the order is reserved, ingredients that lacked stock)
+        """
+
+    @abstractmethod
+    def release(self, order_id):
+        """
+        Return the stock held by an order's reservation and drop the reservation.
+
+        Returns:
+            dict | None: The released amounts, or None when nothing was released
+        """
+
+    def close(self):
+        pass
+
+
+class DynamoDBInventoryBackend(InventoryBackend):
+    """
+    Ingredients table keyed on IngredientName and a reservations table keyed on OrderId.
+
+    Args:
+        dynamodb: Callable returning the DynamoDB resource to use; called for every
+            request so each thread can use its own resource
+        table_name: Ingredients table
+        reservations_table_name: Reservations table
+    """
+
+    name = 'dynamodb'
+
+    def __init__(self, dynamodb, table_name, reservations_table_name):
+        self.dynamodb = dynamodb
+        self.table_name = table_name
+        self.reservations_table_name = reservations_table_name
+
+    def batch_get(self, ingredient_names):
+        """
+        Fetch quantities with key-based BatchGetItem calls.
+
+        Keys are de-duplicated, split into pages of BATCH_GET_MAX_KEYS and any
+        UnprocessedKeys are retried with exponential backoff.
+        """
+        unique_names = list(dict.fromkeys(ingredient_names))
+        quantities = {}
+        dynamodb = self.dynamodb()
+
+        for start in range(0, len(unique_names), BATCH_GET_MAX_KEYS):
+            request_items = {
+                self.table_name: {
+                    'Keys': [{'IngredientName': name} for name in unique_names[start:start + BATCH_GET_MAX_KEYS]],
+                    'ProjectionExpression': '#name, #quantity',
+                    'ExpressionAttributeNames': {'#name': 'IngredientName', '#quantity': 'Quantity'},
+                }
+            }
+            attempt = 0
+            while request_items:
+                response = dynamodb.batch_get_item(RequestItems=request_items)
+                for item in response['Responses'].get(self.table_name, []):
+                    quantities[item['IngredientName']] = float(item.get('Quantity', 0))
+
+                request_items = response.get('UnprocessedKeys') or {}
+                if request_items:
+                    attempt += 1
+                    if attempt > BATCH_GET_MAX_RETRIES:
+                        logger.warning(f"Giving up on unprocessed keys after {BATCH_GET_MAX_RETRIES} retries: {request_items}")
+                        break
+                    time.sleep(min(BATCH_GET_BASE_DELAY * 2 ** attempt, 1.0))
+
+        return quantities
+
+    def _scan(self, projection, attribute_names):
+        """Yield every item of the ingredients table with a paginated, projected scan."""
+        table = self.dynamodb().Table(self.table_name)
+        scan_kwargs = {'ProjectionExpression': projection, 'ExpressionAttributeNames': attribute_names}
+        while True:
+            response = table.scan(**scan_kwargs)
+            yield from response['Items']
+            if 'LastEvaluatedKey' not in response:
+                return
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def list_quantities(self):
+        items = self._scan('#name, #quantity', {'#name': 'IngredientName', '#quantity': 'Quantity'})
+        return {item['IngredientName']: float(item.get('Quantity', 0)) for item in items}
+
+    def list_names(self):
+        return [item['IngredientName'] for item in self._scan('#name', {'#name': 'IngredientName'})]
+
+    def _stock_update(self, ingredient_name, amount, decrement):
+        """Build one TransactWriteItems Update that moves an ingredient's stock by amount."""
+        if decrement:
+            update_expression = 'SET #quantity = #quantity - :amount'
+            condition_expression = '#quantity >= :amount'
+        else:
+            update_expression = 'SET #quantity = #quantity + :amount'
+            condition_expression = 'attribute_exists(#quantity)'
+
+        return {
+            'Update': {
+                'TableName': self.table_name,
+                'Key': {'IngredientName': ingredient_name},
+                'UpdateExpression': update_expression,
+                'ConditionExpression': condition_expression,
+                'ExpressionAttributeNames': {'#quantity': 'Quantity'},
+                'ExpressionAttributeValues': {':amount': amount},
+            }
+        }
+
+    def _transact_write(self, transact_items):
+        """
+        Run a TransactWriteItems call, retrying transactions cancelled only by conflicts.
+
+        Returns:
+            list: Cancellation reason codes (one per item) or an empty list on success
+        """
+        for attempt in range(RESERVATION_MAX_RETRIES + 1):
+            try:
+                self.dynamodb().meta.client.transact_write_items(TransactItems=transact_items)
+                return []
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'TransactionCanceledException':
+                    raise
+                codes = [reason.get('Code', 'None') for reason in e.response.get('CancellationReasons', [])]
+                if 'ConditionalCheckFailed' in codes or attempt == RESERVATION_MAX_RETRIES:
+                    return codes
+                logger.info(f"Transaction conflict, retrying (attempt {attempt + 1}): {codes}")
+                time.sleep(BATCH_GET_BASE_DELAY * 2 ** attempt)
+
+    def reserve(self, order_id, amounts):
+        """
+        All decrements and the order's reservation record are written in one
+        conditional transaction, so either the whole order is reserved or nothing is.
+        """
+        if len(amounts) + 1 > TRANSACT_MAX_ITEMS:
+            raise ValueError(f"Cannot reserve more than {TRANSACT_MAX_ITEMS - 1} ingredients in one order")
+
+        ingredient_names = list(amounts)
+        amounts = {name: Decimal(str(amount)) for name, amount in amounts.items()}
+
+        transact_items = [self._stock_update(name, amount, decrement=True) for name, amount in amounts.items()]
+        transact_items.append({
+            'Put': {
+                'TableName': self.reservations_table_name,
+                'Item': {
+                    'OrderId': order_id,
+                    'Ingredients': amounts,
+                    'ReservedAt': datetime.now().isoformat(),
+                },
+                'ConditionExpression': 'attribute_not_exists(OrderId)',
+            }
+        })
+
+        codes = self._transact_write(transact_items)
+        if not codes:
+            return True, []
+
+        if codes[-1] == 'ConditionalCheckFailed':
+            logger.info(f"Order {order_id} already holds a reservation")
+            return True, []
+
+        lost = [name for name, code in zip(ingredient_names, codes) if code == 'ConditionalCheckFailed']
+        logger.warning(f"Reservation for order {order_id} failed: {dict(zip(ingredient_names, codes))}")
+        return False, lost or ingredient_names
+
+    def release(self, order_id):
+        """
+        The reservation record is deleted in the same transaction as the increments,
+        so releasing an order twice only returns its stock once.
+        """
+        reservations = self.dynamodb().Table(self.reservations_table_name)
+        reservation = reservations.get_item(Key={'OrderId': order_id}, ConsistentRead=True).get('Item')
+        if not reservation:
+            return None
+
+        amounts = reservation['Ingredients']
+        transact_items = [self._stock_update(name, amount, decrement=False) for name, amount in amounts.items()]
+        transact_items.append({
+            'Delete': {
+                'TableName': self.reservations_table_name,
+                'Key': {'OrderId': order_id},
+                'ConditionExpression': 'attribute_exists(OrderId)',
+            }
+        })
+
+        codes = self._transact_write(transact_items)
+        if codes:
+            logger.warning(f"Release for order {order_id} failed: {codes}")
+            return None
+        return amounts
+
+
+class MemoryInventoryBackend(InventoryBackend):
+    """
+    Stock and reservations in dicts guarded by one lock; gone when the process exits.
+
+    Args:
+        quantities: Initial ingredient name to quantity
+    """
+
+    name = 'memory'
+
+    def __init__(self, quantities=None):
+        self._stock = {name: float(quantity) for name, quantity in (quantities or {}).items()}
+        self._reservations = {}  # order id -> {ingredient: amount}
+        self._lock = threading.Lock()
+
+    def set_quantities(self, quantities):
+        with self._lock:
+            self._stock.update({name: float(quantity) for name, quantity in quantities.items()})
+
+    def batch_get(self, ingredient_names):
+        with self._lock:
+            return {name: self._stock[name] for name in ingredient_names if name in self._stock}
+
+    def list_quantities(self):
+        with self._lock:
+            return dict(self._stock)
+
+    def reserve(self, order_id, amounts):
+        amounts = {name: float(amount) for name, amount in amounts.items()}
+        with self._lock:
+            if order_id in self._reservations:
+                logger.info(f"Order {order_id} already holds a reservation")
+                return True, []
+            lost = [name for name, amount in amounts.items() if self._stock.get(name, 0.0) < amount]
+            if lost:
+                return False, lost
+            for name, amount in amounts.items():
+                self._stock[name] -= amount
+            self._reservations[order_id] = amounts
+        return True, []
+
+    def release(self, order_id):
+        with self._lock:
+            amounts = self._reservations.get(order_id)
+            if amounts is None:
+                return None
+            if any(name not in self._stock for name in amounts):
+                logger.warning(f"Release for order {order_id} failed: ingredient no longer stocked")
+                return None
+            del self._reservations[order_id]
+            for name, amount in amounts.items():
+                self._stock[name] += amount
+        return amounts
+
+
+class SQLiteInventoryBackend(InventoryBackend):
+    """
+    Stock and reservations in an embedded SQLite database.
+
+    One connection is shared by all threads and serialized by a lock; reserve and
+    release run in IMMEDIATE transactions, so several processes can share a file.
+
+    Args:
+        path: Database file, or ':memory:' for a private in-memory database
+        quantities: Initial ingredient name to quantity, written over existing rows
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path=':memory:', quantities=None):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ':memory:':
+                self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS ingredients (name TEXT PRIMARY KEY, quantity REAL NOT NULL)')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS reservations '
+                '(order_id TEXT PRIMARY KEY, ingredients TEXT NOT NULL, reserved_at TEXT NOT NULL)')
+        if quantities:
+            self.set_quantities(quantities)
+
+    def set_quantities(self, quantities):
+        with self._lock:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO ingredients (name, quantity) VALUES (?, ?)',
+                [(name, float(quantity)) for name, quantity in quantities.items()])
+
+    def batch_get(self, ingredient_names):
+        unique_names = list(dict.fromkeys(ingredient_names))
+        quantities = {}
+        with self._lock:
+            for start in range(0, len(unique_names), SQLITE_MAX_PARAMETERS):
+                page = unique_names[start:start + SQLITE_MAX_PARAMETERS]
+                rows = self._connection.execute(
+                    f"SELECT name, quantity FROM ingredients WHERE name IN ({','.join('?' * len(page))})", page)
+                quantities.update(rows)
+        return quantities
+
+    def list_quantities(self):
+        with self._lock:
+            return dict(self._connection.execute('SELECT name, quantity FROM ingredients'))
+
+    def reserve(self, order_id, amounts):
+        amounts = {name: float(amount) for name, amount in amounts.items()}
+        with self._lock:
+            connection = self._connection
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                if connection.execute('SELECT 1 FROM reservations WHERE order_id = ?', (order_id,)).fetchone():
+                    connection.execute('ROLLBACK')
+                    logger.info(f"Order {order_id} already holds a reservation")
+                    return True, []
+
+                lost = []
+                for name, amount in amounts.items():
+                    updated = connection.execute(
+                        'UPDATE ingredients SET quantity = quantity - ? WHERE name = ? AND quantity >= ?',
+                        (amount, name, amount))
+                    if updated.rowcount == 0:
+                        lost.append(name)
+                if lost:
+                    connection.execute('ROLLBACK')
+                    return False, lost
+
+                connection.execute(
+                    'INSERT INTO reservations (order_id, ingredients, reserved_at) VALUES (?, ?, ?)',
+                    (order_id, json.dumps(amounts), datetime.now().isoformat()))
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+        return True, []
+
+    def release(self, order_id):
+        with self._lock:
+            connection = self._connection
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = connection.execute(
+                    'SELECT ingredients FROM reservations WHERE order_id = ?', (order_id,)).fetchone()
+                if row is None:
+                    connection.execute('ROLLBACK')
+                    return None
+
+                amounts = json.loads(row[0])
+                for name, amount in amounts.items():
+                    updated = connection.execute(
+                        'UPDATE ingredients SET quantity = quantity + ? WHERE name = ?', (amount, name))
+                    if updated.rowcount == 0:
+                        connection.execute('ROLLBACK')
+                        logger.warning(f"Release for order {order_id} failed: {name} no longer stocked")
+                        return None
+                connection.execute('DELETE FROM reservations WHERE order_id = ?', (order_id,))
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+        return amounts
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def load_seed_quantities(path):
+    """
+    Read initial stock for the local engines from a JSON file: either a name -> quantity
+    object or a list of Ingredients table items with IngredientName and Quantity.
+    """
+    with open(path) as f:
+        seed = json.load(f)
+    if isinstance(seed, dict):
+        return seed
+    return {item['IngredientName']: item.get('Quantity', 0) for item in seed}
+
+
+def create_inventory_backend(kind, dynamodb=None, table_name='Ingredients',
+                             reservations_table_name='OrderReservations', sqlite_path=':memory:', seed_path=None):
+    """
+    Build the inventory engine named by kind ('dynamodb', 'memory' or 'sqlite').
+
+    seed_path only applies to the local engines and is loaded into them on creation.
+    """
+    kind = (kind or 'dynamodb').lower()
+    if kind == 'dynamodb':
+        return DynamoDBInventoryBackend(dynamodb, table_name, reservations_table_name)
+
+    quantities = load_seed_quantities(seed_path) if seed_path else None
+    if kind == 'memory':
+        return MemoryInventoryBackend(quantities)
+    if kind == 'sqlite':
+        return SQLiteInventoryBackend(sqlite_path, quantities)
+    raise ValueError(f"Unknown inventory backend: {kind}")
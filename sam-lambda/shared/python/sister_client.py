@@ -0,0 +1,204 @@
+"""
+Client for the sister restaurant inventory API that stays fast when the API is not.
+
+- one pooled requests.Session, reused across warm invocations
+- a deadline on the whole check, hedged request included (requests' own timeout
+  only bounds each connect and read, so requests run on a small thread pool and
+  the caller stops waiting at the deadline)
+- a circuit breaker that answers "not available" at once while the API keeps failing
+- optional hedging: a second request when the first is slower than hedge_after
+- a per-ingredient cache, with a shorter TTL for unavailable ingredients
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger()
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures and stays open for
+    reset_timeout seconds. Then a single trial request is let through (half-open):
+    its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_progress = False
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self.trial_in_progress:
+                self.trial_in_progress = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_in_progress or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self.trial_in_progress:
+                    self.times_opened += 1
+                self.opened_at = time.monotonic()
+                self.trial_in_progress = False
+
+
+class SisterRestaurantClient:
+    """
+    Args:
+        url: Inventory endpoint, POST {"ingredients": [...]} -> {ingredient: bool}
+        deadline: Seconds a check may take in total, hedged request included
+        hedge_after: Seconds after which a second request is sent, None disables hedging
+        positive_ttl: Seconds an available ingredient is cached
+        negative_ttl: Seconds an unavailable ingredient is cached
+        failure_threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds the circuit stays open before a trial request
+        pool_maxsize: Pooled connections to the API
+    """
+
+    def __init__(self, url, deadline=2.0, hedge_after=None, positive_ttl=30.0, negative_ttl=5.0,
+                 failure_threshold=5, reset_timeout=30.0, pool_maxsize=16):
+        self.url = url
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=pool_maxsize, thread_name_prefix='sister')
+
+        self._cache = {}  # ingredient -> (available, expires_at)
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.requests = 0
+        self.hedged = 0
+        self.failures = 0
+        self.short_circuited = 0
+
+    def check(self, ingredients):
+        """
+        Returns:
+            dict: Ingredient name to availability; ingredients the API could not
+            answer for (failure, deadline, open circuit) count as unavailable
+        """
+        result, missing = self._cached(ingredients)
+        if not missing:
+            return result
+
+        if not self.breaker.allow():
+            with self._lock:
+                self.short_circuited += 1
+            return {**result, **{ingredient: False for ingredient in missing}}
+
+        try:
+            answer = self._fetch(missing)
+        except Exception as e:
+            logger.error(f"Error querying sister restaurant API: {e}")
+            self.breaker.record_failure()
+            with self._lock:
+                self.failures += 1
+            return {**result, **{ingredient: False for ingredient in missing}}
+
+        self.breaker.record_success()
+        answer = {ingredient: bool(answer.get(ingredient, False)) for ingredient in missing}
+        self._store(answer)
+        return {**result, **answer}
+
+    def _cached(self, ingredients):
+        found = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for ingredient in dict.fromkeys(ingredients):
+                entry = self._cache.get(ingredient)
+                if entry is not None and entry[1] > now:
+                    found[ingredient] = entry[0]
+                    self.cache_hits += 1
+                else:
+                    missing.append(ingredient)
+        return found, missing
+
+    def _store(self, answer):
+        now = time.monotonic()
+        with self._lock:
+            for ingredient, available in answer.items():
+                ttl = self.positive_ttl if available else self.negative_ttl
+                if ttl > 0:
+                    self._cache[ingredient] = (available, now + ttl)
+
+    def _request(self, ingredients, timeout):
+        with self._lock:
+            self.requests += 1
+        response = self.session.post(self.url, json={"ingredients": ingredients}, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _fetch(self, ingredients):
+        started = time.monotonic()
+        pending = {self._executor.submit(self._request, ingredients, self.deadline)}
+        done = set()
+        if self.hedge_after:
+            done, pending = wait(pending, timeout=self.hedge_after)
+            remaining = self.deadline - (time.monotonic() - started)
+            # No hedge once the deadline is gone; requests rejects a timeout of 0
+            if not done and remaining > 0:
+                with self._lock:
+                    self.hedged += 1
+                pending.add(self._executor.submit(self._request, ingredients, remaining))
+
+        # First successful answer wins; an error only counts once every request has failed
+        error = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                raise error
+            remaining = self.deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                raise TimeoutError(f"Sister restaurant API missed its {self.deadline}s deadline")
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cache_hits": self.cache_hits,
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "failures": self.failures,
+                "short_circuited": self.short_circuited,
+                "circuit": self.breaker.state,
+                "circuit_opened": self.breaker.times_opened,
+            }
@@ -0,0 +1,59 @@
+"""
+Strict schema and minimal prompt for interpreting orders with the model's native
+structured output (function calling or JSON schema) instead of free-form JSON.
+"""
+
+# Strict mode needs every property required and no additional properties, so
+# ingredients are a list of {name, kg} objects rather than a name -> amount map
+INTERPRETATION_SCHEMA = {
+    "title": "order_interpretation",
+    "description": "Interpretation of a restaurant order",
+    "type": "object",
+    "properties": {
+        "intent": {"type": "string"},
+        "food_type": {"type": "string"},
+        "ingredients": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "kg": {"type": "number"},
+                },
+                "required": ["name", "kg"],
+                "additionalProperties": False,
+            },
+        },
+        "inventory_choice": {"type": "string", "enum": ["current_restaurant", "sister_restaurant"]},
+    },
+    "required": ["intent", "food_type", "ingredients", "inventory_choice"],
+    "additionalProperties": False,
+}
+
+# The schema carries the output format, so the prompt only states the rules
+STRUCTURED_SYSTEM_PROMPT = (
+    "Interpret the restaurant order. intent: order_food for food orders. "
+    "ingredients: generic amounts in kg for the order. "
+    "inventory_choice: current_restaurant for pizza or pasta, else sister_restaurant."
+)
+
+
+def to_interpretation(parsed):
+    """
+    Convert a structured reply to the interpretation shape used by the graph.
+
+    An ingredient listed more than once (cheese for the base and extra cheese on top)
+    gets the sum of its amounts.
+
+    Returns:
+        dict: 'intent', 'food_type', 'ingredients' (name -> '<kg>kg') and 'inventory_choice'
+    """
+    kg = {}
+    for ingredient in parsed['ingredients']:
+        kg[ingredient['name']] = kg.get(ingredient['name'], 0.0) + float(ingredient['kg'])
+    return {
+        'intent': parsed['intent'],
+        'food_type': parsed['food_type'],
+        'ingredients': {name: f"{round(amount, 3):g}kg" for name, amount in kg.items()},
+        'inventory_choice': parsed['inventory_choice'],
+    }
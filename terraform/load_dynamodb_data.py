@@ -2,22 +2,35 @@ import boto3
 import json
 from botocore.exceptions import ClientError
 
+# Initial ingredients data
+SEED_INGREDIENTS = [
+    {"name": "cheese", "quantity": 100},
+    {"name": "tomato_sauce", "quantity": 80},
+    {"name": "pepperoni", "quantity": 50},
+    {"name": "mushrooms", "quantity": 40},
+    {"name": "dough", "quantity": 150},
+    {"name": "olives", "quantity": 30}
+]
+
 
 def load_ingredients(table_name, ingredients):
     dynamodb = boto3.resource('dynamodb')
     table = dynamodb.Table(table_name)
 
-    for ingredient in ingredients:
-        try:
-            table.put_item(
-                Item={
-                    'IngredientName': ingredient['name'],
-                    'Quantity': ingredient['quantity']
-                }
-            )
-            print(f"Added ingredient: {ingredient['name']}")
-        except ClientError as e:
-            print(f"Error adding ingredient {ingredient['name']}: {e.response['Error']['Message']}")
+    # batch_writer groups puts into BatchWriteItem calls and resends unprocessed items;
+    # for large files use dynamo-db/bulk-load-inventory.py
+    try:
+        with table.batch_writer(overwrite_by_pkeys=['IngredientName']) as batch:
+            for ingredient in ingredients:
+                batch.put_item(
+                    Item={
+                        'IngredientName': ingredient['name'],
+                        'Quantity': ingredient['quantity']
+                    }
+                )
+        print(f"Added {len(ingredients)} ingredients")
+    except ClientError as e:
+        print(f"Error adding ingredients: {e.response['Error']['Message']}")
 
 
 if __name__ == "__main__":
@@ -30,14 +43,4 @@ if __name__ == "__main__":
         print("terraform.output.json not found. Using default table name.")
         table_name = "Ingredients"
 
-    # Initial ingredients data
-    ingredients = [
-        {"name": "cheese", "quantity": 100},
-        {"name": "tomato_sauce", "quantity": 80},
-        {"name": "pepperoni", "quantity": 50},
-        {"name": "mushrooms", "quantity": 40},
-        {"name": "dough", "quantity": 150},
-        {"name": "olives", "quantity": 30}
-    ]
-
-    load_ingredients(table_name, ingredients)
\ No newline at end of file
+    load_ingredients(table_name, SEED_INGREDIENTS)
\ No newline at end of file
@@ -21,11 +21,30 @@ resource "aws_lambda_function" "restaurant_order" {
   runtime         = "python3.11"
   timeout         = 30
   memory_size     = 256
+  layers          = [aws_lambda_layer_version.shared_modules.arn]
 
   environment {
     variables = {
-      OPENAI_API_KEY_PARAM_NAME = aws_ssm_parameter.openai_api_key.name
-      DYNAMODB_TABLE_NAME       = aws_dynamodb_table.ingredients.name
+      OPENAI_API_KEY_PARAM_NAME         = aws_ssm_parameter.openai_api_key.name
+      DYNAMODB_TABLE_NAME               = aws_dynamodb_table.ingredients.name
+      RESERVATIONS_TABLE_NAME           = aws_dynamodb_table.order_reservations.name
+      INVENTORY_BACKEND                 = "dynamodb"
+      CHECKPOINTER                      = "dynamodb"
+      CHECKPOINT_TABLE_NAME             = aws_dynamodb_table.order_checkpoints.name
+      INTERPRETATION_CACHE_TABLE_NAME   = aws_dynamodb_table.interpretation_cache.name
+      INVENTORY_CACHE_TTL_SECONDS       = "30"
+      INVENTORY_CACHE_MAX_ENTRIES       = "512"
+      COLD_START_BUDGET_MS              = "1500"
+      ORDER_BATCH_CONCURRENCY           = "4"
+      AVAILABILITY_VIEW_MAX_AGE_SECONDS = "60"
+      METRICS_MODE                      = "emf"
+      METRICS_NAMESPACE                 = "RestaurantOrders"
+      LLM_SINGLE_FLIGHT                 = "True"
+      LLM_BATCH_WINDOW_MS               = "0"
+      LLM_MAX_CONCURRENCY               = "4"
+      CONTEXT_MAX_TOKENS                = "1500"
+      CONTEXT_KEEP_TURNS                = "4"
+      CONTEXT_SUMMARY_MAX_TOKENS        = "300"
     }
   }
 
@@ -42,6 +61,21 @@ data "archive_file" "lambda_zip" {
   source_dir  = "${path.module}/lambda"
 }
 
+# Modules shared with the other functions (sam-lambda/shared), on the path at /opt/python
+data "archive_file" "shared_modules_zip" {
+  type        = "zip"
+  output_path = "${path.module}/shared_modules.zip"
+  source_dir  = "${path.module}/../sam-lambda/shared"
+  excludes    = ["python/__pycache__"]
+}
+
+resource "aws_lambda_layer_version" "shared_modules" {
+  layer_name          = "restaurant-shared-modules"
+  filename            = data.archive_file.shared_modules_zip.output_path
+  source_code_hash    = data.archive_file.shared_modules_zip.output_base64sha256
+  compatible_runtimes = ["python3.11"]
+}
+
 # CloudWatch Log Group for Lambda
 resource "aws_cloudwatch_log_group" "lambda_logs" {
   name              = "/aws/lambda/restaurant-order-processor"
@@ -50,10 +84,11 @@ resource "aws_cloudwatch_log_group" "lambda_logs" {
 
 # DynamoDB table
 resource "aws_dynamodb_table" "ingredients" {
-  name           = "Ingredients"
-  billing_mode   = "PAY_PER_REQUEST"
-  hash_key       = "IngredientName"
-  stream_enabled = true
+  name             = "Ingredients"
+  billing_mode     = "PAY_PER_REQUEST"
+  hash_key         = "IngredientName"
+  stream_enabled   = true
+  stream_view_type = "NEW_IMAGE"
 
   attribute {
     name = "IngredientName"
@@ -66,6 +101,101 @@ resource "aws_dynamodb_table" "ingredients" {
   }
 }
 
+# Order reservations, written in the same transaction as the stock decrements
+resource "aws_dynamodb_table" "order_reservations" {
+  name         = "OrderReservations"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "OrderId"
+
+  attribute {
+    name = "OrderId"
+    type = "S"
+  }
+
+  tags = {
+    Environment = var.environment
+    Project     = "Restaurant-Order-System"
+  }
+}
+
+# Shared tier of the LLM interpretation cache, entries expire through DynamoDB TTL
+resource "aws_dynamodb_table" "interpretation_cache" {
+  name         = "InterpretationCache"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "CacheKey"
+
+  attribute {
+    name = "CacheKey"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "ExpiresAt"
+    enabled        = true
+  }
+
+  tags = {
+    Environment = var.environment
+    Project     = "Restaurant-Order-System"
+  }
+}
+
+# Conversation checkpoints of the order graph (per-step deltas), expired through DynamoDB TTL
+resource "aws_dynamodb_table" "order_checkpoints" {
+  name         = "OrderCheckpoints"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "ThreadId"
+  range_key    = "Key"
+
+  attribute {
+    name = "ThreadId"
+    type = "S"
+  }
+
+  attribute {
+    name = "Key"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "ExpiresAt"
+    enabled        = true
+  }
+
+  tags = {
+    Environment = var.environment
+    Project     = "Restaurant-Order-System"
+  }
+}
+
+# Ingredients stream -> Lambda, used to invalidate the warm-container inventory cache
+# and to keep the menu availability view up to date
+resource "aws_lambda_event_source_mapping" "ingredients_stream" {
+  event_source_arn  = aws_dynamodb_table.ingredients.stream_arn
+  function_name     = aws_lambda_function.restaurant_order.arn
+  starting_position = "LATEST"
+  batch_size        = 100
+}
+
+# Queue of orders processed in batches, failed orders are redelivered individually
+resource "aws_sqs_queue" "orders" {
+  name                       = "restaurant-orders"
+  visibility_timeout_seconds = 180
+
+  tags = {
+    Environment = var.environment
+    Project     = "Restaurant-Order-System"
+  }
+}
+
+resource "aws_lambda_event_source_mapping" "orders_queue" {
+  event_source_arn                   = aws_sqs_queue.orders.arn
+  function_name                      = aws_lambda_function.restaurant_order.arn
+  batch_size                         = 10
+  maximum_batching_window_in_seconds = 5
+  function_response_types            = ["ReportBatchItemFailures"]
+}
+
 # SSM Parameter for OpenAI API Key
 resource "aws_ssm_parameter" "openai_api_key" {
   name        = "/restaurant/openai-api-key"
@@ -108,13 +238,39 @@ resource "aws_iam_policy" "lambda_policy" {
         Effect = "Allow"
         Action = [
           "dynamodb:GetItem",
+          "dynamodb:BatchGetItem",
           "dynamodb:PutItem",
+          "dynamodb:BatchWriteItem",
           "dynamodb:UpdateItem",
           "dynamodb:DeleteItem",
           "dynamodb:Scan",
           "dynamodb:Query"
         ]
-        Resource = aws_dynamodb_table.ingredients.arn
+        Resource = [
+          aws_dynamodb_table.ingredients.arn,
+          aws_dynamodb_table.order_reservations.arn,
+          aws_dynamodb_table.interpretation_cache.arn,
+          aws_dynamodb_table.order_checkpoints.arn
+        ]
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:DescribeStream",
+          "dynamodb:GetRecords",
+          "dynamodb:GetShardIterator",
+          "dynamodb:ListStreams"
+        ]
+        Resource = aws_dynamodb_table.ingredients.stream_arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "sqs:ReceiveMessage",
+          "sqs:DeleteMessage",
+          "sqs:GetQueueAttributes"
+        ]
+        Resource = aws_sqs_queue.orders.arn
       },
       {
         Effect = "Allow"
@@ -188,6 +344,13 @@ resource "aws_apigatewayv2_route" "restaurant_order" {
   target    = "integrations/${aws_apigatewayv2_integration.restaurant_order.id}"
 }
 
+resource "aws_apigatewayv2_route" "restaurant_menu" {
+  api_id = aws_apigatewayv2_api.lambda.id
+
+  route_key = "GET /menu"
+  target    = "integrations/${aws_apigatewayv2_integration.restaurant_order.id}"
+}
+
 # CloudWatch Log Group for API Gateway
 resource "aws_cloudwatch_log_group" "api_gw" {
   name = "/aws/api_gw/${aws_apigatewayv2_api.lambda.name}"
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ORDER_LAMBDA_DIR = os.path.join(ROOT, 'sam-lambda', 'order-lambda')
+SHARED_MODULES_DIR = os.path.join(ROOT, 'sam-lambda', 'shared', 'python')
+BENCHMARK_DIR = os.path.join(ROOT, 'benchmarks')
+
+# The Lambda sources import each other as top-level modules, as they do in the deployment package and layer;
+# the benchmarks' fakes stand in for the sister restaurant API and DynamoDB
+for path in (ORDER_LAMBDA_DIR, SHARED_MODULES_DIR, BENCHMARK_DIR, os.path.join(ROOT, 'terraform')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture(scope='session')
+def order_app():
+    """order-lambda's app module on the stub model and the in-memory inventory, checkpoints kept in memory."""
+    from run_benchmarks import INVENTORY, load_order_lambda
+    from stub_model import StubChatModel
+
+    os.environ['CHECKPOINTER'] = 'memory'
+    app = load_order_lambda(None, StubChatModel(), inventory_backend='memory')
+    app.get_inventory_backend().set_quantities({name: 1_000 for name in INVENTORY})
+    return app
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from availability import AvailabilityView
+from conftest import ORDER_LAMBDA_DIR
+from load_dynamodb_data import SEED_INGREDIENTS
+from recipe_catalog import RecipeCatalog
+
+
+@pytest.fixture
+def view():
+    catalog = RecipeCatalog.from_file(os.path.join(ORDER_LAMBDA_DIR, 'recipes.json'))
+    view = AvailabilityView(catalog.requirements())
+    # The Terraform seed names ingredients as the table does: 'tomato_sauce', 'mushrooms'
+    view.load({item['name']: item['quantity'] for item in SEED_INGREDIENTS})
+    return view
+
+
+def test_terraform_seed_makes_pizzas_available(view):
+    menu = view.menu()
+    # Tomato sauce (80kg at 0.1kg a pizza) limits the margherita
+    assert menu['margherita pizza'] == {"available": True, "servings": 600}
+    assert menu['mushroom pizza']['available']
+    assert menu['olive pizza']['available']
+
+
+def test_quantities_accept_table_names(view):
+    assert view.quantities(['tomato_sauce', 'cheese']) == {'tomato_sauce': 80.0, 'cheese': 100.0}
+    assert view.quantities(['tomato sauce']) == {'tomato sauce': 80.0}
+    assert view.quantities(['caviar']) is None
+
+
+def test_adjust_with_table_names_updates_servings(view):
+    changed = view.adjust({'tomato_sauce': 79.95, 'dough': 1.0}, decrement=True)
+    assert 'margherita pizza' in changed
+    assert view.servings('margherita pizza') == 0
+    assert not view.menu()['pepperoni pizza']['available']
+
+    view.adjust({'tomato_sauce': 79.95}, decrement=False)
+    assert view.servings('margherita pizza') == 596
+
+
+def test_stream_records_use_table_names(view):
+    record = {
+        'eventName': 'MODIFY',
+        'dynamodb': {
+            'Keys': {'IngredientName': {'S': 'tomato_sauce'}},
+            'NewImage': {'Quantity': {'N': '0'}},
+        },
+    }
+    assert 'margherita pizza' in view.apply_stream_records([record])
+    assert not view.menu()['margherita pizza']['available']
@@ -0,0 +1,89 @@
+import importlib.util
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import mock
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from conftest import ROOT
+from stub_model import StubChatModel
+
+TEST_LAMBDA_APP = os.path.join(ROOT, 'sam-lambda', 'test-lambda', 'app.py')
+STOCK = {"dough": 10, "tomato sauce": 5, "cheese": 0, "pasta": 3}
+
+
+@pytest.fixture(scope='module')
+def test_app():
+    """test-lambda's app module on moto DynamoDB and SSM, the stub model in place of ChatOpenAI."""
+    with pytest.MonkeyPatch.context() as env, mock_aws():
+        for name, value in {'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing',
+                            'AWS_DEFAULT_REGION': 'us-east-1', 'OPENAI_API_KEY_PARAM_NAME': '/test/openai-api-key',
+                            'USE_DYNAMODB': 'True', 'INVENTORY_FANOUT': 'False', 'INVENTORY_BACKEND': 'dynamodb',
+                            'DYNAMODB_TABLE_NAME': 'Ingredients'}.items():
+            env.setenv(name, value)
+
+        boto3.client('ssm').put_parameter(Name='/test/openai-api-key', Value='test', Type='SecureString')
+        table = boto3.resource('dynamodb').create_table(
+            TableName='Ingredients',
+            KeySchema=[{'AttributeName': 'IngredientName', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'IngredientName', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST',
+        )
+        for name, quantity in STOCK.items():
+            table.put_item(Item={'IngredientName': name, 'Quantity': Decimal(quantity)})
+
+        spec = importlib.util.spec_from_file_location('test_lambda_app', TEST_LAMBDA_APP)
+        module = importlib.util.module_from_spec(spec)
+        with mock.patch('langchain_openai.ChatOpenAI', return_value=StubChatModel()):
+            spec.loader.exec_module(module)
+        yield module
+
+
+def sqs_event(messages):
+    return {'Records': [{'eventSource': 'aws:sqs', 'messageId': f"msg-{i}", 'body': json.dumps({'message': message})}
+                        for i, message in enumerate(messages)]}
+
+
+def test_batch_orders_share_one_inventory_snapshot(test_app):
+    messages = [f"one margherita pizza number {i}" for i in range(6)] + ["spaghetti pomodoro"]
+    with mock.patch.object(test_app, 'load_inventory_snapshot', wraps=test_app.load_inventory_snapshot) as snapshot, \
+            mock.patch.object(test_app, 'batch_get_ingredient_quantities') as batch_get:
+        response = test_app.lambda_handler(sqs_event(messages), None)
+
+    assert response['batchItemFailures'] == []
+    assert [result['status'] for result in response['results']] == ['processed'] * len(messages)
+    assert snapshot.call_count == 1
+    batch_get.assert_not_called()
+    # Quantities come from the snapshot: cheese is listed but out of stock
+    pizza = response['results'][0]['message']
+    assert "dough: amount remaining: 10.0" in pizza and "cheese: amount remaining: None" in pizza
+    assert "pasta: amount remaining: 3.0" in response['results'][-1]['message']
+    assert test_app.inventory_snapshot is None
+
+
+def test_failed_orders_are_reported_on_their_own(test_app):
+    process_message = test_app.process_message
+
+    def fail_on_burnt(message):
+        if 'burnt' in message:
+            raise RuntimeError("kitchen on fire")
+        return process_message(message)
+
+    with mock.patch.object(test_app, 'process_message', side_effect=fail_on_burnt):
+        response = test_app.lambda_handler(sqs_event(["one pizza", "a burnt pizza", "one pasta"]), None)
+
+    assert response['batchItemFailures'] == [{'itemIdentifier': 'msg-1'}]
+    assert [result['status'] for result in response['results']] == ['processed', 'failed', 'processed']
+
+
+def test_each_thread_gets_its_own_dynamodb_resource(test_app):
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first, second = pool.map(lambda _: (test_app.get_dynamodb(), test_app.get_dynamodb()), range(2))
+
+    assert first[0] is first[1]
+    # Both tasks may land on one worker, but never two threads on one resource
+    assert test_app.get_dynamodb() is not first[0]
@@ -0,0 +1,132 @@
+import time
+from types import SimpleNamespace
+from typing import TypedDict
+
+import boto3
+import pytest
+from langgraph.graph import END, START, StateGraph
+from moto import mock_aws
+
+import checkpoints
+from checkpoints import DeltaCheckpointSaver, DynamoDBCheckpointStore, MemoryCheckpointStore
+
+
+class TurnState(TypedDict):
+    messages: list
+    turns: int
+    menu: dict
+
+
+def take_turn(state):
+    return {"messages": state['messages'] + [f"turn {state['turns']}"], "turns": state['turns'] + 1,
+            "menu": state['menu']}
+
+
+def order_graph(saver):
+    builder = StateGraph(TurnState)
+    builder.add_node("take_turn", take_turn)
+    builder.add_edge(START, "take_turn")
+    builder.add_edge("take_turn", END)
+    return builder.compile(checkpointer=saver)
+
+
+def start(graph, thread_id):
+    config = {"configurable": {"thread_id": thread_id}}
+    graph.invoke({"messages": [], "turns": 0, "menu": {"margherita pizza": 6.0}}, config)
+    return config
+
+
+@pytest.fixture
+def dynamodb(monkeypatch):
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        monkeypatch.setenv(name, 'testing')
+    with mock_aws():
+        resource = boto3.resource('dynamodb', region_name='us-east-1')
+        resource.create_table(
+            TableName='OrderCheckpoints',
+            KeySchema=[{'AttributeName': 'ThreadId', 'KeyType': 'HASH'}, {'AttributeName': 'Key', 'KeyType': 'RANGE'}],
+            AttributeDefinitions=[{'AttributeName': 'ThreadId', 'AttributeType': 'S'},
+                                  {'AttributeName': 'Key', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST',
+        )
+        yield resource
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """checkpoints' wall clock, moved forward by the test."""
+    now = SimpleNamespace(value=time.time())
+    monkeypatch.setattr(checkpoints, 'time', SimpleNamespace(time=lambda: now.value, sleep=time.sleep))
+    return now
+
+
+def test_memory_round_trip_reuses_unchanged_values():
+    saver = DeltaCheckpointSaver(MemoryCheckpointStore())
+    graph = order_graph(saver)
+    config = start(graph, 'order-1')
+    graph.invoke({"messages": ["and a coke"]}, config)
+
+    assert graph.get_state(config).values == {
+        "messages": ["and a coke", "turn 1"], "turns": 2, "menu": {"margherita pizza": 6.0}}
+    assert saver.stats()['blobs_reused'] > 0
+
+
+def test_dynamodb_round_trip(dynamodb):
+    saver = DeltaCheckpointSaver(DynamoDBCheckpointStore(lambda: dynamodb, 'OrderCheckpoints', ttl_seconds=3600))
+    graph = order_graph(saver)
+    config = start(graph, 'order-2')
+
+    assert graph.get_state(config).values['messages'] == ["turn 0"]
+    # A second saver (another container) reads the same checkpoint
+    other = order_graph(DeltaCheckpointSaver(DynamoDBCheckpointStore(lambda: dynamodb, 'OrderCheckpoints')))
+    assert other.get_state(config).values['turns'] == 1
+
+    saver.delete_thread('order-2')
+    assert graph.get_state(config).values == {}
+
+
+def test_blobs_of_evicted_threads_are_written_again():
+    saver = DeltaCheckpointSaver(MemoryCheckpointStore(max_threads=1))
+    graph = order_graph(saver)
+    first = start(graph, 'order-a')
+    start(graph, 'order-b')  # drops order-a from the store
+
+    # order-a starts over with the same values; its checkpoint must not point at the dropped blobs
+    start(graph, 'order-a')
+    assert graph.get_state(first).values['messages'] == ["turn 0"]
+
+
+def test_missing_blob_raises():
+    store = MemoryCheckpointStore()
+    graph = order_graph(DeltaCheckpointSaver(store))
+    config = start(graph, 'order-3')
+    rows = store._threads['order-3']
+    del rows[next(key for key in rows if key.startswith('blob#') and '#menu#' in key)]
+
+    with pytest.raises(RuntimeError, match="missing"):
+        graph.get_state(config)
+
+
+def test_reused_blobs_are_refreshed_before_they_expire(dynamodb, clock):
+    store = DynamoDBCheckpointStore(lambda: dynamodb, 'OrderCheckpoints', ttl_seconds=1000)
+    saver = DeltaCheckpointSaver(store)
+    graph = order_graph(saver)
+    config = start(graph, 'order-4')
+    menu_key = next(key for (thread_id, key) in saver._known_blobs if '#menu#' in key)
+    written_at = int(dynamodb.Table('OrderCheckpoints').get_item(
+        Key={'ThreadId': 'order-4', 'Key': menu_key})['Item']['ExpiresAt'])
+
+    # Shortly after, the unchanged menu is reused and the checkpoint expires with it
+    clock.value += 10
+    graph.invoke({"messages": []}, config)
+    assert saver.stats()['blobs_refreshed'] == 0
+    latest = store.query('order-4', 'checkpoint##', descending=True, limit=1)[0]
+    assert int(latest['ExpiresAt']) == written_at
+
+    # Past the refresh point the menu blob is written again with a later ExpiresAt
+    clock.value += 200
+    graph.invoke({"messages": []}, config)
+    assert saver.stats()['blobs_refreshed'] > 0
+    refreshed = dynamodb.Table('OrderCheckpoints').get_item(Key={'ThreadId': 'order-4', 'Key': menu_key})['Item']
+    assert int(refreshed['ExpiresAt']) > written_at
+    assert graph.get_state(config).values['menu'] == {"margherita pizza": 6.0}
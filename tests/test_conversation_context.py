@@ -0,0 +1,89 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from conversation_context import (SUMMARY_PREFIX, ConversationWindow, count_tokens, drop_folded_turns,
+                                  extractive_summary, split_turns)
+
+
+def conversation(turns):
+    """User/assistant pairs of about 13 estimated tokens a message, overhead included."""
+    messages = []
+    for turn in range(turns):
+        messages.append({"role": "user", "content": f"customer message number {turn:02d}"})
+        messages.append({"role": "assistant", "content": f"restaurant reply number {turn:02d}"})
+    return messages
+
+
+def test_turns_start_at_user_messages():
+    messages = [{"role": "system", "content": "s"}, *conversation(2), {"role": "user", "content": "u"}]
+    assert [len(turn) for turn in split_turns(messages)] == [1, 2, 2, 1]
+
+
+def test_conversation_that_fits_is_sent_whole():
+    messages = conversation(3)
+    context, summary, report = ConversationWindow(max_tokens=1000).fit(messages)
+
+    assert context == messages
+    assert summary == {'text': '', 'folded_turns': 0}
+    assert report['turns_summarized'] == 0 and report['tokens_saved'] == 0
+
+
+def test_older_turns_are_folded_into_the_summary():
+    window = ConversationWindow(max_tokens=100, keep_turns=2, summary_max_tokens=30)
+    messages = conversation(6)
+    context, summary, report = window.fit(messages)
+
+    assert context[0]['role'] == 'system' and context[0]['content'].startswith(SUMMARY_PREFIX)
+    assert context[1:] == messages[-4:]
+    assert summary['folded_turns'] == 4
+    assert summary['text'].endswith("- Restaurant: restaurant reply number 03")
+    assert (report['turns_kept'], report['turns_summarized']) == (2, 4)
+    assert report['tokens_sent'] <= 100 < report['tokens_full']
+
+
+def test_summary_is_carried_to_the_next_turn():
+    window = ConversationWindow(max_tokens=100, keep_turns=2, summary_max_tokens=30)
+    _, first, _ = window.fit(conversation(6))
+    _, second, _ = window.fit(conversation(7), first)
+
+    # Only the turns that newly left the window are folded, on top of the earlier summary
+    assert (first['folded_turns'], second['folded_turns']) == (4, 5)
+    assert second['text'].endswith("- Restaurant: restaurant reply number 04")
+
+    # The same folds again are served from the memo
+    folds = window.stats()['folds']
+    assert window.fit(conversation(7), first)[1] == second
+    assert window.stats()['folds'] == folds and window.stats()['fold_cache_hits'] >= 1
+
+
+def test_shorter_conversation_starts_a_new_summary():
+    window = ConversationWindow(max_tokens=1000)
+    _, summary, _ = window.fit(conversation(2), {'text': "- Customer: old", 'folded_turns': 5})
+    assert summary == {'text': '', 'folded_turns': 0}
+
+
+def test_langchain_messages_get_a_system_message_summary():
+    messages = [HumanMessage(content="x" * 200), AIMessage(content="y" * 200), HumanMessage(content="z")]
+    context, _, _ = ConversationWindow(max_tokens=80, keep_turns=1).fit(messages)
+
+    assert isinstance(context[0], SystemMessage) and "Customer: xxx" in context[0].content
+    assert context[1:] == [messages[-1]]
+
+
+def test_summary_keeps_the_newest_lines_within_its_cap():
+    summary = extractive_summary("- Customer: first", conversation(10), max_tokens=60)
+
+    assert count_tokens(summary) <= 60
+    assert summary.splitlines()[-1] == "- Restaurant: restaurant reply number 09"
+    assert "first" not in summary
+
+
+def test_drop_folded_turns_keeps_what_was_sent_verbatim():
+    messages = conversation(6)
+    window = ConversationWindow(max_tokens=100, keep_turns=2, summary_max_tokens=30)
+    _, summary, report = window.fit(messages)
+
+    kept, trimmed = drop_folded_turns(messages, summary, report['turns_kept'])
+    assert kept == messages[-4:]
+    assert trimmed == {'text': summary['text'], 'folded_turns': 0}
+    # Fitting the kept turns again sends the same context
+    assert window.fit(kept, trimmed)[0] == window.fit(messages, summary)[0]
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from conftest import ORDER_LAMBDA_DIR
+from delivery import DeliveryPlanner
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def planner():
+    return DeliveryPlanner.from_file(os.path.join(ORDER_LAMBDA_DIR, 'delivery_zones.json'), clock=lambda: NOW)
+
+
+def test_orders_ready_together_share_a_run(planner):
+    first_eta, first = planner.plan("a", "12 Bedford Ave, 11211", NOW + 600)
+    _, second = planner.plan("b", "100 Delancey St", NOW + 660)
+
+    assert first["zone"] == "williamsburg" and second["zone"] == "lower east side"
+    assert second["run_orders"] == 2
+    assert second["departure"] == NOW + 660
+    # Lower East Side is nearer, so it is visited first and Williamsburg waits behind it
+    assert planner.eta("a") > first_eta
+    assert planner.eta("b") < planner.eta("a")
+    assert planner.stats()["runs"] == 1
+
+
+def test_orders_ready_apart_take_separate_runs(planner):
+    planner.plan("a", "Tompkins Square, 10009", NOW + 600)
+    _, later = planner.plan("b", "St Marks Place", NOW + 600 + 30 * 60)
+
+    assert later["run_orders"] == 1
+    assert planner.stats()["runs"] == 2
+
+
+def test_cancel_reroutes_the_rest_of_the_run(planner):
+    planner.plan("a", "12 Bedford Ave, 11211", NOW + 600)
+    planner.plan("b", "100 Delancey St", NOW + 660)
+    alone_eta, _ = DeliveryPlanner.from_file(
+        os.path.join(ORDER_LAMBDA_DIR, 'delivery_zones.json'), clock=lambda: NOW).plan("a", "12 Bedford Ave, 11211", NOW + 600)
+
+    assert planner.cancel("b")
+    assert planner.eta("b") is None
+    assert planner.eta("a") == pytest.approx(alone_eta)
+    assert not planner.cancel("b")
+
+
+def test_address_outside_the_zones(planner):
+    with pytest.raises(ValueError, match="outside the delivery zones"):
+        planner.plan("a", "1 Main St, Springfield", NOW + 600)
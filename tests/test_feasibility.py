@@ -0,0 +1,37 @@
+import pytest
+
+from feasibility import FeasibilityEngine, menu_capacity
+
+MARGHERITA = {"dough": 0.25, "tomato sauce": 0.1, "cheese": 0.15}
+OLIVE = {**MARGHERITA, "olives": 0.05}
+STOCK = {"dough": 1.0, "tomato sauce": 0.35, "cheese": 3.0, "olives": None}
+
+
+def test_each_order_is_checked_against_the_same_stock():
+    orders = [MARGHERITA, OLIVE, {"cheese": 5.0, "dough": 2.0}]
+    result = FeasibilityEngine.for_orders(orders).check(orders, STOCK)
+
+    assert result.feasible.tolist() == [True, False, False]
+    assert result.missing_ingredients(0) == []
+    assert result.missing_ingredients(1) == ["olives"]
+    assert result.missing_ingredients(2) == ["dough", "cheese"]
+    assert result.shortfall[2].tolist() == pytest.approx([1.0, 0.0, 2.0, 0.0])
+
+
+def test_servings_are_limited_by_the_scarcest_ingredient():
+    result = FeasibilityEngine.for_orders([MARGHERITA]).check([MARGHERITA, {}], STOCK)
+
+    # 0.35kg of sauce at 0.1kg a pizza; an order needing nothing has no limit to report
+    assert result.max_servings.tolist() == [3, 0]
+
+
+def test_one_column_per_ingredient():
+    engine = FeasibilityEngine(["cheese", "dough", "cheese"])
+    assert engine.ingredients == ["cheese", "dough"]
+    assert engine.requirement_matrix([{"cheese": 0.1, "dough": 0.2}]).tolist() == [[0.1, 0.2]]
+    assert engine.inventory_vector({"dough": 4, "cheese": None}).tolist() == [0.0, 4.0]
+
+
+def test_menu_capacity():
+    assert menu_capacity({"margherita pizza": MARGHERITA, "olive pizza": OLIVE}, STOCK) == {
+        "margherita pizza": 3, "olive pizza": 0}
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from conftest import ORDER_LAMBDA_DIR
+from ingredient_index import IngredientIndex, load_synonyms, normalize_ingredient_name
+
+TABLE_NAMES = ["tomato_sauce", "cheese", "mushrooms", "chicken Breast", "olives", "ham", "jam", "rice", "dice"]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return IngredientIndex.build(TABLE_NAMES, load_synonyms(os.path.join(ORDER_LAMBDA_DIR, 'ingredient_synonyms.json')))
+
+
+@pytest.mark.parametrize("name, normalized", [
+    ("Tomato_Sauce", "tomato sauce"),
+    ("chicken Breasts", "chicken breast"),
+    ("Cherries!", "cherry"),
+    ("  sun-dried   tomatoes ", "sun dried tomato"),
+])
+def test_normalize(name, normalized):
+    assert normalize_ingredient_name(name) == normalized
+
+
+@pytest.mark.parametrize("name, canonical", [
+    ("Tomato Sauce", "tomato_sauce"),
+    ("MUSHROOM", "mushrooms"),
+    # Synonyms map onto the table's spelling of their canonical name
+    ("pizza sauce", "tomato_sauce"),
+    ("Mozzarella", "cheese"),
+    ("grilled chicken", "chicken Breast"),
+])
+def test_exact_and_synonym_names(index, name, canonical):
+    assert index.resolve(name) == canonical
+
+
+@pytest.mark.parametrize("name, canonical", [
+    ("mushroms", "mushrooms"),
+    ("chiken breast", "chicken Breast"),
+    ("tomatoe sauce", "tomato_sauce"),
+    ("olivs", "olives"),
+])
+def test_misspellings_resolve(index, name, canonical):
+    assert index.resolve(name) == canonical
+
+
+@pytest.mark.parametrize("name", [
+    "bice",  # 'rice' and 'dice' are equally close
+    "saffron",
+    "",
+])
+def test_ambiguous_and_unknown_names(index, name):
+    assert index.resolve(name) is None
+
+
+def test_short_names_are_not_guessed(index):
+    # 'yam' is one edit from both 'ham' and 'jam', names under four characters never match fuzzily
+    assert index.resolve("yam") is None
+    # Names under six characters allow a single edit
+    assert index.resolve("hamm") == "ham"
+    assert index.resolve("chese") == "cheese"
+    assert index.resolve("chs") is None
+
+
+def test_names_added_later_resolve(index):
+    index.add("truffle oil")
+    assert index.resolve("Truffle Oils") == "truffle oil"
@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+import boto3
+import pytest
+from moto import mock_aws
+
+import interpretation_cache
+from interpretation_cache import InterpretationCache, interpretation_cache_key, normalize_message
+
+PIZZA = {"intent": "order_food", "food_type": "pizza", "ingredients": {"cheese": "0.15kg"},
+         "inventory_choice": "current_restaurant"}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Both of the module's clocks, moved forward together."""
+    now = SimpleNamespace(value=1_700_000_000.0)
+    monkeypatch.setattr(interpretation_cache, 'time',
+                        SimpleNamespace(monotonic=lambda: now.value, time=lambda: now.value))
+    return now
+
+
+@pytest.fixture
+def shared_table(monkeypatch):
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        monkeypatch.setenv(name, 'testing')
+    with mock_aws():
+        yield boto3.resource('dynamodb', region_name='us-east-1').create_table(
+            TableName='InterpretationCache',
+            KeySchema=[{'AttributeName': 'CacheKey', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'CacheKey', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST',
+        )
+
+
+def test_keys_ignore_case_and_punctuation():
+    assert normalize_message("Large  Pepperoni pizza!") == "large pepperoni pizza"
+    key = interpretation_cache_key("One margherita, please", "v2", "gpt-4o-mini")
+    assert key == interpretation_cache_key("one MARGHERITA please!", "v2", "gpt-4o-mini")
+    assert key != interpretation_cache_key("one margherita please", "v3", "gpt-4o-mini")
+    assert key != interpretation_cache_key("one margherita please", "v2", "gpt-4o")
+
+
+def test_local_entries_expire_after_the_ttl(clock):
+    cache = InterpretationCache(ttl_seconds=60)
+    cache.put("k", PIZZA)
+
+    clock.value += 60
+    assert cache.get("k") == PIZZA
+    clock.value += 1
+    assert cache.get("k") is None
+    assert cache.stats()["size"] == 0 and cache.stats()["misses"] == 1
+
+
+def test_hits_are_copies(clock):
+    cache = InterpretationCache()
+    cache.put("k", PIZZA)
+    cache.get("k")["ingredients"]["cheese"] = "5kg"
+
+    assert cache.get("k") == PIZZA
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = InterpretationCache(max_entries=2)
+    cache.put("a", PIZZA)
+    cache.put("b", PIZZA)
+    cache.get("a")
+    cache.put("c", PIZZA)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == PIZZA and cache.get("c") == PIZZA
+
+
+def test_shared_tier_serves_other_containers_until_it_expires(clock, shared_table):
+    writer = InterpretationCache(shared_table_getter=lambda: shared_table, shared_ttl_seconds=600)
+    reader = InterpretationCache(ttl_seconds=60, shared_table_getter=lambda: shared_table)
+    writer.put("k", PIZZA)
+
+    assert reader.get("k") == PIZZA
+    assert reader.stats()["shared_hits"] == 1
+    # Kept locally from then on
+    assert reader.get("k") == PIZZA and reader.stats()["local_hits"] == 1
+
+    # DynamoDB deletes expired items late; an expired item is a miss all the same
+    clock.value += 601
+    assert shared_table.get_item(Key={'CacheKey': 'k'}).get('Item') is not None
+    assert reader.get("k") is None
+
+
+def test_shared_tier_failures_are_misses(clock):
+    def broken_table():
+        raise RuntimeError("table unavailable")
+
+    cache = InterpretationCache(shared_table_getter=broken_table)
+    cache.put("k", PIZZA)  # the write fails, the local tier still has it
+    assert cache.get("k") == PIZZA
+    assert cache.get("other") is None
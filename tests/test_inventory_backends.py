@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from inventory_backends import DynamoDBInventoryBackend, MemoryInventoryBackend, SQLiteInventoryBackend
+
+STOCK = {"cheese": 1.0, "dough": 2.0, "tomato_sauce": 0.5}
+
+
+def dynamodb_backend():
+    dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+    ingredients = dynamodb.create_table(
+        TableName='Ingredients',
+        KeySchema=[{'AttributeName': 'IngredientName', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'IngredientName', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    dynamodb.create_table(
+        TableName='Reservations',
+        KeySchema=[{'AttributeName': 'OrderId', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'OrderId', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    for name, quantity in STOCK.items():
+        ingredients.put_item(Item={'IngredientName': name, 'Quantity': Decimal(str(quantity))})
+    return DynamoDBInventoryBackend(lambda: dynamodb, 'Ingredients', 'Reservations')
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'dynamodb'])
+def backend(request, monkeypatch):
+    if request.param == 'memory':
+        yield MemoryInventoryBackend(dict(STOCK))
+    elif request.param == 'sqlite':
+        backend = SQLiteInventoryBackend(':memory:', dict(STOCK))
+        yield backend
+        backend.close()
+    else:
+        for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+            monkeypatch.setenv(name, 'testing')
+        with mock_aws():
+            yield dynamodb_backend()
+
+
+def test_reserve_is_idempotent_per_order(backend):
+    assert backend.reserve('order-1', {"cheese": 0.3, "dough": 0.5}) == (True, [])
+    assert backend.reserve('order-1', {"cheese": 0.3, "dough": 0.5}) == (True, [])
+
+    assert backend.batch_get(["cheese", "dough"]) == pytest.approx({"cheese": 0.7, "dough": 1.5})
+
+
+def test_release_returns_stock_once(backend):
+    backend.reserve('order-2', {"cheese": 0.4})
+
+    assert {name: float(amount) for name, amount in backend.release('order-2').items()} == pytest.approx({"cheese": 0.4})
+    assert backend.release('order-2') is None
+    assert backend.release('never-reserved') is None
+    assert backend.batch_get(["cheese"]) == pytest.approx({"cheese": 1.0})
+
+
+def test_short_stock_reserves_nothing(backend):
+    reserved, lost = backend.reserve('order-3', {"cheese": 0.2, "tomato_sauce": 0.6})
+
+    assert not reserved
+    assert lost == ["tomato_sauce"]
+    # The decrement that would have succeeded is not applied either
+    assert backend.batch_get(["cheese", "tomato_sauce"]) == pytest.approx({"cheese": 1.0, "tomato_sauce": 0.5})
+    assert backend.release('order-3') is None
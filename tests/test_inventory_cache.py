@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+import pytest
+
+import inventory_cache
+from inventory_cache import InventorySnapshotCache, is_inventory_stream_event
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(inventory_cache, 'time', SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def stream_record(name, event_name='MODIFY'):
+    return {'eventSource': 'aws:dynamodb', 'eventName': event_name,
+            'dynamodb': {'Keys': {'IngredientName': {'S': name}}}}
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = InventorySnapshotCache(ttl_seconds=30)
+    cache.put_many({"cheese": 4.0, "caviar": None})
+
+    clock.value += 30
+    assert cache.get_many(["cheese", "caviar", "dough"]) == ({"cheese": 4.0, "caviar": None}, ["dough"])
+
+    clock.value += 1
+    assert cache.get_many(["cheese"]) == ({}, ["cheese"])
+    assert cache.stats()["stale"] == 1 and cache.stats()["size"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = InventorySnapshotCache(max_entries=2)
+    cache.put_many({"cheese": 1.0, "dough": 2.0})
+    cache.get_many(["cheese"])
+    cache.put_many({"olives": 3.0})
+
+    assert cache.get_many(["cheese", "dough", "olives"]) == ({"cheese": 1.0, "olives": 3.0}, ["dough"])
+    assert cache.stats()["evictions"] == 1
+
+
+def test_stream_records_invalidate_their_ingredients(clock):
+    cache = InventorySnapshotCache()
+    cache.put_many({"cheese": 1.0, "dough": 2.0})
+    event = {'Records': [stream_record("cheese"), stream_record("pepperoni", 'INSERT')]}
+
+    assert is_inventory_stream_event(event)
+    assert cache.apply_stream_records(event['Records']) == 2
+    assert cache.get_many(["cheese", "dough"]) == ({"dough": 2.0}, ["cheese"])
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_disabled_cache_stores_nothing(clock):
+    cache = InventorySnapshotCache(ttl_seconds=0)
+    cache.put_many({"cheese": 1.0})
+
+    assert not cache.enabled
+    assert cache.get_many(["cheese"]) == ({}, ["cheese"])
+
+
+def test_only_dynamodb_stream_events_are_recognized():
+    assert not is_inventory_stream_event({'Records': [{'eventSource': 'aws:sqs'}]})
+    assert not is_inventory_stream_event({'Records': []})
+    assert not is_inventory_stream_event("not an event")
@@ -0,0 +1,44 @@
+import pytest
+
+from kitchen import KitchenScheduler
+
+
+@pytest.fixture
+def clock():
+    return {"now": 0.0}
+
+
+@pytest.fixture
+def kitchen(clock):
+    # One oven: pizzas queue behind each other, ten minutes each
+    return KitchenScheduler({"oven": 1, "prep": 2}, {"pizza": [["prep", 2], ["oven", 10]]}, [["prep", 5]],
+                            clock=lambda: clock["now"])
+
+
+def test_orders_queue_on_the_station(kitchen):
+    assert [kitchen.schedule(order_id, food_type="pizza") for order_id in ("a", "b", "c")] == [720, 1320, 1920]
+    # Both prep slots are busy until 120, so the five-minute default dish starts then
+    assert kitchen.schedule("salad") == 420
+
+
+def test_cancel_moves_the_orders_behind_up(kitchen, clock):
+    for order_id in ("a", "b", "c"):
+        kitchen.schedule(order_id, food_type="pizza")
+
+    clock["now"] = 300.0
+    assert kitchen.cancel("b")
+    # 'a' keeps its oven slot, 'c' takes the one 'b' left
+    assert kitchen.eta("a") == 720
+    assert kitchen.eta("c") == 1320
+    assert kitchen.eta("b") is None
+    assert not kitchen.cancel("b")
+    assert kitchen.stats()["replays"] == 1
+
+
+def test_complete_early_moves_the_next_order_up(kitchen, clock):
+    for order_id in ("a", "b"):
+        kitchen.schedule(order_id, food_type="pizza")
+
+    clock["now"] = 500.0
+    assert kitchen.complete("a")
+    assert kitchen.eta("b") == 500 + 600
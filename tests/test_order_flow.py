@@ -0,0 +1,129 @@
+import json
+from uuid import uuid4
+
+
+def order_turn(app, conversation_id, **body):
+    return app.process_order({"conversation_id": conversation_id, **body}).as_dict()
+
+
+def test_switching_order_type_replaces_the_estimate(order_app):
+    conversation = str(uuid4())
+    planner = order_app.get_delivery_planner()
+
+    pickup = order_turn(order_app, conversation, message="one margherita pizza")
+    assert pickup['order_type'] == 'pickup' and pickup['estimated_pickup_time']
+    order_id = pickup['order_id']
+
+    delivery = order_turn(order_app, conversation, message="", delivery_address="12 Bedford Ave, 11211")
+    assert delivery['status'] == 'completed'
+    assert delivery['estimated_pickup_time'] is None
+    assert delivery['estimated_delivery_time']
+    assert planner.eta(order_id) is not None
+
+    # Back to pickup: off the driver run, and the pickup estimate is worked out again
+    pickup = order_turn(order_app, conversation, message="", delivery_address=None)
+    assert pickup['order_type'] == 'pickup'
+    assert pickup['estimated_pickup_time'] and pickup['estimated_delivery_time'] is None
+    assert not any(note.startswith("Skipped calculate_pickup_time") for note in pickup['notes'])
+    assert planner.eta(order_id) is None
+
+
+def test_quote_with_a_bad_amount_is_a_client_error(order_app):
+    orders = [{"ingredients": {"cheese": "0.2kg"}, "menu_item": "margherita pizza"},
+              {"ingredients": {"cheese": "a handful"}}]
+    response = order_app.handle_event({"body": json.dumps({"action": "quote", "orders": orders})}, None)
+
+    assert response['statusCode'] == 400
+    assert json.loads(response['body'])['message'].startswith("Order 1: Invalid format: a handful")
+
+    response = order_app.handle_event({"body": json.dumps({"action": "quote", "orders": orders[:1]})}, None)
+    assert response['statusCode'] == 200
+    assert len(json.loads(response['body'])['prices']) == 1
+
+
+def test_new_order_does_not_reuse_a_client_order_id(order_app):
+    backend = order_app.get_inventory_backend()
+    # An old order still holds a reservation, but its checkpoint is gone
+    backend.reserve('reused-order', {"cheese": 0.1})
+    before = backend.batch_get(["pepperoni"])["pepperoni"]
+
+    response = order_app.process_order({"order_id": "reused-order", "message": "one pepperoni pizza"}).as_dict()
+
+    assert response['status'] == 'completed'
+    assert response['order_id'] != 'reused-order'
+    assert backend.batch_get(["pepperoni"])["pepperoni"] < before
+    backend.release('reused-order')
+
+
+def test_follow_up_that_cannot_be_made_withdraws_the_order(order_app):
+    conversation = str(uuid4())
+    backend = order_app.get_inventory_backend()
+
+    first = order_turn(order_app, conversation, message="one margherita pizza")
+    order_id = first['order_id']
+    assert first['status'] == 'completed' and order_app.get_kitchen().eta(order_id) is not None
+
+    backend.set_quantities({"olives": 0})
+    order_app.inventory_cache.invalidate(["olives"])
+    try:
+        changed = order_turn(order_app, conversation, message="make it a pepperoni pizza with olives")
+    finally:
+        backend.set_quantities({"olives": 1_000})
+        order_app.inventory_cache.invalidate(["olives"])
+
+    # Nothing of the earlier turn is held: stock, kitchen slot and price all go
+    assert changed['status'] == 'ingredients_checked'
+    assert changed['total_price'] == 0.0
+    assert changed['estimated_pickup_time'] is None
+    assert order_app.get_kitchen().eta(order_id) is None
+    assert backend.release(order_id) is None
+
+    # Once the olives are back, the same request is reserved and scheduled again
+    again = order_turn(order_app, conversation, message="make it a pepperoni pizza with olives")
+    assert again['status'] == 'completed' and again['estimated_pickup_time']
+    assert order_app.get_kitchen().eta(order_id) is not None
+
+
+def test_message_without_an_order_reserves_nothing(order_app):
+    response = order_turn(order_app, str(uuid4()), message="hello, are you open today?")
+
+    assert response['status'] == 'initiated'
+    assert response['errors'] == ["No food order found in the message (intent 'unknown', 0 ingredients)"]
+    assert order_app.get_inventory_backend().release(response['order_id']) is None
+
+
+def test_follow_up_without_an_order_keeps_the_order(order_app):
+    conversation = str(uuid4())
+    first = order_turn(order_app, conversation, message="one margherita pizza")
+
+    thanks = order_turn(order_app, conversation, message="thanks, see you soon")
+
+    assert thanks['status'] == 'completed'
+    assert thanks['errors'] and thanks['errors'][0].startswith("No food order found")
+    assert thanks['total_price'] == first['total_price']
+    assert thanks['estimated_pickup_time'] == first['estimated_pickup_time']
+
+
+def test_checkpointed_conversation_stays_within_the_window(order_app, monkeypatch):
+    from conversation_context import ConversationWindow, count_tokens
+
+    # Room for the system prompt and about two short turns
+    budget = count_tokens(order_app.STRUCTURED_SYSTEM_PROMPT) + 60
+    monkeypatch.setattr(order_app, 'context_window', ConversationWindow(max_tokens=budget, keep_turns=2))
+    conversation = str(uuid4())
+    config = {"configurable": {"thread_id": conversation}}
+    messages = ["one pizza please", "make it a pepperoni pizza", "add mushrooms to the pepperoni pizza",
+                "actually olives on the pepperoni pizza", "and extra cheese on the pepperoni pizza"]
+
+    for message in messages:
+        last = order_turn(order_app, conversation, message=message)
+    saved = order_app.get_graph().get_state(config).values
+
+    assert last['status'] == 'completed'
+    kept = [message['content'] for message in saved['messages']]
+    assert 1 <= len(kept) <= 2 and kept == messages[-len(kept):]
+    assert "one pizza please" in saved['context_summary']['text']
+    assert saved['context_summary']['folded_turns'] == 0
+    assert saved['context_messages'] == []
+    # Notes belong to the turn that produced them
+    assert sum(note.startswith("Order interpreted") for note in last['notes']) == 1
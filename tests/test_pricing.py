@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from conftest import ORDER_LAMBDA_DIR
+from pricing import PriceTable
+
+
+@pytest.fixture(scope='module')
+def prices():
+    return PriceTable.from_file(os.path.join(ORDER_LAMBDA_DIR, 'pricing.json'))
+
+
+ORDERS = [
+    ({"dough": 0.25, "tomato sauce": 0.1, "cheese": 0.15}, "margherita pizza", "pizza"),
+    ({"Pasta": 0.2, "minced_beef": 0.15, "tomato": 0.1}, None, "pasta"),
+    ({"truffle": 0.01, "chicken Breast": 0.2}, None, None),
+    ({"salt": 0.001}, None, None),
+    ({}, "pepperoni pizza", None),
+]
+
+
+def test_quote_orders_matches_price(prices):
+    quantities, menu_items, food_types = (list(column) for column in zip(*ORDERS))
+
+    assert prices.quote_orders(quantities, menu_items, food_types) == pytest.approx(
+        [prices.price(*order) for order in ORDERS])
+
+
+def test_price_of_a_margherita(prices):
+    # 6.00 base + 2 x (0.25 x 1.2 + 0.1 x 3.5 + 0.15 x 11.0), rounded to 0.05
+    assert prices.price(*ORDERS[0]) == pytest.approx(10.6)
+    # Unknown ingredients cost the default, small orders cost the minimum
+    assert prices.price(*ORDERS[2]) == pytest.approx(6.0 + 2 * (0.01 * 8.0 + 0.2 * 10.0), abs=0.025)
+    assert prices.price({"salt": 0.001}, food_type="side") >= 5.0
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from conftest import ORDER_LAMBDA_DIR
+from recipe_catalog import RecipeCatalog
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    return RecipeCatalog.from_file(os.path.join(ORDER_LAMBDA_DIR, 'recipes.json'))
+
+
+@pytest.mark.parametrize("message, menu_item", [
+    ("One margherita pizza, please!", "margherita pizza"),
+    ("I'd like a Pizza Margherita", "margherita pizza"),
+    ("pepperoni", "pepperoni pizza"),
+    ("hi, can I get spag bol", "spaghetti bolognese"),
+])
+def test_plain_orders_match(catalog, message, menu_item):
+    match = catalog.match(message)
+    assert match['menu_item'] == menu_item and match['size'] is None
+    assert match['intent'] == 'order_food'
+    assert match['ingredients'] == catalog.recipes[menu_item]['ingredients']
+
+
+def test_size_scales_the_ingredients(catalog):
+    match = catalog.match("a large pepperoni pizza")
+
+    assert match['size'] == 'large'
+    assert match['ingredients'] == {"dough": "0.35kg", "tomato sauce": "0.14kg", "cheese": "0.21kg",
+                                    "pepperoni": "0.112kg"}
+
+
+@pytest.mark.parametrize("message", [
+    "margherita pizza with extra cheese",  # modifiers change the recipe
+    "pepperoni pizza without cheese",
+    "two margherita pizzas",  # quantities
+    "2 margherita pizza",
+    "small large margherita pizza",  # more than one size
+    "margherita pizza and pepperoni pizza",  # a second dish
+    "margherita pizza garlic bread",
+    "something nice",
+])
+def test_anything_but_a_plain_menu_item_goes_to_the_llm(catalog, message):
+    assert catalog.match(message) is None
+
+
+def test_requirements_are_regular_size_kg(catalog):
+    requirements = catalog.requirements()
+    assert requirements["olive pizza"] == {"dough": 0.25, "tomato sauce": 0.1, "cheese": 0.15, "olives": 0.05}
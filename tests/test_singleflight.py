@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import MicroBatcher, SingleFlight
+
+
+def test_micro_batches_never_exceed_max_batch_size():
+    sizes = []
+
+    def double(items):
+        sizes.append(len(items))
+        time.sleep(0.005)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, window_ms=50, max_batch_size=3, max_concurrency=2)
+    start = threading.Barrier(20)
+    results = {}
+
+    def submit(item):
+        start.wait()
+        results[item] = batcher.submit(item)
+
+    threads = [threading.Thread(target=submit, args=(item,)) for item in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == {item: item * 2 for item in range(20)}
+    assert max(sizes) <= 3
+    assert sum(sizes) == 20
+    assert batcher.stats()['items'] == 20
+
+
+def test_micro_batch_errors_reach_their_callers_only():
+    batcher = MicroBatcher(lambda items: [ValueError(item) if item < 0 else item for item in items], window_ms=1)
+    assert batcher.submit(4) == 4
+    with pytest.raises(ValueError):
+        batcher.submit(-1)
+
+
+def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(2)
+        return 'answer'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('key', slow))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [('answer', False)] + [('answer', True)] * 4
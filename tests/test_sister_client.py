@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from fake_sister_server import FakeSisterRestaurant
+from sister_client import SisterRestaurantClient
+
+
+@pytest.fixture
+def fake():
+    with FakeSisterRestaurant() as fake:
+        yield fake
+
+
+def test_answers_are_cached(fake):
+    client = SisterRestaurantClient(fake.url)
+    assert client.check(['cheese', 'mushrooms']) == {'cheese': True, 'mushrooms': False}
+    assert client.check(['cheese']) == {'cheese': True}
+    assert fake.requests == 1
+    assert client.stats()['cache_hits'] == 1
+
+
+def test_deadline_bounds_the_whole_call(fake):
+    fake.latency_ms = 500
+    client = SisterRestaurantClient(fake.url, deadline=0.1)
+
+    started = time.monotonic()
+    assert client.check(['cheese']) == {'cheese': False}
+    assert time.monotonic() - started < 0.3
+    assert client.stats()['failures'] == 1
+
+
+def test_no_hedge_once_the_deadline_has_passed(fake):
+    fake.latency_ms = 500
+    client = SisterRestaurantClient(fake.url, deadline=0.1, hedge_after=0.1)
+
+    assert client.check(['cheese']) == {'cheese': False}
+    # The hedge would have been sent with a timeout of 0, which requests rejects
+    assert client.stats()['hedged'] == 0
+    assert client.stats()['requests'] == 1
+
+
+def test_slow_request_is_hedged(fake):
+    fake.latency_ms = 150
+    client = SisterRestaurantClient(fake.url, deadline=1.0, hedge_after=0.05)
+
+    assert client.check(['cheese']) == {'cheese': True}
+    assert client.stats()['hedged'] == 1
+
+
+def test_circuit_opens_after_repeated_failures(fake):
+    fake.error_rate = 1.0
+    client = SisterRestaurantClient(fake.url, failure_threshold=2, reset_timeout=60, negative_ttl=0)
+
+    for _ in range(3):
+        assert client.check(['cheese']) == {'cheese': False}
+    assert fake.requests == 2
+    assert client.stats()['circuit'] == 'open'
+    assert client.stats()['short_circuited'] == 1
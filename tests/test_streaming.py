@@ -0,0 +1,52 @@
+import json
+from uuid import uuid4
+
+from streaming import format_sse, wants_event_stream
+
+
+def test_order_progress_events_in_node_order(order_app):
+    events = list(order_app.stream_order_events({"conversation_id": str(uuid4()), "message": "one margherita pizza"}))
+    names = [name for name, _ in events]
+
+    assert names == ['accepted', 'interpreted', 'ingredients_checked', 'reserved', 'submitted',
+                     'order_type_decided', 'eta', 'completed']
+    data = dict(events)
+    assert data['interpreted']['menu_item'] == 'margherita pizza'
+    assert data['reserved']['status'] == 'reserved'
+    # The last event carries the body the blocking handler returns
+    completed = data['completed'].as_dict()
+    assert completed['status'] == 'completed' and completed['order_id'] == data['accepted']['order_id']
+    assert completed['total_price'] == data['submitted']['total_price']
+
+
+def test_errors_are_reported_with_the_node_that_added_them(order_app):
+    events = dict(order_app.stream_order_events({"conversation_id": str(uuid4()), "message": "what time is it?"}))
+
+    assert events['interpreted']['errors'][0].startswith("No food order found")
+    assert 'reserved' not in events
+    assert events['completed'].status == 'initiated'
+
+
+def test_handler_answers_event_stream_requests_with_sse(order_app):
+    event = {'body': json.dumps({"message": "one margherita pizza"}), 'headers': {'Accept': 'text/event-stream'}}
+    response = order_app.handle_event(event, None)
+
+    assert response['statusCode'] == 200
+    assert response['headers']['Content-Type'] == 'text/event-stream'
+    frames = response['body'].split("\n\n")[:-1]
+    assert frames[0].startswith("event: accepted\ndata: {")
+    assert frames[-1].startswith("event: completed\n")
+    assert json.loads(frames[-1].split("data: ", 1)[1])['status'] == 'completed'
+
+
+def test_wants_event_stream():
+    assert wants_event_stream({'headers': {'accept': 'text/event-stream, */*'}})
+    assert wants_event_stream({'queryStringParameters': {'stream': 'True'}})
+    assert not wants_event_stream({'headers': {'Accept': 'application/json'}, 'queryStringParameters': None})
+
+
+def test_format_sse_encodes_datetimes():
+    from datetime import datetime
+
+    frame = format_sse('eta', {"estimated_pickup_time": datetime(2026, 1, 2, 12, 30)})
+    assert frame == 'event: eta\ndata: {"estimated_pickup_time":"2026-01-02T12:30:00"}\n\n'
@@ -0,0 +1,44 @@
+import json
+
+from stub_model import interpret
+from structured_interpretation import INTERPRETATION_SCHEMA, STRUCTURED_SYSTEM_PROMPT, to_interpretation
+
+
+def reply(*ingredients, intent="order_food", food_type="pizza", inventory_choice="current_restaurant"):
+    return {"intent": intent, "food_type": food_type, "inventory_choice": inventory_choice,
+            "ingredients": [{"name": name, "kg": kg} for name, kg in ingredients]}
+
+
+def test_ingredients_become_kg_strings():
+    assert to_interpretation(reply(("dough", 0.25), ("tomato sauce", 0.1), ("cheese", 0.1500001))) == {
+        "intent": "order_food",
+        "food_type": "pizza",
+        "ingredients": {"dough": "0.25kg", "tomato sauce": "0.1kg", "cheese": "0.15kg"},
+        "inventory_choice": "current_restaurant",
+    }
+
+
+def test_repeated_ingredients_are_summed():
+    interpretation = to_interpretation(reply(("cheese", 0.15), ("dough", 0.25), ("cheese", 0.1)))
+    assert interpretation["ingredients"] == {"cheese": "0.25kg", "dough": "0.25kg"}
+
+
+def test_no_ingredients():
+    assert to_interpretation(reply(intent="unknown"))["ingredients"] == {}
+
+
+def test_schema_is_strict():
+    # Strict structured output needs every property required and nothing else allowed, at every level
+    item = INTERPRETATION_SCHEMA["properties"]["ingredients"]["items"]
+    for schema in (INTERPRETATION_SCHEMA, item):
+        assert set(schema["required"]) == set(schema["properties"])
+        assert schema["additionalProperties"] is False
+    assert INTERPRETATION_SCHEMA["properties"]["inventory_choice"]["enum"] == ["current_restaurant", "sister_restaurant"]
+    for choice in INTERPRETATION_SCHEMA["properties"]["inventory_choice"]["enum"]:
+        assert choice in STRUCTURED_SYSTEM_PROMPT
+
+
+def test_round_trip_of_a_model_reply():
+    legacy = interpret("a pepperoni pizza with olives")
+    structured = reply(*((name, float(amount[:-2])) for name, amount in legacy["ingredients"].items()))
+    assert to_interpretation(json.loads(json.dumps(structured)))["ingredients"] == legacy["ingredients"]